@@ -0,0 +1,192 @@
+"""
+Table for tracking the course imports running in the background.
+"""
+from datetime import timedelta
+import json
+
+from django.contrib.auth.models import User
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.translation import ugettext as _
+
+from xmodule_django.models import CourseKeyField
+
+
+class CourseImportJob(models.Model):
+    """
+    An import of a course from an uploaded .tar.gz file, run by the
+    contentstore.tasks.import_course task once the upload is done.
+
+    `stage` is the stage the import is at (or failed at), as reported to
+    Studio by import_status_handler: 1 while extracting the file, 2 while
+    looking for its course.xml, and 3 while importing it to the modulestore.
+    `progress` stores, as a JSON dict, the numbers of items done and of all the
+    items of each step of the import ('extract', 'static', 'modules' and
+    'drafts'), e.g. {"modules": {"done": 10, "total": 200}}.
+
+    A running job saves its progress at least every few seconds, refreshing
+    `updated`. A job that hasn't been updated for RUNNING_TIMEOUT is taken to
+    have lost its worker, and is marked as failed when it is next looked up.
+    """
+    UPLOADING = 'uploading'
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    # the states of the imports that haven't finished
+    ACTIVE_STATES = (UPLOADING, QUEUED, RUNNING)
+
+    # the status reported for a successful import
+    SUCCESS_STATUS = 4
+
+    # how long an import may run without saving its progress before it's considered dead
+    RUNNING_TIMEOUT = timedelta(minutes=15)
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    filename = models.CharField(max_length=255)
+    state = models.CharField(max_length=24, default=UPLOADING, db_index=True)
+    stage = models.IntegerField(default=0)
+    progress = models.TextField(default='{}')
+    error = models.TextField(blank=True)
+    cancel_requested = models.BooleanField(default=False)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __unicode__(self):
+        return u'CourseImportJob<{} {} {}>'.format(self.course_id, self.filename, self.state)
+
+    @classmethod
+    def create(cls, user, course_key, filename):
+        """
+        Create the job importing the file being uploaded by `user`.
+        """
+        job = cls(user=user, course_id=course_key, filename=filename)
+        job.save_now()
+        return job
+
+    @classmethod
+    def latest(cls, user, course_key, filename):
+        """
+        Return the last job importing the file uploaded by `user`, or None.
+
+        The job is marked as failed if its worker stopped updating it.
+        """
+        jobs = cls.objects.filter(user=user, course_id=course_key, filename=filename).order_by('-id')
+        if not jobs:
+            return None
+        job = jobs[0]
+        job.expire()
+        return job
+
+    @transaction.autocommit
+    def save_now(self):
+        """
+        Writes the job immediately, ensuring the transaction is committed, so
+        that the task importing the course can see it.
+        """
+        self.save()
+
+    @transaction.autocommit
+    def _update(self, states, filters=None, **fields):
+        """
+        Update `fields` of the job, if it's in one of `states` (and matches the
+        lookups of `filters`, if given). Returns whether it was updated.
+
+        Only these fields are written, so that the job can be cancelled while
+        it runs.
+        """
+        fields['updated'] = timezone.now()
+        jobs = type(self).objects.filter(pk=self.pk, state__in=states, **(filters or {}))
+        updated = jobs.update(**fields)
+        if updated:
+            for name, value in fields.iteritems():
+                setattr(self, name, value)
+        return bool(updated)
+
+    def enqueue(self):
+        """
+        Mark the upload as done, returns False if the job was cancelled.
+        """
+        return self._update([self.UPLOADING], state=self.QUEUED, stage=1)
+
+    def start(self):
+        """
+        Mark the job as running, returns False if it was cancelled.
+        """
+        return self._update([self.QUEUED], state=self.RUNNING, started=timezone.now())
+
+    def set_progress(self, stage, progress):
+        """
+        Save the stage and progress of the running job.
+        """
+        return self._update([self.RUNNING], stage=stage, progress=json.dumps(progress))
+
+    def finish(self, state, error=''):
+        """
+        Mark the job as finished in `state`, with the `error` that made it fail.
+        """
+        return self._update(self.ACTIVE_STATES, state=state, error=error)
+
+    def cancel(self):
+        """
+        Ask for the job to be cancelled. Jobs that haven't started are
+        cancelled right away, running ones are cancelled by the task at its next
+        update of the progress of the import.
+
+        Returns False if the job already finished.
+        """
+        if self._update([self.UPLOADING, self.QUEUED], state=self.CANCELLED, cancel_requested=True):
+            return True
+        return self._update([self.RUNNING], cancel_requested=True)
+
+    def expire(self):
+        """
+        Mark the job as failed if it has been running without saving its
+        progress for RUNNING_TIMEOUT, e.g. because the worker running it died.
+        Its worker, if still alive, stops at its next update of the progress of
+        the import.
+
+        Returns whether the job was marked as failed.
+        """
+        stale_before = timezone.now() - self.RUNNING_TIMEOUT
+        if self.state != self.RUNNING or self.updated >= stale_before:
+            return False
+        # the worker may have saved its progress since the job was read
+        return self._update(
+            [self.RUNNING], filters={'updated__lt': stale_before},
+            state=self.FAILED, cancel_requested=True,
+            error=_('The import stopped making progress.')
+        )
+
+    @transaction.autocommit
+    def is_cancel_requested(self):
+        """
+        Return whether the job was asked to be cancelled, reading it from the
+        database.
+        """
+        # end the transaction of previous reads, to see changes made since then
+        transaction.commit_unless_managed()
+        return type(self).objects.filter(pk=self.pk, cancel_requested=True).exists()
+
+    def get_progress(self):
+        """
+        Return the progress of the import, see CourseImportJob.
+        """
+        return json.loads(self.progress)
+
+    @property
+    def import_status(self):
+        """
+        The status of the import, as reported by import_status_handler.
+        """
+        if self.state == self.UPLOADING:
+            return 0
+        if self.state == self.SUCCEEDED:
+            return self.SUCCESS_STATUS
+        if self.state in (self.FAILED, self.CANCELLED):
+            return -max(self.stage, 1)
+        return self.stage
@@ -0,0 +1,190 @@
+"""
+Background tasks of Studio.
+
+Course imports are run by the import_course task, once the file has been
+uploaded by import_handler. The task tracks the progress of the import in a
+CourseImportJob, which import_status_handler reports to the browser, and
+stops the import when the job is cancelled.
+
+The uploaded files are saved and extracted in a directory of their job in
+settings.GITHUB_REPO_ROOT, which must be shared by Studio and the celery
+workers. An import whose worker died is reported as failed once it hasn't
+saved its progress for CourseImportJob.RUNNING_TIMEOUT.
+"""
+import logging
+import os
+import shutil
+import tarfile
+import time
+
+from celery import task
+from django.conf import settings
+from django.core.exceptions import SuspiciousOperation
+from django.utils.translation import ugettext as _
+from path import path
+
+from extract_tar import safetar_extractall
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.xml_importer import import_from_xml
+
+from contentstore.models import CourseImportJob
+
+log = logging.getLogger(__name__)
+
+# how often the progress of an import is saved, and checked for cancellation (seconds)
+IMPORT_PROGRESS_INTERVAL = 1
+
+
+class ImportCancelled(Exception):
+    """
+    Raised to stop an import whose job was cancelled.
+    """
+    pass
+
+
+class CourseImportError(Exception):
+    """
+    An error in the uploaded course, reported to the user with the message of
+    the exception.
+    """
+    pass
+
+
+def course_import_root(job_id):
+    """
+    Return the directory of settings.GITHUB_REPO_ROOT holding the files of the
+    CourseImportJob `job_id`, so that the uploads of a course by concurrent
+    jobs don't share their files.
+    """
+    return path(settings.GITHUB_REPO_ROOT) / "import-{0}".format(job_id)
+
+
+def course_import_subdir(course_key):
+    """
+    Return the name of the directory of `course_import_root` in which the
+    course is uploaded and extracted.
+    """
+    return "{0}-{1}-{2}".format(course_key.org, course_key.course, course_key.run)
+
+
+class ImportProgress(object):
+    """
+    Keeps count of the progress of the import of a job, saving it every
+    `interval` seconds. Raises ImportCancelled when saving the progress of
+    a job that was cancelled.
+    """
+    def __init__(self, job, interval=IMPORT_PROGRESS_INTERVAL):
+        self.job = job
+        self.interval = interval
+        self.stage = job.stage
+        self.counts = job.get_progress()
+        self.saved = time.time()
+
+    def set_stage(self, stage):
+        """
+        Move the import to `stage`, saving it right away.
+        """
+        self.stage = stage
+        self.save()
+
+    def __call__(self, step, done, total):
+        """
+        Record that `done` of the `total` items of `step` are done.
+        """
+        self.counts[step] = {'done': done, 'total': total}
+        if time.time() - self.saved >= self.interval:
+            self.save()
+
+    def save(self):
+        """
+        Save the progress of the job, unless it was cancelled.
+        """
+        if self.job.is_cancel_requested():
+            raise ImportCancelled()
+        self.job.set_progress(self.stage, self.counts)
+        self.saved = time.time()
+
+
+@task()  # pylint: disable=E1102
+def import_course(job_id):
+    """
+    Import the course uploaded for the CourseImportJob `job_id`.
+    """
+    job = CourseImportJob.objects.get(pk=job_id)
+    import_root = course_import_root(job.id)
+    course_subdir = course_import_subdir(job.course_id)
+
+    try:
+        if not job.start():
+            log.info(u"Course import %s was cancelled before it started", job.id)
+            return
+
+        progress = ImportProgress(job)
+        state, error = CourseImportJob.SUCCEEDED, ''
+        try:
+            _import_course(job, import_root, course_subdir, progress)
+        except ImportCancelled:
+            log.info(u"Course import %s was cancelled", job.id)
+            state, error = CourseImportJob.CANCELLED, _('The import was cancelled.')
+        except CourseImportError as exc:
+            state, error = CourseImportJob.FAILED, unicode(exc)
+        except Exception as exc:  # pylint: disable=broad-except
+            log.exception(u"Error importing course %s", job.course_id)
+            state, error = CourseImportJob.FAILED, unicode(exc)
+
+        # save the stage the import failed at
+        job.set_progress(progress.stage, progress.counts)
+        job.finish(state, error)
+    finally:
+        shutil.rmtree(import_root, ignore_errors=True)
+
+
+def _import_course(job, import_root, course_subdir, progress):
+    """
+    Extract the uploaded file of the job in `course_subdir` of `import_root`,
+    and import it into the course of the job.
+    """
+    course_dir = import_root / course_subdir
+    progress.set_stage(1)
+    tar_file = tarfile.open(course_dir / job.filename)
+    try:
+        total = len(tar_file.getmembers())
+        safetar_extractall(
+            tar_file, (course_dir + '/').encode('utf-8'),
+            progress=lambda done: progress('extract', done, total)
+        )
+    except SuspiciousOperation as exc:
+        raise CourseImportError(u'Unsafe tar file. Aborting import. {}'.format(exc.args[0]))
+    finally:
+        tar_file.close()
+
+    progress.set_stage(2)
+
+    # find the 'course.xml' file
+    for dirpath, _dirnames, filenames in os.walk(course_dir):
+        if 'course.xml' in filenames:
+            break
+    else:
+        raise CourseImportError(_('Could not find the course.xml file in the package.'))
+
+    dirpath = path(dirpath)
+    log.debug(u'found course.xml at %s', dirpath)
+
+    if dirpath != course_dir:
+        for fname in os.listdir(dirpath):
+            shutil.move(dirpath / fname, course_dir)
+
+    progress.set_stage(3)
+    _module_store, course_items = import_from_xml(
+        modulestore(),
+        job.user.id,
+        import_root,
+        [course_subdir],
+        load_error_modules=False,
+        static_content_store=contentstore(),
+        target_course_id=job.course_id,
+        progress=progress,
+        parallel_static=True,
+    )
+    log.debug(u'new course at %s', course_items[0].location)
@@ -8,6 +8,7 @@ from django.test.client import Client
 from django.test.utils import override_settings
 from django.conf import settings
 import copy
+import threading
 
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.django import modulestore
@@ -133,6 +134,60 @@ class ContentStoreImportTest(ModuleStoreTestCase):
         self.assertEqual(len(all_assets), 0)
         self.assertEqual(count, 0)
 
+    def test_parallel_static_import_progress(self):
+        """
+        Test importing the static content alongside the modules, while
+        reporting the progress of the import.
+        """
+        content_store = contentstore()
+        module_store = modulestore()
+        progress = {}
+
+        def record_progress(stage, done, total):
+            """ Record the progress of the import """
+            progress[stage] = (done, total)
+
+        __, courses = import_from_xml(
+            module_store, self.user.id, 'common/test/data/', ['toy'],
+            static_content_store=content_store, progress=record_progress, parallel_static=True
+        )
+
+        __, count = content_store.get_all_content_for_course(courses[0].id)
+        self.assertEqual(count, 5)
+        self.assertEqual(progress['static'], (5, 5))
+
+        modules_done, modules_total = progress['modules']
+        self.assertEqual(modules_done, modules_total)
+        self.assertGreater(modules_total, 1)
+
+    def test_parallel_static_import_stopped(self):
+        """
+        Test that the static content import is stopped when the import is
+        cancelled while waiting for it to finish.
+        """
+        class Cancelled(Exception):
+            """ Raised to cancel the import """
+            pass
+
+        calls = []
+
+        def cancel_when_waiting(stage, done, total):
+            """
+            Cancel the import once it's waiting for the static content, which
+            is when the progress of the static content is reported repeatedly.
+            """
+            if stage == 'static' and calls[-1:] == ['static']:
+                raise Cancelled()
+            calls.append(stage)
+
+        with self.assertRaises(Cancelled):
+            import_from_xml(
+                modulestore(), self.user.id, 'common/test/data/', ['toy'],
+                static_content_store=contentstore(), progress=cancel_when_waiting, parallel_static=True
+            )
+        self.assertIn('modules', calls)
+        self.assertFalse([thread for thread in threading.enumerate() if thread.name == 'import_static_content'])
+
     def test_no_static_link_rewrites_on_import(self):
         module_store = modulestore()
         _, courses = import_from_xml(module_store, self.user.id, 'common/test/data/', ['toy'], do_import_static=False, verbose=True)
@@ -10,14 +10,13 @@ import tarfile
 from path import path
 from tempfile import mkdtemp
 
-from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.exceptions import SuspiciousOperation, PermissionDenied
+from django.core.exceptions import PermissionDenied
 from django.core.files.temp import NamedTemporaryFile
 from django.core.servers.basehttp import FileWrapper
 from django.http import HttpResponse, HttpResponseNotFound
 from django.utils.translation import ugettext as _
-from django.views.decorators.http import require_http_methods, require_GET
+from django.views.decorators.http import require_http_methods, require_GET, require_POST
 
 from django_future.csrf import ensure_csrf_cookie
 from edxmako.shortcuts import render_to_response
@@ -25,20 +24,20 @@ from xmodule.contentstore.django import contentstore
 from xmodule.exceptions import SerializationError
 from xmodule.modulestore.django import modulestore
 from opaque_keys.edx.keys import CourseKey
-from xmodule.modulestore.xml_importer import import_from_xml
 from xmodule.modulestore.xml_exporter import export_to_xml
 
 from .access import has_course_access
 
-from extract_tar import safetar_extractall
 from student import auth
 from student.roles import CourseInstructorRole, CourseStaffRole, GlobalStaff
 from util.json_request import JsonResponse
 
+from contentstore.models import CourseImportJob
+from contentstore.tasks import course_import_root, course_import_subdir, import_course
 from contentstore.utils import reverse_course_url, reverse_usage_url
 
 
-__all__ = ['import_handler', 'import_status_handler', 'export_handler']
+__all__ = ['import_handler', 'import_status_handler', 'import_cancel_handler', 'export_handler']
 
 
 log = logging.getLogger(__name__)
@@ -71,10 +70,6 @@ def import_handler(request, course_key_string):
         if request.method == 'GET':
             raise NotImplementedError('coming soon')
         else:
-            data_root = path(settings.GITHUB_REPO_ROOT)
-            course_subdir = "{0}-{1}-{2}".format(course_key.org, course_key.course, course_key.run)
-            course_dir = data_root / course_subdir
-
             filename = request.FILES['course-data'].name
             if not filename.endswith('.tar.gz'):
                 return JsonResponse(
@@ -84,12 +79,6 @@ def import_handler(request, course_key_string):
                     },
                     status=415
                 )
-            temp_filepath = course_dir / filename
-
-            if not course_dir.isdir():
-                os.mkdir(course_dir)
-
-            logging.debug('importing course to {0}'.format(temp_filepath))
 
             # Get upload chunks byte ranges
             try:
@@ -99,6 +88,35 @@ def import_handler(request, course_key_string):
                 # no Content-Range header, so make one that will work
                 content_range = {'start': 0, 'stop': 1, 'end': 2}
 
+            # each upload has its own job, and directory
+            if int(content_range['start']) == 0:
+                job = CourseImportJob.create(request.user, course_key, filename)
+            else:
+                job = CourseImportJob.latest(request.user, course_key, filename)
+                if job is None:
+                    return JsonResponse(
+                        {
+                            'ErrMsg': _('File upload corrupted. Please try again'),
+                            'Stage': 1
+                        },
+                        status=409
+                    )
+            import_root = course_import_root(job.id)
+            course_dir = import_root / course_import_subdir(course_key)
+            temp_filepath = course_dir / filename
+
+            if job.state != CourseImportJob.UPLOADING:
+                # The upload was cancelled, or this is a repeated last request
+                # (see below) of an upload that is already being imported.
+                if job.state == CourseImportJob.CANCELLED:
+                    shutil.rmtree(import_root, ignore_errors=True)
+                return JsonResponse({'ImportStatus': job.import_status})
+
+            if not course_dir.isdir():
+                os.makedirs(course_dir)
+
+            logging.debug('importing course to {0}'.format(temp_filepath))
+
             # stream out the uploaded files in chunks to disk
             if int(content_range['start']) == 0:
                 mode = "wb+"
@@ -146,109 +164,16 @@ def import_handler(request, course_key_string):
                 })
 
             else:   # This was the last chunk.
-
-                # Use sessions to keep info about import progress
-                session_status = request.session.setdefault("import_status", {})
-                key = unicode(course_key) + filename
-                session_status[key] = 1
-                request.session.modified = True
-
-                # Do everything from now on in a try-finally block to make sure
-                # everything is properly cleaned up.
-                try:
-
-                    tar_file = tarfile.open(temp_filepath)
-                    try:
-                        safetar_extractall(tar_file, (course_dir + '/').encode('utf-8'))
-                    except SuspiciousOperation as exc:
-                        return JsonResponse(
-                            {
-                                'ErrMsg': 'Unsafe tar file. Aborting import.',
-                                'SuspiciousFileOperationMsg': exc.args[0],
-                                'Stage': 1
-                            },
-                            status=400
-                        )
-                    finally:
-                        tar_file.close()
-
-                    session_status[key] = 2
-                    request.session.modified = True
-
-                    # find the 'course.xml' file
-                    def get_all_files(directory):
-                        """
-                        For each file in the directory, yield a 2-tuple of (file-name,
-                        directory-path)
-                        """
-                        for dirpath, _dirnames, filenames in os.walk(directory):
-                            for filename in filenames:
-                                yield (filename, dirpath)
-
-                    def get_dir_for_fname(directory, filename):
-                        """
-                        Returns the dirpath for the first file found in the directory
-                        with the given name.  If there is no file in the directory with
-                        the specified name, return None.
-                        """
-                        for fname, dirpath in get_all_files(directory):
-                            if fname == filename:
-                                return dirpath
-                        return None
-
-                    fname = "course.xml"
-
-                    dirpath = get_dir_for_fname(course_dir, fname)
-
-                    if not dirpath:
-                        return JsonResponse(
-                            {
-
-                                'ErrMsg': _('Could not find the course.xml file in the package.'),
-                                'Stage': 2
-                            },
-                            status=415
-                        )
-
-                    logging.debug('found course.xml at {0}'.format(dirpath))
-
-                    if dirpath != course_dir:
-                        for fname in os.listdir(dirpath):
-                            shutil.move(dirpath / fname, course_dir)
-
-                    _module_store, course_items = import_from_xml(
-                        modulestore(),
-                        request.user.id,
-                        settings.GITHUB_REPO_ROOT,
-                        [course_subdir],
-                        load_error_modules=False,
-                        static_content_store=contentstore(),
-                        target_course_id=course_key,
-                    )
-
-                    new_location = course_items[0].location
-                    logging.debug('new course at {0}'.format(new_location))
-
-                    session_status[key] = 3
-                    request.session.modified = True
-
-                # Send errors to client with stage at which error occurred.
-                except Exception as exception:   # pylint: disable=W0703
-                    log.exception(
-                        "error importing course"
-                    )
-                    return JsonResponse(
-                        {
-                            'ErrMsg': str(exception),
-                            'Stage': session_status[key]
-                        },
-                        status=400
-                    )
-
-                finally:
-                    shutil.rmtree(course_dir)
-
-                return JsonResponse({'Status': 'OK'})
+                # Import the course in the background, the browser follows its
+                # progress with import_status_handler.
+                if job.enqueue():
+                    import_course.delay(job.id)
+                else:
+                    # cancelled while uploading
+                    shutil.rmtree(import_root, ignore_errors=True)
+                    job = CourseImportJob.objects.get(pk=job.pk)
+
+                return JsonResponse({'ImportStatus': job.import_status})
     elif request.method == 'GET':  # assume html
         course_module = modulestore().get_course(course_key)
         return render_to_response('import.html', {
@@ -268,23 +193,48 @@ def import_status_handler(request, course_key_string, filename=None):
     """
     Returns an integer corresponding to the status of a file import. These are:
 
-        0 : No status info found (import done or upload still in progress)
+        -X : Import failed or was cancelled at stage X (1 to 3)
+        0 : No status info found (upload still in progress)
         1 : Extracting file
         2 : Validating.
         3 : Importing to mongo
+        4 : Import successful
 
+    along with the progress of each step of the import (see CourseImportJob),
+    and the error message of failed imports.
     """
     course_key = CourseKey.from_string(course_key_string)
     if not has_course_access(request.user, course_key):
         raise PermissionDenied()
 
-    try:
-        session_status = request.session["import_status"]
-        status = session_status[course_key_string + filename]
-    except KeyError:
-        status = 0
+    job = CourseImportJob.latest(request.user, course_key, filename)
+    if job is None:
+        return JsonResponse({"ImportStatus": 0})
+
+    response = {"ImportStatus": job.import_status, "Progress": job.get_progress()}
+    if job.error:
+        response["ErrMsg"] = job.error
+    return JsonResponse(response)
+
+
+# pylint: disable=unused-argument
+@require_POST
+@ensure_csrf_cookie
+@login_required
+def import_cancel_handler(request, course_key_string, filename):
+    """
+    Cancels the import of a file, returning its status as import_status_handler.
+    """
+    course_key = CourseKey.from_string(course_key_string)
+    if not has_course_access(request.user, course_key):
+        raise PermissionDenied()
+
+    job = CourseImportJob.latest(request.user, course_key, filename)
+    if job is None:
+        return HttpResponseNotFound()
 
-    return JsonResponse({"ImportStatus": status})
+    job.cancel()
+    return JsonResponse({"ImportStatus": job.import_status})
 
 
 # pylint: disable=unused-argument
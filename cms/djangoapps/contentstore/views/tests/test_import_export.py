@@ -11,8 +11,11 @@ import tempfile
 from path import path
 from uuid import uuid4
 
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test.utils import override_settings
 from django.conf import settings
+from contentstore.models import CourseImportJob
+from contentstore.tasks import ImportCancelled, ImportProgress, course_import_root
 from contentstore.utils import reverse_course_url
 
 from xmodule.modulestore.tests.factories import ItemFactory
@@ -68,6 +71,19 @@ class ImportTestCase(CourseTestCase):
     def tearDown(self):
         shutil.rmtree(self.content_dir)
 
+    def import_status(self, tarpath):
+        """
+        Return the response of `import_status_handler` for the import of `tarpath`.
+        """
+        resp_status = self.client.get(
+            reverse_course_url(
+                'import_status_handler',
+                self.course.id,
+                kwargs={'filename': os.path.split(tarpath)[1]}
+            )
+        )
+        return json.loads(resp_status.content)
+
     def test_no_coursexml(self):
         """
         Check that the response for a tar.gz import without a course.xml is
@@ -80,18 +96,12 @@ class ImportTestCase(CourseTestCase):
                     "name": self.bad_tar,
                     "course-data": [btar]
                 })
-        self.assertEquals(resp.status_code, 415)
+        self.assertEquals(resp.status_code, 200)
         # Check that `import_status` returns the appropriate stage (i.e., the
         # stage at which import failed).
-        resp_status = self.client.get(
-            reverse_course_url(
-                'import_status_handler',
-                self.course.id,
-                kwargs={'filename': os.path.split(self.bad_tar)[1]}
-            )
-        )
-
-        self.assertEquals(json.loads(resp_status.content)["ImportStatus"], 2)
+        status = self.import_status(self.bad_tar)
+        self.assertEquals(status["ImportStatus"], -2)
+        self.assertIn("course.xml", status["ErrMsg"])
 
     def test_with_coursexml(self):
         """
@@ -103,6 +113,109 @@ class ImportTestCase(CourseTestCase):
             resp = self.client.post(self.url, args)
 
         self.assertEquals(resp.status_code, 200)
+        status = self.import_status(self.good_tar)
+        self.assertEquals(status["ImportStatus"], CourseImportJob.SUCCESS_STATUS)
+        self.assertEquals(status["Progress"]["extract"]["done"], status["Progress"]["extract"]["total"])
+        self.assertEquals(status["Progress"]["modules"]["done"], status["Progress"]["modules"]["total"])
+
+    def test_no_import_status(self):
+        """
+        Check the status of a file that wasn't uploaded.
+        """
+        self.assertEquals(self.import_status(self.good_tar), {"ImportStatus": 0})
+
+    def test_cancel_queued_import(self):
+        """
+        Check that an import cancelled before it started isn't run.
+        """
+        job = CourseImportJob.create(self.user, self.course.id, "good.tar.gz")
+        cancel_url = reverse_course_url(
+            'import_cancel_handler', self.course.id, kwargs={'filename': "good.tar.gz"}
+        )
+        resp = self.client.post(cancel_url)
+        self.assertEquals(resp.status_code, 200)
+        self.assertEquals(json.loads(resp.content)["ImportStatus"], -1)
+
+        job = CourseImportJob.objects.get(pk=job.pk)
+        self.assertEquals(job.state, CourseImportJob.CANCELLED)
+        self.assertFalse(job.enqueue())
+
+    def test_cancel_running_import(self):
+        """
+        Check that a running import stops at its next progress update once cancelled.
+        """
+        job = CourseImportJob.create(self.user, self.course.id, "good.tar.gz")
+        self.assertTrue(job.enqueue())
+        self.assertTrue(job.start())
+        progress = ImportProgress(job, interval=0)
+        progress.set_stage(3)
+        progress('modules', 1, 10)
+
+        self.assertTrue(job.cancel())
+        with self.assertRaises(ImportCancelled):
+            progress('modules', 2, 10)
+
+        job = CourseImportJob.objects.get(pk=job.pk)
+        self.assertEquals(job.import_status, 3)
+        self.assertEquals(job.get_progress(), {'modules': {'done': 1, 'total': 10}})
+
+    def test_cancel_while_uploading(self):
+        """
+        Check that an import cancelled while its file is being uploaded isn't
+        run once the upload completes.
+        """
+        with open(self.good_tar, 'rb') as gtar:
+            data = gtar.read()
+
+        def upload_chunk(start, stop):
+            """ Upload the bytes of good.tar.gz from `start` to `stop` """
+            chunk = SimpleUploadedFile("good.tar.gz", data[start:stop])
+            return self.client.post(
+                self.url,
+                {"name": "good.tar.gz", "course-data": [chunk]},
+                HTTP_CONTENT_RANGE='bytes {}-{}/{}'.format(start, stop - 1, len(data))
+            )
+
+        half = len(data) // 2
+        self.assertEquals(upload_chunk(0, half).status_code, 200)
+        job = CourseImportJob.latest(self.user, self.course.id, "good.tar.gz")
+        self.assertEquals(job.state, CourseImportJob.UPLOADING)
+        self.assertTrue(course_import_root(job.id).isdir())
+
+        cancel_url = reverse_course_url(
+            'import_cancel_handler', self.course.id, kwargs={'filename': "good.tar.gz"}
+        )
+        self.assertEquals(self.client.post(cancel_url).status_code, 200)
+
+        resp = upload_chunk(half, len(data))
+        self.assertEquals(resp.status_code, 200)
+        self.assertEquals(json.loads(resp.content)["ImportStatus"], -1)
+        states = CourseImportJob.objects.filter(course_id=self.course.id).values_list('state', flat=True)
+        self.assertEquals(list(states), [CourseImportJob.CANCELLED])
+        self.assertFalse(course_import_root(job.id).exists())
+
+    def test_dead_import_fails(self):
+        """
+        Check that an import that stopped saving its progress, e.g. because its
+        worker died, is reported as failed.
+        """
+        job = CourseImportJob.create(self.user, self.course.id, "good.tar.gz")
+        self.assertTrue(job.enqueue())
+        self.assertTrue(job.start())
+        ImportProgress(job).set_stage(3)
+        self.assertEquals(self.import_status("good.tar.gz")["ImportStatus"], 3)
+
+        CourseImportJob.objects.filter(pk=job.pk).update(
+            updated=job.updated - CourseImportJob.RUNNING_TIMEOUT
+        )
+        status = self.import_status("good.tar.gz")
+        self.assertEquals(status["ImportStatus"], -3)
+        self.assertIn("ErrMsg", status)
+
+        job = CourseImportJob.objects.get(pk=job.pk)
+        self.assertEquals(job.state, CourseImportJob.FAILED)
+        # a worker still running the import stops
+        self.assertTrue(job.is_cancel_requested())
 
     def test_import_in_existing_course(self):
         """
@@ -218,25 +331,18 @@ class ImportTestCase(CourseTestCase):
             with open(tarpath) as tar:
                 args = {"name": tarpath, "course-data": [tar]}
                 resp = self.client.post(self.url, args)
-            self.assertEquals(resp.status_code, 400)
-            self.assertTrue("SuspiciousFileOperation" in resp.content)
+            self.assertEquals(resp.status_code, 200)
+            status = self.import_status(tarpath)
+            self.assertEquals(status["ImportStatus"], -1)
+            self.assertIn("Unsafe tar file", status["ErrMsg"])
 
         try_tar(self._fifo_tar())
         try_tar(self._symlink_tar())
         try_tar(self._outside_tar())
         try_tar(self._outside_tar2())
-        # Check that `import_status` returns the appropriate stage (i.e.,
-        # either 3, indicating all previous steps are completed, or 0,
-        # indicating no upload in progress)
-        resp_status = self.client.get(
-            reverse_course_url(
-                'import_status_handler',
-                self.course.id,
-                kwargs={'filename': os.path.split(self.good_tar)[1]}
-            )
-        )
-        import_status = json.loads(resp_status.content)["ImportStatus"]
-        self.assertIn(import_status, (0, 3))
+        # Check that `import_status` returns 0, indicating no upload in
+        # progress, for files that weren't uploaded
+        self.assertEquals(self.import_status(self.good_tar)["ImportStatus"], 0)
 
 
 @override_settings(CONTENTSTORE=TEST_DATA_CONTENTSTORE)
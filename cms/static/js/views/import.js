@@ -46,17 +46,28 @@ define(
          * @param {int} timeout Number of milliseconds to wait in between ajax calls
          *     for new updates.
          * @param {int} stage Starting stage.
+         * @param {string} errMsg Error message of a failed import.
          */
-        var getStatus = function (url, timeout, stage) {
+        var getStatus = function (url, timeout, stage, errMsg) {
             var currentStage = stage || 0;
             if (CourseImport.stopGetStatus) { return ;}
+            if (currentStage == 4) {
+                // the import finished
+                CourseImport.displayFinishedImport();
+                return;
+            }
+            if (currentStage < 0) {
+                // the import failed at stage -currentStage
+                CourseImport.stopGetStatus = true;
+                CourseImport.stageError(-currentStage, errMsg);
+                return;
+            }
             updateStage(currentStage);
-            if (currentStage == 3 ) { return ;}
             var time = timeout || 1000;
             $.getJSON(url,
                 function (data) {
                     setTimeout(function () {
-                        getStatus(url, time, data.ImportStatus);
+                        getStatus(url, time, data.ImportStatus, data.ErrMsg);
                     }, time);
                 }
             );
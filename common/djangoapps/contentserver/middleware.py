@@ -1,5 +1,10 @@
+import calendar
+import re
+
+from django.conf import settings
 from django.http import (HttpResponse, HttpResponseNotModified,
     HttpResponseForbidden)
+from django.utils.http import http_date, parse_http_date_safe, parse_etags, quote_etag
 from student.models import CourseEnrollment
 
 from xmodule.contentstore.django import contentstore
@@ -12,6 +17,39 @@ from xmodule.exceptions import NotFoundError
 # TODO: Soon as we have a reasonable way to serialize/deserialize AssetKeys, we need
 # to change this file so instead of using course_id_partial, we're just using asset keys
 
+# how long, in seconds, browsers and proxies may cache unlocked assets without revalidating them
+STATIC_CONTENT_CACHE_MAX_AGE = 60 * 60
+
+BYTE_RANGE_RE = re.compile(r'^bytes=(?P<first>\d*)-(?P<last>\d*)$')
+
+
+def parse_range_header(header_value, content_length):
+    """
+    Returns the (first_byte, last_byte) pair, both included, requested by the value of a
+    Range header for a single byte range of content of `content_length` bytes.
+
+    Returns None if the header is malformed or asks for several ranges, in which case it
+    should be ignored and the whole content served. Raises ValueError if the range can't
+    be satisfied.
+    """
+    match = BYTE_RANGE_RE.match(header_value.strip())
+    if match is None or match.group('first') == match.group('last') == '':
+        return None
+    if match.group('first') == '':
+        # a suffix range: the last bytes of the content
+        suffix_length = int(match.group('last'))
+        if suffix_length == 0 or content_length == 0:
+            raise ValueError("Unsatisfiable suffix range")
+        return max(content_length - suffix_length, 0), content_length - 1
+    first_byte = int(match.group('first'))
+    last_byte = int(match.group('last')) if match.group('last') else content_length - 1
+    if match.group('last') and first_byte > last_byte:
+        return None
+    if first_byte >= content_length:
+        raise ValueError("Range starts after the end of the content")
+    return first_byte, min(last_byte, content_length - 1)
+
+
 class StaticContentServer(object):
     def process_request(self, request):
         # look to see if the request is prefixed with 'c4x' tag
@@ -60,18 +98,83 @@ class StaticContentServer(object):
                     ):
                         return HttpResponseForbidden('Unauthorized')
 
-            # convert over the DB persistent last modified timestamp to a HTTP compatible
-            # timestamp, so we can simply compare the strings
-            last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
+            # convert over the DB persistent last modified timestamp to seconds since the epoch,
+            # which is what HTTP dates carry
+            last_modified_at = calendar.timegm(content.last_modified_at.utctimetuple())
+            # content cached before digests were stored doesn't have one
+            content_digest = getattr(content, 'content_digest', None)
+
+            # see if the client has cached this content, if so then just return a 304 (Not Modified)
+            if self._is_not_modified(request, content_digest, last_modified_at):
+                response = HttpResponseNotModified()
+                self._set_caching_headers(response, content, content_digest, last_modified_at)
+                return response
 
-            # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
-                if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+            byte_range = None
+            if 'HTTP_RANGE' in request.META and content.length is not None and \
+                    self._if_range_matches(request, content_digest, last_modified_at):
+                try:
+                    byte_range = parse_range_header(request.META['HTTP_RANGE'], content.length)
+                except ValueError:
+                    response = HttpResponse(status=416)
+                    response['Content-Range'] = 'bytes */{}'.format(content.length)
+                    return response
 
-            response = HttpResponse(content.stream_data(), content_type=content.content_type)
-            response['Last-Modified'] = last_modified_at_str
+            if byte_range is None:
+                response = HttpResponse(content.stream_data(), content_type=content.content_type)
+                if content.length is not None:
+                    response['Content-Length'] = str(content.length)
+            else:
+                first_byte, last_byte = byte_range
+                response = HttpResponse(
+                    content.stream_data_in_range(first_byte, last_byte), content_type=content.content_type, status=206
+                )
+                response['Content-Range'] = 'bytes {}-{}/{}'.format(first_byte, last_byte, content.length)
+                response['Content-Length'] = str(last_byte - first_byte + 1)
+            response['Accept-Ranges'] = 'bytes'
+            self._set_caching_headers(response, content, content_digest, last_modified_at)
 
             return response
+
+    def _is_not_modified(self, request, content_digest, last_modified_at):
+        """
+        Returns whether the conditional headers of the request show that the client's copy
+        of the content is still current. If-None-Match takes precedence over If-Modified-Since.
+        """
+        if 'HTTP_IF_NONE_MATCH' in request.META:
+            if content_digest is None:
+                return False
+            if_none_match = request.META['HTTP_IF_NONE_MATCH']
+            return if_none_match.strip() == '*' or content_digest in parse_etags(if_none_match)
+        if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            if_modified_since = parse_http_date_safe(request.META['HTTP_IF_MODIFIED_SINCE'])
+            return if_modified_since is not None and last_modified_at <= if_modified_since
+        return False
+
+    def _if_range_matches(self, request, content_digest, last_modified_at):
+        """
+        Returns whether the Range header of the request should be honored given its If-Range
+        header, which is only the case if the client's partial copy is of the current content.
+        """
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if if_range is None:
+            return True
+        if if_range.startswith('"'):
+            return content_digest is not None and parse_etags(if_range) == [content_digest]
+        return parse_http_date_safe(if_range) == last_modified_at
+
+    def _set_caching_headers(self, response, content, content_digest, last_modified_at):
+        """
+        Sets the validators of the content on the response, and lets browsers and proxies cache
+        unlocked content. Locked content may only be cached by the browser, which must check
+        that the user still has access to it before each use.
+        """
+        response['Last-Modified'] = http_date(last_modified_at)
+        if content_digest is not None:
+            response['ETag'] = quote_etag(content_digest)
+        if getattr(content, 'locked', False):
+            response['Cache-Control'] = 'private, no-cache'
+        else:
+            response['Cache-Control'] = 'public, max-age={}'.format(
+                getattr(settings, 'STATIC_CONTENT_CACHE_MAX_AGE', STATIC_CONTENT_CACHE_MAX_AGE)
+            )
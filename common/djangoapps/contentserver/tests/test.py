@@ -6,9 +6,12 @@ import logging
 from uuid import uuid4
 
 from django.conf import settings
+from django.test import TestCase
 from django.test.client import Client
 from django.test.utils import override_settings
+from django.utils.http import http_date
 
+from contentserver.middleware import parse_range_header
 from student.models import CourseEnrollment
 
 from xmodule.contentstore.django import contentstore
@@ -55,6 +58,8 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
 
         self.contentstore.set_attr(self.locked_asset, 'locked', True)
 
+        self.length_unlocked = self.contentstore.get_attr(self.unlocked_asset, 'length')
+
     def test_unlocked_asset(self):
         """
         Test that unlocked assets are being served.
@@ -101,3 +106,95 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         resp = self.client.get(self.url_locked)
         self.assertEqual(resp.status_code, 200) # pylint: disable=E1103
 
+
+    def test_range_request_full_file(self):
+        """
+        Test that a range request for the whole file returns it with 206.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-')
+        self.assertEqual(resp.status_code, 206)  # pylint: disable=E1103
+        self.assertEqual(resp['Content-Range'], 'bytes 0-{}/{}'.format(self.length_unlocked - 1, self.length_unlocked))
+        self.assertEqual(resp.content, self.contentstore.find(self.unlocked_asset).data)
+
+    def test_range_request_partial_file(self):
+        """
+        Test that a range request for part of the file returns only those bytes.
+        """
+        first_byte, last_byte = self.length_unlocked / 4, self.length_unlocked / 2
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={}-{}'.format(first_byte, last_byte))
+        self.assertEqual(resp.status_code, 206)  # pylint: disable=E1103
+        self.assertEqual(resp['Content-Length'], str(last_byte - first_byte + 1))
+        self.assertEqual(
+            resp.content, self.contentstore.find(self.unlocked_asset).data[first_byte:last_byte + 1]
+        )
+
+    def test_range_request_unsatisfiable(self):
+        """
+        Test that a range starting after the end of the file returns 416.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={}-'.format(self.length_unlocked))
+        self.assertEqual(resp.status_code, 416)  # pylint: disable=E1103
+        self.assertEqual(resp['Content-Range'], 'bytes */{}'.format(self.length_unlocked))
+
+    def test_range_request_malformed(self):
+        """
+        Test that a malformed or multiple range header is ignored.
+        """
+        for header in ('bytes=a-b', 'bytes=0-1,3-4', 'lines=1-2'):
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE=header)
+            self.assertEqual(resp.status_code, 200)  # pylint: disable=E1103
+            self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+
+    def test_etag(self):
+        """
+        Test that the md5 of the asset is its ETag, which can be used to revalidate it.
+        """
+        resp = self.client.get(self.url_unlocked)
+        etag = resp['ETag']
+        self.assertEqual(etag, '"{}"'.format(self.contentstore.find(self.unlocked_asset).content_digest))
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)  # pylint: disable=E1103
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(resp.status_code, 200)  # pylint: disable=E1103
+
+    def test_if_modified_since(self):
+        """
+        Test that assets which weren't modified since the given date return 304.
+        """
+        resp = self.client.get(self.url_unlocked)
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE=resp['Last-Modified'])
+        self.assertEqual(resp.status_code, 304)  # pylint: disable=E1103
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE=http_date(0))
+        self.assertEqual(resp.status_code, 200)  # pylint: disable=E1103
+
+    def test_cache_control(self):
+        """
+        Test that only unlocked assets may be cached by proxies.
+        """
+        resp = self.client.get(self.url_unlocked)
+        self.assertTrue(resp['Cache-Control'].startswith('public'))
+
+        self.client.login(username=self.staff_usr, password=self.staff_pwd)
+        resp = self.client.get(self.url_locked)
+        self.assertEqual(resp['Cache-Control'], 'private, no-cache')
+
+
+class ParseRangeHeaderTest(TestCase):
+    """
+    Tests for parse_range_header.
+    """
+    def test_valid_ranges(self):
+        self.assertEqual(parse_range_header('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range_header('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_range_header('bytes=900-5000', 1000), (900, 999))
+        self.assertEqual(parse_range_header('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range_header('bytes=-5000', 1000), (0, 999))
+
+    def test_ignored_ranges(self):
+        for header in ('bytes=-', 'bytes=a-5', 'bytes=5-1', 'bytes=0-1,5-6', 'pages=1-2'):
+            self.assertIsNone(parse_range_header(header, 1000))
+
+    def test_unsatisfiable_ranges(self):
+        for header in ('bytes=1000-', 'bytes=-0'):
+            with self.assertRaises(ValueError):
+                parse_range_header(header, 1000)
@@ -72,6 +72,33 @@ class CourseMode(models.Model):
             modes = [cls.DEFAULT_MODE]
         return modes
 
+    @classmethod
+    def modes_for_courses(cls, course_ids):
+        """
+        Returns a dict of course id -> list of the non-expired modes of the course,
+        for all the given course ids, fetched with a single query.
+
+        Courses without modes get the default mode, as in `modes_for_course`.
+        """
+        now = datetime.now(pytz.UTC)
+        found_course_modes = cls.objects.filter(Q(course_id__in=course_ids) &
+                                                (Q(expiration_datetime__isnull=True) |
+                                                Q(expiration_datetime__gte=now)))
+        modes_by_course = {course_id: [] for course_id in course_ids}
+        for mode in found_course_modes:
+            modes_by_course.setdefault(mode.course_id, []).append(Mode(
+                mode.mode_slug,
+                mode.mode_display_name,
+                mode.min_price,
+                mode.suggested_prices,
+                mode.currency,
+                mode.expiration_datetime
+            ))
+        for course_id, modes in modes_by_course.iteritems():
+            if not modes:
+                modes_by_course[course_id] = [cls.DEFAULT_MODE]
+        return modes_by_course
+
     @classmethod
     def modes_for_course_dict(cls, course_id):
         """
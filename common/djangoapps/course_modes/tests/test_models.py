@@ -58,6 +58,18 @@ class CourseModeModelTest(TestCase):
         self.assertEqual(CourseMode.mode_for_course(self.course_key, 'verified'),
                          mode)
 
+    def test_modes_for_courses(self):
+        """
+        Find the modes of several courses at once
+        """
+        other_course_key = SlashSeparatedCourseKey('Test', 'OtherCourse', 'TestCourseRun')
+        self.create_mode('verified', 'Verified Certificate')
+        modes = CourseMode.modes_for_courses([self.course_key, other_course_key])
+        self.assertEqual(modes, {
+            self.course_key: [Mode(u'verified', u'Verified Certificate', 0, '', 'usd', None)],
+            other_course_key: [CourseMode.DEFAULT_MODE],
+        })
+
     def test_modes_for_course_multiple(self):
         """
         Finding the modes when there's multiple modes
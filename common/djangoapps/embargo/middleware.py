@@ -31,7 +31,6 @@ EMBARGO_SITE_REDIRECT_URL = 'https://www.edx.org/'
 
 """
 import logging
-import pygeoip
 
 from django.core.exceptions import MiddlewareNotUsed
 from django.conf import settings
@@ -41,6 +40,7 @@ from ipware.ip import get_ip
 from util.request import course_id_from_url
 
 from embargo.models import EmbargoedCourse, EmbargoedState, IPFilter
+from geoinfo import geoip
 
 log = logging.getLogger(__name__)
 
@@ -90,7 +90,7 @@ class EmbargoMiddleware(object):
                 log.info(msg)
                 return response
 
-            country_code_from_ip = pygeoip.GeoIP(settings.GEOIP_PATH).country_code_by_addr(ip_addr)
+            country_code_from_ip = geoip.country_code_by_addr(ip_addr)
             is_embargoed = country_code_from_ip in EmbargoedState.current().embargoed_countries_list
             # Fail if country is embargoed and the ip address isn't explicitly whitelisted
             if is_embargoed and ip_addr not in IPFilter.current().whitelist_ips:
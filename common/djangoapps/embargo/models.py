@@ -11,6 +11,7 @@ file and check it in at the same time as your model changes. To do that,
 3. Add the migration file created in edx-platform/common/djangoapps/embargo/migrations/
 """
 
+from bisect import bisect_right
 import ipaddr
 
 from django.db import models
@@ -89,11 +90,29 @@ class IPFilter(ConfigurationModel):
     class IPFilterList(object):
         """
         Represent a list of IP addresses with support of networks.
+
+        The networks are compiled into sorted, merged intervals of addresses,
+        so that membership is checked with a binary search.
         """
 
         def __init__(self, ips):
             self.networks = [ipaddr.IPNetwork(ip) for ip in ips]
 
+            # ip version -> (starts, ends) of the intervals
+            self.intervals = {}
+            for version in (4, 6):
+                merged = []
+                ranges = sorted(
+                    (int(network.network), int(network.broadcast))
+                    for network in self.networks if network.version == version
+                )
+                for start, end in ranges:
+                    if merged and start <= merged[-1][1] + 1:
+                        merged[-1][1] = max(merged[-1][1], end)
+                    else:
+                        merged.append([start, end])
+                self.intervals[version] = ([start for start, __ in merged], [end for __, end in merged])
+
         def __iter__(self):
             for network in self.networks:
                 yield network
@@ -104,11 +123,29 @@ class IPFilter(ConfigurationModel):
             except ValueError:
                 return False
 
-            for network in self.networks:
-                if network.Contains(ip):
-                    return True
+            starts, ends = self.intervals[ip.version]
+            index = bisect_right(starts, int(ip)) - 1
+            return index >= 0 and int(ip) <= ends[index]
 
-            return False
+    # comma-separated list -> compiled IPFilterList, shared by the instances of
+    # the current configuration, which ConfigurationModel.current unpickles anew
+    # from the cache every time
+    _compiled_lists = {}
+
+    @classmethod
+    def _compile(cls, ips):
+        """
+        Return the IPFilterList of a comma-separated list of addresses,
+        compiling it only if the list changed.
+        """
+        compiled = cls._compiled_lists.get(ips)
+        if compiled is None:
+            compiled = cls.IPFilterList([addr.strip() for addr in ips.split(',')])  # pylint: disable=no-member
+            # only the lists of the latest configurations are needed
+            if len(cls._compiled_lists) >= 8:
+                cls._compiled_lists.clear()
+            cls._compiled_lists[ips] = compiled
+        return compiled
 
     @property
     def whitelist_ips(self):
@@ -117,7 +154,7 @@ class IPFilter(ConfigurationModel):
         """
         if self.whitelist == '':
             return []
-        return self.IPFilterList([addr.strip() for addr in self.whitelist.split(',')])  # pylint: disable=no-member
+        return self._compile(self.whitelist)
 
     @property
     def blacklist_ips(self):
@@ -126,4 +163,4 @@ class IPFilter(ConfigurationModel):
         """
         if self.blacklist == '':
             return []
-        return self.IPFilterList([addr.strip() for addr in self.blacklist.split(',')])  # pylint: disable=no-member
+        return self._compile(self.blacklist)
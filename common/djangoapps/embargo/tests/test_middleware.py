@@ -17,6 +17,7 @@ from xmodule.modulestore.tests.factories import CourseFactory
 # Explicitly import the cache from ConfigurationModel so we can reset it after each test
 from config_models.models import cache
 from embargo.models import EmbargoedCourse, EmbargoedState, IPFilter
+from geoinfo import geoip
 
 
 @override_settings(MODULESTORE=TEST_DATA_MONGO_MODULESTORE)
@@ -47,6 +48,7 @@ class EmbargoMiddlewareTests(TestCase):
 
         self.patcher = mock.patch.object(pygeoip.GeoIP, 'country_code_by_addr', self.mock_country_code_by_addr)
         self.patcher.start()
+        geoip.clear_cache()
 
     def tearDown(self):
         # Explicitly clear ConfigurationModel's cache so tests have a clear cache
@@ -95,3 +95,17 @@ class EmbargoModelsTest(TestCase):
         self.assertTrue('1.1.0.1' in cblacklist)
         self.assertTrue('1.1.1.0' in cblacklist)
         self.assertFalse('1.2.0.0' in cblacklist)
+
+    def test_ip_overlapping_networks(self):
+        whitelist = '1.0.0.0/24, 1.0.0.128/25, 1.0.1.0/24, 3.0.0.7, 2001:db8::/32'
+
+        IPFilter(whitelist=whitelist).save()
+
+        cwhitelist = IPFilter.current().whitelist_ips
+        for addr in ['1.0.0.0', '1.0.0.200', '1.0.1.255', '3.0.0.7', '2001:db8::1']:
+            self.assertTrue(addr in cwhitelist)
+        for addr in ['0.255.255.255', '1.0.2.0', '3.0.0.6', '3.0.0.8', '2001:db9::', '::1', 'not an ip']:
+            self.assertFalse(addr in cwhitelist)
+
+        # the list is compiled once for all the instances of the configuration
+        self.assertIs(cwhitelist, IPFilter(whitelist=whitelist).whitelist_ips)
@@ -0,0 +1,63 @@
+"""
+Process-wide lookup of the countries of IP addresses.
+
+The GeoIP database at settings.GEOIP_PATH is opened once per process and
+memory-mapped, instead of being opened and parsed for every request, and the
+countries of recently seen addresses are kept in a small LRU cache.
+"""
+from collections import OrderedDict
+import threading
+
+from django.conf import settings
+import pygeoip
+
+# how many addresses are cached in each process (overridable in settings)
+GEOIP_CACHE_SIZE = 10000
+
+_lock = threading.Lock()
+_readers = {}
+_countries = OrderedDict()
+
+
+def _get_reader(path):
+    """
+    Return the shared reader of the GeoIP database at `path`.
+    """
+    reader = _readers.get(path)
+    if reader is None:
+        with _lock:
+            reader = _readers.get(path)
+            if reader is None:
+                reader = _readers[path] = pygeoip.GeoIP(path, pygeoip.MMAP_CACHE)
+    return reader
+
+
+def country_code_by_addr(ip_addr):
+    """
+    Return the country code of the IP address `ip_addr`, or '' if it's unknown.
+    """
+    path = settings.GEOIP_PATH
+    key = (path, ip_addr)
+    with _lock:
+        country_code = _countries.pop(key, None)
+        if country_code is not None:
+            # re-insert as the most recently used
+            _countries[key] = country_code
+            return country_code
+
+    country_code = _get_reader(path).country_code_by_addr(ip_addr)
+
+    size = getattr(settings, 'GEOIP_CACHE_SIZE', GEOIP_CACHE_SIZE)
+    with _lock:
+        _countries[key] = country_code
+        while len(_countries) > size:
+            _countries.popitem(last=False)
+    return country_code
+
+
+def clear_cache():
+    """
+    Forget the countries of the addresses looked up so far.
+    """
+    with _lock:
+        _countries.clear()
@@ -0,0 +1,49 @@
+"""
+Tests for the shared GeoIP lookup.
+"""
+from mock import patch
+import pygeoip
+
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from geoinfo import geoip
+
+
+class GeoIPTest(TestCase):
+    """
+    Tests of geoip.country_code_by_addr.
+    """
+    def setUp(self):
+        geoip.clear_cache()
+        self.addCleanup(geoip.clear_cache)
+
+    @patch.object(pygeoip.GeoIP, 'country_code_by_addr')
+    def test_lookups_are_cached(self, mock_country_code_by_addr):
+        mock_country_code_by_addr.return_value = 'CN'
+
+        self.assertEqual(geoip.country_code_by_addr('117.79.83.1'), 'CN')
+        self.assertEqual(geoip.country_code_by_addr('117.79.83.1'), 'CN')
+        self.assertEqual(mock_country_code_by_addr.call_count, 1)
+
+        geoip.country_code_by_addr('117.79.83.100')
+        self.assertEqual(mock_country_code_by_addr.call_count, 2)
+
+    @override_settings(GEOIP_CACHE_SIZE=1)
+    @patch.object(pygeoip.GeoIP, 'country_code_by_addr')
+    def test_cache_size(self, mock_country_code_by_addr):
+        mock_country_code_by_addr.return_value = 'US'
+
+        geoip.country_code_by_addr('1.0.0.1')
+        geoip.country_code_by_addr('1.0.0.2')
+        geoip.country_code_by_addr('1.0.0.1')
+        self.assertEqual(mock_country_code_by_addr.call_count, 3)
+
+    def test_database_opened_once(self):
+        with patch('pygeoip.GeoIP.__init__', return_value=None) as mock_init:
+            with patch.object(pygeoip.GeoIP, 'country_code_by_addr', return_value='US'):
+                # a path no other test opened
+                with override_settings(GEOIP_PATH='/tmp/GeoIP-test.dat'):
+                    geoip.country_code_by_addr('1.0.0.1')
+                    geoip.country_code_by_addr('1.0.0.2')
+        mock_init.assert_called_once_with('/tmp/GeoIP-test.dat', pygeoip.MMAP_CACHE)
@@ -1,5 +1,7 @@
+from collections import OrderedDict
 import logging
 import re
+import threading
 
 from staticfiles.storage import staticfiles_storage
 from staticfiles import finders
@@ -11,6 +13,48 @@ from xmodule.contentstore.content import StaticContent
 
 log = logging.getLogger(__name__)
 
+# how many resolved static urls are memoized in each process (overridable in settings)
+STATIC_URL_CACHE_SIZE = 10000
+
+_static_url_cache = OrderedDict()
+_static_url_cache_lock = threading.Lock()
+
+
+def clear_static_url_cache():
+    """
+    Forget the static urls resolved by this process, e.g. after collectstatic.
+    """
+    with _static_url_cache_lock:
+        _static_url_cache.clear()
+
+
+def _cached_static_url(key, resolve):
+    """
+    Return the url memoized under `key`, or call `resolve` and memoize the
+    url it returns, evicting the least recently used urls beyond
+    STATIC_URL_CACHE_SIZE.
+
+    `resolve` returns the url and whether it may be memoized, which it may not
+    if the lookup failed, so that a transient storage error isn't remembered.
+    """
+    with _static_url_cache_lock:
+        url = _static_url_cache.pop(key, None)
+        if url is not None:
+            # re-insert as the most recently used
+            _static_url_cache[key] = url
+            return url
+
+    url, cacheable = resolve()
+    if not cacheable:
+        return url
+
+    size = getattr(settings, 'STATIC_URL_CACHE_SIZE', STATIC_URL_CACHE_SIZE)
+    with _static_url_cache_lock:
+        _static_url_cache[key] = url
+        while len(_static_url_cache) > size:
+            _static_url_cache.popitem(last=False)
+    return url
+
 
 def _url_replace_regex(prefix):
     """
@@ -92,17 +136,66 @@ def replace_course_urls(text, course_key):
     return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
 
 
-def replace_static_urls(text, data_directory, course_id=None, static_asset_path=''):
+def _static_url_prefix(data_directory, static_asset_path):
     """
-    Replace /static/$stuff urls either with their correct url as generated by collectstatic,
-    (/static/$md5_hashed_stuff) or by the course-specific content static url
-    /static/$course_data_dir/$stuff, or, if course_namespace is not None, by the
-    correct url in the contentstore (c4x://)
+    The regex matching the prefix of the static urls to replace.
+    """
+    return u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+        static_url=settings.STATIC_URL,
+        data_dir=static_asset_path or data_directory
+    )
 
-    text: The source text to do the substitution in
-    data_directory: The directory in which course data is stored
-    course_id: The course identifier used to distinguish static content for this course in studio
-    static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
+
+def _resolve_static_url(prefix, rest, data_directory, course_id, static_asset_path):
+    """
+    Return the url of the static file at path `rest`, see replace_static_urls,
+    and whether it was looked up without errors.
+    """
+    cacheable = True
+    # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
+    if (not static_asset_path) \
+            and course_id \
+            and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
+        # first look in the static file pipeline and see if we are trying to reference
+        # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
+
+        exists_in_staticfiles_storage = False
+        try:
+            exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+            cacheable = False
+
+        if exists_in_staticfiles_storage:
+            url = staticfiles_storage.url(rest)
+        else:
+            # if not, then assume it's courseware specific content and then look in the
+            # Mongo-backed database
+            url = StaticContent.convert_legacy_static_url_with_course_id(rest, course_id)
+    # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+    else:
+        course_path = "/".join((static_asset_path or data_directory, rest))
+
+        try:
+            if staticfiles_storage.exists(rest):
+                url = staticfiles_storage.url(rest)
+            else:
+                url = staticfiles_storage.url(course_path)
+        # And if that fails, assume that it's course content, and add manually data directory
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+            url = "".join([prefix, course_path])
+            cacheable = False
+
+    return url, cacheable
+
+
+def _static_url_replacer(data_directory, course_id, static_asset_path):
+    """
+    Return a function replacing the static url matched by a regex built with
+    _url_replace_regex, see replace_static_urls.
     """
 
     def replace_static_url(match):
@@ -116,50 +209,70 @@ def replace_static_urls(text, data_directory, course_id=None, static_asset_path=
             return original
 
         # In debug mode, if we can find the url as is,
-        if settings.DEBUG and finders.find(rest, True):
-            return original
-        # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) \
-                and course_id \
-                and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
-            # first look in the static file pipeline and see if we are trying to reference
-            # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
-
-            exists_in_staticfiles_storage = False
-            try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-
-            if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
-            else:
-                # if not, then assume it's courseware specific content and then look in the
-                # Mongo-backed database
-                url = StaticContent.convert_legacy_static_url_with_course_id(rest, course_id)
-        # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+        if settings.DEBUG:
+            if finders.find(rest, True):
+                return original
+            url, __ = _resolve_static_url(prefix, rest, data_directory, course_id, static_asset_path)
         else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
-
-            try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
-                else:
-                    url = staticfiles_storage.url(course_path)
-            # And if that fails, assume that it's course content, and add manually data directory
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-                url = "".join([prefix, course_path])
+            # the url only depends on the static files collected when deploying,
+            # and on the type of the course's modulestore, so it's memoized
+            url = _cached_static_url(
+                (course_id, static_asset_path, data_directory, prefix, rest),
+                lambda: _resolve_static_url(prefix, rest, data_directory, course_id, static_asset_path)
+            )
 
         return "".join([quote, url, quote])
 
+    return replace_static_url
+
+
+def replace_static_urls(text, data_directory, course_id=None, static_asset_path=''):
+    """
+    Replace /static/$stuff urls either with their correct url as generated by collectstatic,
+    (/static/$md5_hashed_stuff) or by the course-specific content static url
+    /static/$course_data_dir/$stuff, or, if course_namespace is not None, by the
+    correct url in the contentstore (c4x://)
+
+    text: The source text to do the substitution in
+    data_directory: The directory in which course data is stored
+    course_id: The course identifier used to distinguish static content for this course in studio
+    static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
+    """
+    return re.sub(
+        _url_replace_regex(_static_url_prefix(data_directory, static_asset_path)),
+        _static_url_replacer(data_directory, course_id, static_asset_path),
+        text
+    )
+
+
+def replace_urls(text, data_directory, course_id, jump_to_id_base_url, static_asset_path=''):
+    """
+    Replace the /static/, /course/ and /jump_to_id/ urls in a single pass over
+    the text, as replace_static_urls, replace_course_urls and
+    replace_jump_to_id_urls would one after the other.
+
+    text: The source text to do the substitution in
+    data_directory: The directory in which course data is stored
+    course_id: The course in which this rewrite happens
+    jump_to_id_base_url: The base of the jump_to_id handler, see replace_jump_to_id_urls
+    static_asset_path: Path for static assets, which overrides data_directory, if nonempty
+    """
+    replace_static_url = _static_url_replacer(data_directory, course_id, static_asset_path)
+    course_url_base = '/courses/' + course_id.to_deprecated_string() + '/'
+
+    def replace_url(match):
+        quote = match.group('quote')
+        rest = match.group('rest')
+        if match.group('course') is not None:
+            return "".join([quote, course_url_base, rest, quote])
+        if match.group('jump_to_id') is not None:
+            return "".join([quote, jump_to_id_base_url + rest, quote])
+        return replace_static_url(match)
+
     return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=static_asset_path or data_directory
+        _url_replace_regex(u'(?P<static>{static})|(?P<course>/course/)|(?P<jump_to_id>/jump_to_id/)'.format(
+            static=_static_url_prefix(data_directory, static_asset_path)
         )),
-        replace_static_url,
+        replace_url,
         text
     )
@@ -5,6 +5,8 @@
 from django.core.management.base import NoArgsCommand
 from django.core.cache import get_cache
 
+from static_replace import clear_static_url_cache
+
 
 class Command(NoArgsCommand):
     help = \
@@ -13,3 +15,4 @@ class Command(NoArgsCommand):
     def handle_noargs(self, **options):
         staticfiles_cache = get_cache('staticfiles')
         staticfiles_cache.clear()
+        clear_static_url_cache()
@@ -1,11 +1,12 @@
 import re
 
-from nose.tools import assert_equals, assert_true, assert_false  # pylint: disable=E0611
-from static_replace import (replace_static_urls, replace_course_urls,
-                            _url_replace_regex)
+from nose.tools import assert_equals, assert_true, assert_false, with_setup  # pylint: disable=E0611
+from static_replace import (replace_static_urls, replace_course_urls, replace_jump_to_id_urls,
+                            replace_urls, clear_static_url_cache, _url_replace_regex)
 from mock import patch, Mock
 
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.mongo import MongoModuleStore
 from xmodule.modulestore.xml import XMLModuleStore
 
@@ -14,6 +15,7 @@ COURSE_KEY = SlashSeparatedCourseKey('org', 'course', 'run')
 STATIC_SOURCE = '"/static/file.png"'
 
 
+@with_setup(clear_static_url_cache)
 def test_multi_replace():
     course_source = '"/course/file.png"'
 
@@ -27,6 +29,7 @@ def test_multi_replace():
     )
 
 
+@with_setup(clear_static_url_cache)
 @patch('static_replace.staticfiles_storage')
 def test_storage_url_exists(mock_storage):
     mock_storage.exists.return_value = True
@@ -37,6 +40,7 @@ def test_storage_url_exists(mock_storage):
     mock_storage.url.called_once_with('data_dir/file.png')
 
 
+@with_setup(clear_static_url_cache)
 @patch('static_replace.staticfiles_storage')
 def test_storage_url_not_exists(mock_storage):
     mock_storage.exists.return_value = False
@@ -47,6 +51,7 @@ def test_storage_url_not_exists(mock_storage):
     mock_storage.url.called_once_with('file.png')
 
 
+@with_setup(clear_static_url_cache)
 @patch('static_replace.StaticContent')
 @patch('static_replace.modulestore')
 def test_mongo_filestore(mock_modulestore, mock_static_content):
@@ -66,6 +71,7 @@ def test_mongo_filestore(mock_modulestore, mock_static_content):
     mock_static_content.convert_legacy_static_url_with_course_id.assert_called_once_with('file.png', COURSE_KEY)
 
 
+@with_setup(clear_static_url_cache)
 @patch('static_replace.settings')
 @patch('static_replace.modulestore')
 @patch('static_replace.staticfiles_storage')
@@ -80,6 +86,7 @@ def test_data_dir_fallback(mock_storage, mock_modulestore, mock_settings):
     assert_equals('"/static/data_dir/file.png"', replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY))
 
 
+@with_setup(clear_static_url_cache)
 def test_raw_static_check():
     """
     Make sure replace_static_urls leaves alone things that end in '.raw'
@@ -91,6 +98,7 @@ def test_raw_static_check():
     assert_equals(path, replace_static_urls(path, text))
 
 
+@with_setup(clear_static_url_cache)
 @patch('static_replace.staticfiles_storage')
 @patch('static_replace.modulestore')
 def test_static_url_with_query(mock_modulestore, mock_storage):
@@ -125,3 +133,62 @@ def test_regex():
     for s in no:
         print 'Should not match: {0!r}'.format(s)
         assert_false(re.match(regex, s))
+
+
+@with_setup(clear_static_url_cache)
+@patch('static_replace.staticfiles_storage')
+def test_static_url_memoized(mock_storage):
+    mock_storage.exists.return_value = True
+    mock_storage.url.return_value = '/static/file.abc123.png'
+
+    for __ in range(2):
+        assert_equals('"/static/file.abc123.png"', replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY))
+    mock_storage.exists.assert_called_once_with('file.png')
+
+    # other courses resolve their own urls
+    replace_static_urls(STATIC_SOURCE, 'other_dir')
+    assert_equals(2, mock_storage.exists.call_count)
+
+    clear_static_url_cache()
+    replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY)
+    assert_equals(3, mock_storage.exists.call_count)
+
+
+@with_setup(clear_static_url_cache)
+@patch('static_replace.staticfiles_storage')
+def test_static_url_error_not_memoized(mock_storage):
+    mock_storage.exists.side_effect = Exception("storage unavailable")
+
+    assert_equals('"/static/data_dir/file.png"', replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY))
+
+    # once the storage is back, the url is looked up again
+    mock_storage.exists.side_effect = None
+    mock_storage.exists.return_value = True
+    mock_storage.url.return_value = '/static/file.abc123.png'
+    for __ in range(2):
+        assert_equals('"/static/file.abc123.png"', replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY))
+    assert_equals(3, mock_storage.exists.call_count)
+
+
+@with_setup(clear_static_url_cache)
+@patch('static_replace.staticfiles_storage')
+@patch('static_replace.modulestore')
+def test_replace_urls(mock_modulestore, mock_storage):
+    mock_modulestore.return_value.get_modulestore_type.return_value = ModuleStoreEnum.Type.xml
+    mock_storage.exists.return_value = False
+    mock_storage.url.return_value = '/static/data_dir/file.png'
+    jump_to_id_base_url = '/courses/org/course/run/jump_to_id/'
+
+    text = ' '.join([STATIC_SOURCE, '"/course/file.png"', "'/jump_to_id/abc'", '"/static/foo.png?raw"'])
+    assert_equals(
+        replace_jump_to_id_urls(
+            replace_course_urls(replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY), COURSE_KEY),
+            COURSE_KEY, jump_to_id_base_url
+        ),
+        replace_urls(text, DATA_DIRECTORY, COURSE_KEY, jump_to_id_base_url)
+    )
+    assert_equals(
+        '"/static/data_dir/file.png" "/courses/org/course/run/file.png" '
+        '\'/courses/org/course/run/jump_to_id/abc\' "/static/foo.png?raw"',
+        replace_urls(text, DATA_DIRECTORY, COURSE_KEY, jump_to_id_base_url)
+    )
@@ -51,7 +51,9 @@ from student.models import (
 from student.forms import PasswordResetFormNoActive
 
 from verify_student.models import SoftwareSecurePhotoVerification, MidcourseReverificationWindow
-from certificates.models import CertificateStatuses, certificate_status_for_student
+from certificates.models import (
+    CertificateStatuses, certificate_status_for_student, certificate_statuses_for_student
+)
 from dark_lang.models import DarkLangConfig
 
 from xmodule.modulestore.exceptions import ItemNotFoundError
@@ -63,6 +65,7 @@ from collections import namedtuple
 
 from courseware.courses import get_courses, sort_by_announcement
 from courseware.access import has_access
+from courseware.course_summaries import get_course_summaries
 
 from django_comment_common.models import Role
 
@@ -89,7 +92,6 @@ from util.password_policy_validators import (
 )
 
 from third_party_auth import pipeline, provider
-from xmodule.error_module import ErrorDescriptor
 
 
 log = logging.getLogger("edx.student")
@@ -160,10 +162,11 @@ def process_survey_link(survey_link, user):
     return survey_link.format(UNIQUE_ID=unique_id_for_user(user))
 
 
-def cert_info(user, course):
+def cert_info(user, course, cert_status=None):
     """
     Get the certificate info needed to render the dashboard section for the given
-    student and course.  Returns a dictionary with keys:
+    student and course (a descriptor or CourseSummary).  The certificate status of
+    the student is looked up unless given as `cert_status`.  Returns a dictionary with keys:
 
     'status': one of 'generating', 'ready', 'notpassing', 'processing', 'restricted'
     'show_download_url': bool
@@ -176,7 +179,9 @@ def cert_info(user, course):
     if not course.may_certify():
         return {}
 
-    return _cert_info(user, course, certificate_status_for_student(user, course.id))
+    if cert_status is None:
+        cert_status = certificate_status_for_student(user, course.id)
+    return _cert_info(user, course, cert_status)
 
 
 def reverification_info(course_enrollment_pairs, user, statuses):
@@ -238,12 +243,14 @@ def single_course_reverification_info(user, course, enrollment):  # pylint: disa
 
 def get_course_enrollment_pairs(user, course_org_filter, org_filter_out_set):
     """
-    Get the relevant set of (Course, CourseEnrollment) pairs to be displayed on
-    a student's dashboard.
+    Get the relevant set of (CourseSummary, CourseEnrollment) pairs to be displayed on
+    a student's dashboard.  The summaries of all the courses are loaded at once.
     """
-    for enrollment in CourseEnrollment.enrollments_for_user(user):
-        course = modulestore().get_course(enrollment.course_id)
-        if course and not isinstance(course, ErrorDescriptor):
+    enrollments = list(CourseEnrollment.enrollments_for_user(user))
+    summaries = get_course_summaries([enrollment.course_id for enrollment in enrollments])
+    for enrollment in enrollments:
+        course = summaries.get(enrollment.course_id)
+        if course is not None:
 
             # if we are in a Microsite, then filter out anything that is not
             # attributed (by ORG) to that Microsite
@@ -256,8 +263,8 @@ def get_course_enrollment_pairs(user, course_org_filter, org_filter_out_set):
 
             yield (course, enrollment)
         else:
-            log.error("User {0} enrolled in {2} course {1}".format(
-                        user.username, enrollment.course_id, "broken" if course else "non-existent"
+            log.error("User {0} enrolled in broken or non-existent course {1}".format(
+                        user.username, enrollment.course_id
                      ))
 
 
@@ -398,16 +405,20 @@ def register_user(request, extra_context=None):
     return render_to_response('register.html', context)
 
 
-def complete_course_mode_info(course_id, enrollment):
+def complete_course_mode_info(course_id, enrollment, modes=None):
     """
     We would like to compute some more information from the given course modes
     and the user's current enrollment
 
+    The modes of the course are looked up unless given as `modes`, a dict of
+    mode slug -> Mode (see CourseMode.modes_for_course_dict).
+
     Returns the given information:
         - whether to show the course upsell information
         - numbers of days until they can't upsell anymore
     """
-    modes = CourseMode.modes_for_course_dict(course_id)
+    if modes is None:
+        modes = CourseMode.modes_for_course_dict(course_id)
     mode_info = {'show_upsell': False, 'days_for_upsell': None}
     # we want to know if the user is already verified and if verified is an
     # option
@@ -460,8 +471,21 @@ def dashboard(request):
     show_courseware_links_for = frozenset(course.id for course, _enrollment in course_enrollment_pairs
                                           if has_access(request.user, 'load', course))
 
-    course_modes = {course.id: complete_course_mode_info(course.id, enrollment) for course, enrollment in course_enrollment_pairs}
-    cert_statuses = {course.id: cert_info(request.user, course) for course, _enrollment in course_enrollment_pairs}
+    # Modes and certificate statuses of all the courses, fetched in one query each
+    course_ids = [course.id for course, _enrollment in course_enrollment_pairs]
+    all_modes = CourseMode.modes_for_courses(course_ids)
+    all_cert_statuses = certificate_statuses_for_student(request.user, course_ids)
+
+    course_modes = {
+        course.id: complete_course_mode_info(
+            course.id, enrollment, {mode.slug: mode for mode in all_modes[course.id]}
+        )
+        for course, enrollment in course_enrollment_pairs
+    }
+    cert_statuses = {
+        course.id: cert_info(request.user, course, all_cert_statuses[course.id])
+        for course, _enrollment in course_enrollment_pairs
+    }
 
     # only show email settings for Mongo course and when bulk email is turned on
     show_email_settings_for = frozenset(
@@ -26,3 +26,11 @@ class BaseBackend(object):
     def send(self, event):
         """Send event to tracker."""
         pass
+
+    def send_batch(self, events):
+        """
+        Send several events to tracker. Backends which can save a batch
+        of events at once should override this.
+        """
+        for event in events:
+            self.send(event)
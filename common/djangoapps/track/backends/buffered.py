@@ -0,0 +1,197 @@
+"""
+Event tracker backend that buffers events in memory, and sends them in
+batches to another backend from a background thread.
+
+The wrapped backend is configured like the backends of the tracker::
+
+  TRACKING_BACKENDS = {
+      'mongo': {
+          'ENGINE': 'track.backends.buffered.BufferedBackend',
+          'OPTIONS': {
+              'backend': {
+                  'ENGINE': 'track.backends.mongodb.MongoBackend',
+                  'OPTIONS': {...},
+              },
+              'batch_size': 100,
+              'flush_interval': 1,
+          }
+      }
+  }
+
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import Queue
+import threading
+import time
+
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+
+
+log = logging.getLogger(__name__)
+
+# queued by `close` to get the background thread to send the batch it is
+# filling up right away
+_FLUSH = object()
+
+
+class BufferedBackend(BaseBackend):
+    """
+    Event tracker backend that queues events and sends them with the
+    `send_batch` method of another backend (or one at a time with its `send`
+    method if it has none), from a background thread.
+    """
+
+    # what to do with events sent while the queue is full
+    OVERFLOW_DROP = 'drop'
+    OVERFLOW_SEND = 'send'
+
+    # how long, in seconds, to wait for the queued events to be sent at exit
+    EXIT_TIMEOUT = 5
+
+    def __init__(self, backend, max_queue_size=10000, batch_size=100, flush_interval=1.0,
+                 overflow=OVERFLOW_DROP, **kwargs):
+        """
+        :Parameters:
+
+          - `backend`: the configuration of the wrapped backend, a dict with
+            an `ENGINE` and optional `OPTIONS`
+          - `max_queue_size`: how many events can wait in the queue
+          - `batch_size`: the largest number of events sent at once
+          - `flush_interval`: how long, in seconds, an event can wait in the
+            queue for a batch to fill up
+          - `overflow`: 'drop' to drop the events sent while the queue is
+            full, or 'send' to send them right away
+
+        """
+        super(BufferedBackend, self).__init__(**kwargs)
+
+        # track.tracker instantiates this backend
+        from track import tracker
+
+        self.backend = tracker._instantiate_backend_from_name(  # pylint: disable=protected-access
+            backend['ENGINE'], backend.get('OPTIONS', {})
+        )
+        if overflow not in (self.OVERFLOW_DROP, self.OVERFLOW_SEND):
+            raise ValueError('Invalid overflow policy {}'.format(overflow))
+
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.queue = Queue.Queue(max_queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        atexit.register(self.close)
+
+    def send(self, event):
+        """Queue the event, to be sent by the background thread."""
+        self._start_thread()
+        try:
+            self.queue.put_nowait(event)
+        except Queue.Full:
+            dog_stats_api.increment('track.buffered.overflow', tags=['policy:{}'.format(self.overflow)])
+            if self.overflow == self.OVERFLOW_SEND:
+                self.backend.send(event)
+            else:
+                log.warning('Event tracking queue is full, dropping an event')
+
+    def send_batch(self, events):
+        """Queue the events, to be sent by the background thread."""
+        for event in events:
+            self.send(event)
+
+    def _start_thread(self):
+        """
+        Start the background thread of this process, if it isn't running.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            # threads don't survive forks
+            if self._pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name='track.buffered')
+                self._thread.daemon = True
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def _run(self):
+        """
+        Send batches of events as they are queued. Runs forever.
+        """
+        while True:
+            events = [self.queue.get()]
+            deadline = time.time() + self.flush_interval
+            while len(events) < self.batch_size and events[-1] is not _FLUSH:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    events.append(self.queue.get(timeout=timeout))
+                except Queue.Empty:
+                    break
+            self._send_batch(events)
+
+    def _send_batch(self, events):
+        """
+        Send the events to the wrapped backend, logging any error.
+        """
+        batch = [event for event in events if event is not _FLUSH]
+        try:
+            if batch:
+                with dog_stats_api.timer('track.buffered.send_batch'):
+                    send_batch = getattr(self.backend, 'send_batch', None)
+                    if send_batch is not None:
+                        send_batch(batch)
+                    else:
+                        for event in batch:
+                            self.backend.send(event)
+                dog_stats_api.histogram('track.buffered.batch_size', len(batch))
+        except Exception:  # pylint: disable=broad-except
+            log.exception('Error sending a batch of %d events', len(batch))
+        finally:
+            for _ in events:
+                self.queue.task_done()
+
+    def flush(self):
+        """
+        Send all the queued events from the calling thread.
+        """
+        while True:
+            events = []
+            try:
+                while len(events) < self.batch_size:
+                    events.append(self.queue.get_nowait())
+            except Queue.Empty:
+                pass
+            if not events:
+                return
+            self._send_batch(events)
+
+    def close(self):
+        """
+        Send all the queued events, including the batch the background thread
+        is filling up, waiting at most EXIT_TIMEOUT seconds. Called at exit.
+        """
+        self.flush()
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            return
+
+        deadline = time.time() + self.EXIT_TIMEOUT
+        try:
+            self.queue.put(_FLUSH, timeout=self.EXIT_TIMEOUT)
+        except Queue.Full:
+            pass
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    log.warning('Timed out sending %d queued events', self.queue.unfinished_tasks)
+                    return
+                self.queue.all_tasks_done.wait(timeout)
@@ -38,3 +38,17 @@ class TestMongoBackend(TestCase):
 
         self.assertEqual(events[0], first_argument(calls[0]))
         self.assertEqual(events[1], first_argument(calls[1]))
+
+    def test_mongo_backend_send_batch(self):
+        events = [{'test': 1}, {'test': 2}]
+
+        self.backend.send_batch(events)
+
+        # Check if we inserted the events with a single call
+
+        calls = self.backend.collection.insert.mock_calls
+
+        self.assertEqual(len(calls), 1)
+        _, args, kwargs = calls[0]
+        self.assertEqual(events, args[0])
+        self.assertTrue(kwargs['continue_on_error'])
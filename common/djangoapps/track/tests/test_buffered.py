@@ -0,0 +1,96 @@
+from __future__ import absolute_import
+
+import time
+
+from django.test import TestCase
+
+from track.backends.buffered import BufferedBackend
+from track.backends import BaseBackend
+
+
+class RecordingBackend(BaseBackend):
+    """Backend recording the batches of events it is sent"""
+    def __init__(self, **options):
+        super(RecordingBackend, self).__init__(**options)
+        self.events = []
+        self.batches = []
+
+    def send(self, event):
+        self.events.append(event)
+
+    def send_batch(self, events):
+        self.batches.append(events)
+
+
+class SendOnlyBackend(object):
+    """Backend with no send_batch method, like those of eventtracking"""
+    def __init__(self):
+        self.events = []
+
+    def send(self, event):
+        self.events.append(event)
+
+
+BACKEND = {'ENGINE': 'track.tests.test_buffered.RecordingBackend'}
+
+
+class TestBufferedBackend(TestCase):
+    def setUp(self):
+        self.backend = BufferedBackend(BACKEND, max_queue_size=3, batch_size=2)
+        # the events stay queued until they are flushed
+        self.backend._start_thread = lambda: None  # pylint: disable=protected-access
+
+    def test_flush_in_batches(self):
+        events = [{'test': 1}, {'test': 2}, {'test': 3}]
+        self.backend.send_batch(events)
+        self.assertEqual(self.backend.backend.batches, [])
+
+        self.backend.flush()
+        self.assertEqual(self.backend.backend.batches, [events[:2], events[2:]])
+
+    def test_overflow_drop(self):
+        for i in range(5):
+            self.backend.send({'test': i})
+        self.backend.flush()
+
+        self.assertEqual(self.backend.backend.batches, [[{'test': 0}, {'test': 1}], [{'test': 2}]])
+        self.assertEqual(self.backend.backend.events, [])
+
+    def test_overflow_send(self):
+        self.backend = BufferedBackend(BACKEND, max_queue_size=1, overflow='send')
+        self.backend._start_thread = lambda: None  # pylint: disable=protected-access
+
+        self.backend.send({'test': 1})
+        self.backend.send({'test': 2})
+
+        self.assertEqual(self.backend.backend.events, [{'test': 2}])
+        self.backend.flush()
+        self.assertEqual(self.backend.backend.batches, [[{'test': 1}]])
+
+    def test_invalid_overflow(self):
+        with self.assertRaises(ValueError):
+            BufferedBackend(BACKEND, overflow='block')
+
+    def test_background_thread(self):
+        backend = BufferedBackend(BACKEND, batch_size=2, flush_interval=10)
+        backend.send({'test': 1})
+        backend.send({'test': 2})
+        # the batch is full, so it's sent without waiting for the interval
+        backend.queue.join()
+        self.assertEqual(backend.backend.batches, [[{'test': 1}, {'test': 2}]])
+
+    def test_backend_without_send_batch(self):
+        self.backend.backend = SendOnlyBackend()
+        events = [{'test': 1}, {'test': 2}, {'test': 3}]
+        self.backend.send_batch(events)
+        self.backend.flush()
+        self.assertEqual(self.backend.backend.events, events)
+
+    def test_close_sends_batch_in_flight(self):
+        backend = BufferedBackend(BACKEND, batch_size=10, flush_interval=60)
+        backend.send({'test': 1})
+        # wait for the background thread to start filling up a batch
+        while not backend.queue.empty():
+            time.sleep(0.01)
+        backend.close()
+        self.assertEqual(backend.backend.batches, [[{'test': 1}]])
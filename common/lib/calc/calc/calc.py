@@ -1,12 +1,15 @@
 """
 Parser and evaluator for FormulaResponse and NumericalResponse
 
-Uses pyparsing to parse. Main function as of now is evaluator().
+Uses pyparsing to parse. Main function as of now is evaluator(); use
+compile_expression() to evaluate an expression with many sets of variables.
 """
 
+from collections import OrderedDict
 import math
 import operator
 import numbers
+import threading
 import numpy
 import scipy.constants
 import functions
@@ -72,6 +75,12 @@ SUFFIXES = {
     'c': 1e-2, 'm': 1e-3, 'u': 1e-6, 'n': 1e-9, 'p': 1e-12
 }
 
+# The number of compiled expressions to keep.
+COMPILED_EXPRESSIONS_CACHE_SIZE = 1000
+
+_COMPILED_EXPRESSIONS = OrderedDict()
+_COMPILED_EXPRESSIONS_LOCK = threading.Lock()
+
 
 class UndefinedVariable(Exception):
     """
@@ -173,12 +182,13 @@ def eval_sum(parse_result):
     total = 0.0
     current_op = operator.add
     for token in parse_result:
-        if token == '+':
+        # Only compare operators, as values may be arrays.
+        if not isinstance(token, basestring):
+            total = current_op(total, token)
+        elif token == '+':
             current_op = operator.add
         elif token == '-':
             current_op = operator.sub
-        else:
-            total = current_op(total, token)
     return total
 
 
@@ -191,12 +201,13 @@ def eval_product(parse_result):
     prod = 1.0
     current_op = operator.mul
     for token in parse_result:
-        if token == '*':
+        # Only compare operators, as values may be arrays.
+        if not isinstance(token, basestring):
+            prod = current_op(prod, token)
+        elif token == '*':
             current_op = operator.mul
         elif token == '/':
             current_op = operator.truediv
-        else:
-            prod = current_op(prod, token)
     return prod
 
 
@@ -224,38 +235,214 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
      python numbers.
     -Unary functions are passed as a dictionary from string to function.
     """
-    # No need to go further.
-    if math_expr.strip() == "":
-        return float('nan')
+    return compile_expression(math_expr, case_sensitive).evaluate(variables, functions)
 
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Return the CompiledExpression for `math_expr`, which is parsed only the
+    first time it's used (until it's evicted from the cache).
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+    Raise the pyparsing.ParseException of invalid expressions.
+    """
+    key = (math_expr, case_sensitive)
+    with _COMPILED_EXPRESSIONS_LOCK:
+        compiled = _COMPILED_EXPRESSIONS.pop(key, None)
+        if compiled is not None:
+            # re-insert as the most recently used
+            _COMPILED_EXPRESSIONS[key] = compiled
+            return compiled
+
+    compiled = CompiledExpression(math_expr, case_sensitive)
+    with _COMPILED_EXPRESSIONS_LOCK:
+        _COMPILED_EXPRESSIONS[key] = compiled
+        while len(_COMPILED_EXPRESSIONS) > COMPILED_EXPRESSIONS_CACHE_SIZE:
+            _COMPILED_EXPRESSIONS.popitem(last=False)
+    return compiled
+
+
+# The following functions are the array counterparts of the evaluation actions
+# above, for the nodes whose actions only handle python numbers.
+
+def eval_atom_array(parse_result):
+    """
+    Return the value wrapped by the atom, ignoring parenthesis.
+    """
+    return next(k for k in parse_result if not isinstance(k, basestring))
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
-
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
-
-    return math_interpreter.reduce_tree(evaluate_actions)
+
+def eval_power_array(parse_result):
+    """
+    Exponentiate the inputs right to left, like `eval_power`.
+    """
+    parse_result = reversed([k for k in parse_result if not isinstance(k, basestring)])
+    return reduce(lambda a, b: b ** a, parse_result)
+
+
+def eval_parallel_array(parse_result):
+    """
+    Compute the parallel resistors operator like `eval_parallel`, with NaN
+    wherever there is a zero among the inputs.
+    """
+    if len(parse_result) == 1:
+        return parse_result[0]
+    inputs = [k for k in parse_result if not isinstance(k, basestring)]
+    has_zero = reduce(numpy.logical_or, [numpy.asarray(k) == 0 for k in inputs])
+    # avoid dividing by zero; those results are replaced by NaN anyway
+    inputs = [numpy.where(has_zero, 1, k) for k in inputs]
+    return numpy.where(has_zero, float('nan'), 1. / sum(1. / k for k in inputs))
+
+
+class CompiledExpression(object):
+    """
+    An expression which is parsed once, to be evaluated with any number of
+    variable bindings.
+
+    The parse tree is turned into nested closures, which take the dictionaries
+    of variables and functions and return the value of their node.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        self.math_expr = math_expr
+        self.case_sensitive = case_sensitive
+        self._parsed = None
+        self._evaluate = None
+        self._evaluate_arrays = None
+        if math_expr.strip() != "":
+            self._parsed = ParseAugmenter(math_expr, case_sensitive)
+            self._parsed.parse_algebra()
+            self._evaluate = self._compile({
+                'atom': eval_atom,
+                'power': eval_power,
+                'parallel': eval_parallel,
+                'product': eval_product,
+                'sum': eval_sum,
+            })
+            self._evaluate_arrays = self._compile({
+                'atom': eval_atom_array,
+                'power': eval_power_array,
+                'parallel': eval_parallel_array,
+                'product': eval_product,
+                'sum': eval_sum,
+            })
+
+    def _compile(self, actions):
+        """
+        Return the closure evaluating the whole tree, where the value of
+        operator nodes is computed by the given `actions`.
+        """
+        if self.case_sensitive:
+            casify = lambda x: x
+        else:
+            casify = lambda x: x.lower()  # Lowercase for case insens.
+
+        def compile_number(parse_result):
+            """Numbers are evaluated once and for all."""
+            value = eval_number(parse_result)
+            return lambda variables, functions: value
+
+        def compile_variable(parse_result):
+            """Variables are looked up by their casified name."""
+            name = casify(parse_result[0])
+            return lambda variables, functions: variables[name]
+
+        def compile_function(parse_result):
+            """Functions are looked up by their casified name."""
+            name, argument = casify(parse_result[0]), parse_result[1]
+            return lambda variables, functions: functions[name](argument(variables, functions))
+
+        def compile_operator(action):
+            """
+            Return the compiling action of a node whose value is computed by
+            `action` from the values of its children and operators.
+            """
+            def compile_node(parse_result):
+                """Children are closures, while operators are strings."""
+                children = [
+                    child if callable(child) else (lambda variables, functions, child=child: child)
+                    for child in parse_result
+                ]
+                return lambda variables, functions: action([child(variables, functions) for child in children])
+            return compile_node
+
+        compile_actions = {name: compile_operator(action) for name, action in actions.iteritems()}
+        compile_actions.update({
+            'number': compile_number,
+            'variable': compile_variable,
+            'function': compile_function,
+        })
+        return self._parsed.reduce_tree(compile_actions)
+
+    @property
+    def variables_used(self):
+        """The names of the variables in the expression, as typed."""
+        return self._parsed.variables_used if self._parsed else set()
+
+    @property
+    def functions_used(self):
+        """The names of the functions in the expression, as typed."""
+        return self._parsed.functions_used if self._parsed else set()
+
+    def _prepare(self, variables, functions):
+        """
+        Return the dictionaries of all the variables and functions, after
+        checking that the expression only uses those.
+        """
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+        self._parsed.check_variables(all_variables, all_functions)
+        return all_variables, all_functions
+
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the expression with the given variables and functions, like `evaluator`.
+        """
+        if self._parsed is None:
+            return float('nan')
+        return self._evaluate(*self._prepare(variables, functions))
+
+    def evaluate_many(self, variables_list, functions, vectorize=True):
+        """
+        Evaluate the expression with each of the dictionaries of variables in
+        `variables_list`, and return the list of results.
+
+        If `vectorize` is set and all the dictionaries bind the same variables
+        to floats, the expression is evaluated once, with NumPy arrays of
+        the values of the variables. It's evaluated with each dictionary in turn
+        if that fails, or raises any floating point warning, so that the results
+        and errors are those `evaluate` gives.
+        """
+        if self._parsed is None:
+            return [float('nan')] * len(variables_list)
+        if vectorize and len(variables_list) > 1:
+            results = self._evaluate_vectorized(variables_list, functions)
+            if results is not None:
+                return results
+        return [self._evaluate(*self._prepare(variables, functions)) for variables in variables_list]
+
+    def _evaluate_vectorized(self, variables_list, functions):
+        """
+        Return the results of `evaluate_many` computed with NumPy arrays, or
+        None if they can't be computed that way.
+        """
+        names = set(variables_list[0])
+        if any(set(variables) != names for variables in variables_list):
+            return None
+        if not all(isinstance(value, float) for variables in variables_list for value in variables.itervalues()):
+            return None
+        arrays = {
+            name: numpy.array([variables[name] for variables in variables_list], dtype=float)
+            for name in names
+        }
+        all_variables, all_functions = self._prepare(arrays, functions)
+        try:
+            with numpy.errstate(all='raise'):
+                results = self._evaluate_arrays(all_variables, all_functions)
+                # expressions which don't depend on the variables give a single value
+                results = numpy.asarray(results) * numpy.ones(len(variables_list))
+        except Exception:  # pylint: disable=broad-except
+            return None
+        if results.shape != (len(variables_list),):
+            return None
+        return results.tolist()
 
 
 class ParseAugmenter(object):
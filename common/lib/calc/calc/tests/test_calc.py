@@ -558,3 +558,73 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class CompiledExpressionTest(unittest.TestCase):
+    """
+    Run tests for calc.compile_expression and CompiledExpression
+    """
+
+    def assert_evaluate_many(self, math_expr, variables_list, vectorized=True):
+        """
+        Check that evaluating `math_expr` with each of `variables_list` at once
+        gives the same results as `calc.evaluator`, and whether it's vectorized.
+        """
+        compiled = calc.compile_expression(math_expr)
+        expected = [calc.evaluator(variables, {}, math_expr) for variables in variables_list]
+        results = compiled.evaluate_many(variables_list, {})
+        numpy.testing.assert_allclose(results, expected)
+        vectorized_results = compiled._evaluate_vectorized(variables_list, {})  # pylint: disable=protected-access
+        self.assertEqual(vectorized_results is not None, vectorized)
+
+    def test_cache(self):
+        """
+        Expressions are parsed once per case sensitivity
+        """
+        self.assertIs(calc.compile_expression('x^2 + 1'), calc.compile_expression('x^2 + 1'))
+        self.assertIsNot(calc.compile_expression('x^2 + 1'), calc.compile_expression('x^2 + 1', True))
+        self.assertEqual(calc.compile_expression('X^2 + y').variables_used, set(['X', 'y']))
+        with self.assertRaises(ParseException):
+            calc.compile_expression('x +* 2')
+
+    def test_cache_eviction(self):
+        """
+        The cache keeps the most recently used expressions
+        """
+        old_size = calc.calc.COMPILED_EXPRESSIONS_CACHE_SIZE
+        calc.calc.COMPILED_EXPRESSIONS_CACHE_SIZE = 2
+        try:
+            first = calc.compile_expression('1 + 1')
+            second = calc.compile_expression('2 + 2')
+            calc.compile_expression('1 + 1')
+            calc.compile_expression('3 + 3')
+            self.assertIs(calc.compile_expression('1 + 1'), first)
+            self.assertIsNot(calc.compile_expression('2 + 2'), second)
+        finally:
+            calc.calc.COMPILED_EXPRESSIONS_CACHE_SIZE = old_size
+
+    def test_evaluate_many(self):
+        """
+        Vectorized evaluation gives the same results as evaluating each sample
+        """
+        samples = [{'x': x, 'y': x / 2 + 1} for x in numpy.linspace(1, 5, 50)]
+        self.assert_evaluate_many('x^2 + 3*y - sin(x)/cos(y)', samples)
+        self.assert_evaluate_many('(x || y) * i + e^(-x)', samples)
+        self.assert_evaluate_many('2^3^2 + sqrt(x)', samples)
+        self.assert_evaluate_many('5k', samples)
+        self.assert_evaluate_many('fact(x)', [{'x': float(x)} for x in range(1, 6)], vectorized=False)
+
+    def test_evaluate_many_errors(self):
+        """
+        Samples the expression isn't defined for give the same results or
+        errors as evaluating each sample
+        """
+        samples = [{'x': x} for x in (-1.0, 0.0, 1.0)]
+        self.assert_evaluate_many('x || 2', samples)
+        with self.assertRaises(ZeroDivisionError):
+            calc.compile_expression('1/x').evaluate_many(samples, {})
+        with self.assertRaises(ValueError):
+            calc.compile_expression('fact(x)').evaluate_many(samples, {})
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'y'):
+            calc.compile_expression('x + y').evaluate_many(samples, {})
+        self.assertTrue(numpy.isnan(calc.compile_expression('').evaluate_many(samples, {})).all())
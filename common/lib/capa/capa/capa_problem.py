@@ -13,10 +13,13 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+from collections import OrderedDict
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
+import threading
 
 from lxml import etree
 from xml.sax.saxutils import unescape
@@ -59,6 +62,68 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# the number of parsed problems, and of script contexts, to keep in each process
+PROBLEM_CACHE_SIZE = 1000
+
+
+class ProblemCache(object):
+    """
+    A thread-safe LRU cache of the parts of problems which only depend on
+    their definition, to share them between the instances of a problem.
+
+    Values are copied on the way in and out, as problems modify them.
+    """
+    def __init__(self, size):
+        self.size = size
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return a copy of the value cached under `key`, or None.
+        """
+        with self._lock:
+            value = self._values.pop(key, None)
+            if value is None:
+                return None
+            # re-insert as the most recently used
+            self._values[key] = value
+        return deepcopy(value)
+
+    def set(self, key, value):
+        """
+        Cache a copy of `value` under `key`.
+        """
+        value = deepcopy(value)
+        with self._lock:
+            self._values.pop(key, None)
+            self._values[key] = value
+            while len(self._values) > self.size:
+                self._values.popitem(last=False)
+
+    def clear(self):
+        """
+        Empty the cache.
+        """
+        with self._lock:
+            self._values.clear()
+
+
+def _text_hash(text):
+    """
+    Return the hex digest of the SHA1 hash of `text`, which may be unicode.
+    """
+    if isinstance(text, unicode):
+        text = text.encode('utf-8')
+    return hashlib.sha1(text).hexdigest()
+
+
+# problem trees, once their includes are processed, by hash of the problem text
+PARSED_PROBLEMS = ProblemCache(PROBLEM_CACHE_SIZE)
+
+# results of the execution of the scripts of problems, by hash of the code and seed
+SCRIPT_CONTEXTS = ProblemCache(PROBLEM_CACHE_SIZE)
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -158,11 +223,8 @@ class LoncapaProblem(object):
         problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
         self.problem_text = problem_text
 
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # parse problem XML file into an element tree, and handle any <include file="foo"> tags
+        self._parse_problem()
 
         # construct script processor context (eg for customresponse problems)
         self.context = self._extract_context(self.tree)
@@ -528,6 +590,20 @@ class LoncapaProblem(object):
 
     # ======= Private Methods Below ========
 
+    def _parse_problem(self):
+        """
+        Parse the problem text into self.tree, and process its includes. The trees of problems
+        without includes are cached, as included files may change without the problem changing.
+        """
+        key = _text_hash(self.problem_text)
+        self.tree = PARSED_PROBLEMS.get(key)
+        if self.tree is None:
+            self.tree = etree.XML(self.problem_text)
+            if self.tree.find('.//include') is None:
+                PARSED_PROBLEMS.set(key, self.tree)
+            else:
+                self._process_includes()
+
     def _process_includes(self):
         """
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
@@ -646,20 +722,37 @@ class LoncapaProblem(object):
             all_code += code
 
         if all_code:
-            try:
-                safe_exec(
-                    all_code,
-                    context,
-                    random_seed=self.seed,
-                    python_path=python_path,
-                    cache=self.capa_system.cache,
-                    slug=self.problem_id,
-                    unsafely=self.capa_system.can_execute_unsafe_code(),
-                )
-            except Exception as err:
-                log.exception("Error while execing script code: " + all_code)
-                msg = "Error while executing script code: %s" % str(err).replace('<', '&lt;')
-                raise responsetypes.LoncapaProblemError(msg)
+            unsafely = self.capa_system.can_execute_unsafe_code()
+            # the anonymous student id is part of the context, but most scripts don't use it,
+            # and their results can be shared by all the students with the same seed
+            uses_student_id = 'anonymous_student_id' in all_code
+            key = (
+                _text_hash(all_code),
+                tuple(python_path),
+                self.seed,
+                context['anonymous_student_id'] if uses_student_id else None,
+                unsafely,
+            )
+            cached_context = SCRIPT_CONTEXTS.get(key)
+            if cached_context is not None:
+                context = cached_context
+                context['anonymous_student_id'] = self.capa_system.anonymous_student_id
+            else:
+                try:
+                    safe_exec(
+                        all_code,
+                        context,
+                        random_seed=self.seed,
+                        python_path=python_path,
+                        cache=self.capa_system.cache,
+                        slug=self.problem_id,
+                        unsafely=unsafely,
+                    )
+                except Exception as err:
+                    log.exception("Error while execing script code: " + all_code)
+                    msg = "Error while executing script code: %s" % str(err).replace('<', '&lt;')
+                    raise responsetypes.LoncapaProblemError(msg)
+                SCRIPT_CONTEXTS.set(key, context)
 
         # Store code source in context, along with the Python path needed to run it correctly.
         context['script_code'] = all_code
@@ -6,7 +6,11 @@ from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
 from dogapi import dog_stats_api
 
+from collections import OrderedDict
+from copy import deepcopy
 import hashlib
+import threading
+import time
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -47,6 +51,104 @@ for name, modname in ASSUMED_IMPORTS:
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
 
+class ResultsCache(object):
+    """
+    A thread-safe LRU cache of the results of executions, kept in the process
+    in front of the `cache` given to safe_exec.
+
+    Results are copied on the way out, as callers modify the globals they get.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return a copy of the result cached under `key`, or None.
+        """
+        with self._lock:
+            result = self._results.pop(key, None)
+            if result is None:
+                self.misses += 1
+                return None
+            # re-insert as the most recently used
+            self._results[key] = result
+            self.hits += 1
+        return deepcopy(result)
+
+    def set(self, key, result):
+        """
+        Cache `result` under `key`.
+        """
+        with self._lock:
+            self._results.pop(key, None)
+            self._results[key] = result
+            while len(self._results) > self.size:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        """
+        Empty the cache.
+        """
+        with self._lock:
+            self._results.clear()
+
+
+# The process-wide results cache, and the semaphore bounding the number of
+# sandboxed interpreters run at once by this process. Both are disabled until
+# `configure` is called.
+RESULTS_CACHE = None
+EXEC_SLOTS = None
+
+
+def configure(results_cache_size=None, max_concurrent_execs=None):
+    """
+    Configure the process-wide behavior of safe_exec.
+
+    `results_cache_size` is the number of results kept in the process in front
+    of the `cache` given to safe_exec, or None to only use that cache.
+
+    `max_concurrent_execs` is the number of executions which may run at once
+    in this process, or None for no limit; other executions wait for a slot.
+    """
+    global RESULTS_CACHE, EXEC_SLOTS  # pylint: disable=global-statement
+    RESULTS_CACHE = ResultsCache(results_cache_size) if results_cache_size else None
+    EXEC_SLOTS = threading.BoundedSemaphore(max_concurrent_execs) if max_concurrent_execs else None
+
+
+def _get_cached(cache, key):
+    """
+    Return the result cached under `key` in the process, or else in `cache`, or None.
+    """
+    if RESULTS_CACHE is not None:
+        cached = RESULTS_CACHE.get(key)
+        if cached is not None:
+            dog_stats_api.increment('capa.safe_exec.cache', tags=['tier:process', 'outcome:hit'])
+            return cached
+
+    cached = cache.get(key)
+    if cached is not None:
+        dog_stats_api.increment('capa.safe_exec.cache', tags=['tier:shared', 'outcome:hit'])
+        if RESULTS_CACHE is not None:
+            RESULTS_CACHE.set(key, cached)
+            cached = deepcopy(cached)
+    else:
+        dog_stats_api.increment('capa.safe_exec.cache', tags=['tier:all', 'outcome:miss'])
+    return cached
+
+
+def _set_cached(cache, key, result):
+    """
+    Cache `result` under `key` in the process and in `cache`.
+    """
+    if RESULTS_CACHE is not None:
+        RESULTS_CACHE.set(key, deepcopy(result))
+    cache.set(key, result)
+
+
 def update_hash(hasher, obj):
     """
     Update a `hashlib` hasher with a nested object.
@@ -92,6 +194,9 @@ def safe_exec(code, globals_dict, random_seed=None, python_path=None, cache=None
 
     If `unsafely` is true, then the code will actually be executed without sandboxing.
 
+    If a process-wide results cache was configured (see `configure`), it is
+    looked up before `cache`.
+
     """
     # Check the cache for a previous result.
     if cache:
@@ -100,7 +205,7 @@ def safe_exec(code, globals_dict, random_seed=None, python_path=None, cache=None
         md5er.update(repr(code))
         update_hash(md5er, safe_globals)
         key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
-        cached = cache.get(key)
+        cached = _get_cached(cache, key)
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
             # message, if any, else None; and the resulting globals dictionary.
@@ -120,6 +225,10 @@ def safe_exec(code, globals_dict, random_seed=None, python_path=None, cache=None
         exec_fn = codejail_safe_exec
 
     # Run the code!  Results are side effects in globals_dict.
+    exec_slots = EXEC_SLOTS
+    if exec_slots is not None:
+        exec_slots.acquire()
+    start = time.time()
     try:
         exec_fn(
             code_prolog + LAZY_IMPORTS + code, globals_dict,
@@ -129,12 +238,16 @@ def safe_exec(code, globals_dict, random_seed=None, python_path=None, cache=None
         emsg = e.message
     else:
         emsg = None
+    finally:
+        if exec_slots is not None:
+            exec_slots.release()
+        dog_stats_api.histogram('capa.safe_exec.exec_time', time.time() - start)
 
     # Put the result back in the cache.  This is complicated by the fact that
     # the globals dict might not be entirely serializable.
     if cache:
         cleaned_results = json_safe(globals_dict)
-        cache.set(key, (emsg, cleaned_results))
+        _set_cached(cache, key, (emsg, cleaned_results))
 
     # If an exception happened, raise it now.
     if emsg:
@@ -9,7 +9,8 @@ import unittest
 
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec, update_hash, configure
+from capa.safe_exec.safe_exec import ResultsCache
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -177,6 +178,72 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestSafeExecProcessCache(unittest.TestCase):
+    """Test the process-wide results cache in front of the shared cache."""
+
+    def setUp(self):
+        configure(results_cache_size=10)
+        self.addCleanup(configure)
+
+    def test_process_cache_is_used_first(self):
+        cache = {}
+        g = {}
+        safe_exec("a = [int(math.pi)]", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], [3])
+
+        # The shared cache isn't read again.
+        cache[cache.keys()[0]] = (None, {'a': [17]})
+        g = {}
+        safe_exec("a = [int(math.pi)]", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], [3])
+
+        # Cached results are copied out.
+        g['a'].append(4)
+        g = {}
+        safe_exec("a = [int(math.pi)]", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], [3])
+
+    def test_shared_cache_fills_process_cache(self):
+        cache = {}
+        safe_exec("a = 1", {}, cache=DictCache(cache))
+        configure(results_cache_size=10)
+
+        g = {}
+        safe_exec("a = 1", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], 1)
+        # Another process would have the result in its own cache now.
+        g = {}
+        safe_exec("a = 1", g, cache=DictCache({}))
+        self.assertEqual(g['a'], 1)
+
+    def test_eviction(self):
+        configure(results_cache_size=1)
+        cache = {}
+        safe_exec("a = 1", {}, cache=DictCache(cache))
+        safe_exec("a = 2", {}, cache=DictCache(cache))
+        cache.clear()
+
+        g = {}
+        safe_exec("a = 2", g, cache=DictCache(cache))
+        self.assertEqual(cache, {})
+        safe_exec("a = 1", g, cache=DictCache(cache))
+        self.assertEqual(len(cache), 1)
+
+
+class TestResultsCache(unittest.TestCase):
+    """Test the LRU of results."""
+
+    def test_lru(self):
+        cache = ResultsCache(2)
+        cache.set('a', (None, {'a': 1}))
+        cache.set('b', (None, {'b': 1}))
+        cache.get('a')
+        cache.set('c', (None, {'c': 1}))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), (None, {'a': 1}))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
@@ -0,0 +1,85 @@
+"""
+Tests of the caching of parsed problems and script contexts between LoncapaProblems.
+"""
+
+import textwrap
+import unittest
+
+from mock import patch
+
+from capa import capa_problem
+from . import test_capa_system, new_loncapa_problem
+
+
+class ProblemCacheTest(unittest.TestCase):
+    """
+    Tests for the process-wide caches of LoncapaProblem.
+    """
+
+    def setUp(self):
+        super(ProblemCacheTest, self).setUp()
+        capa_problem.PARSED_PROBLEMS.clear()
+        capa_problem.SCRIPT_CONTEXTS.clear()
+        self.system = test_capa_system()
+
+    def build_problem(self, script, seed=723, anonymous_student_id='student'):
+        """
+        Build a problem with a `script` which sets the answer of a string response.
+        """
+        xml = textwrap.dedent("""
+            <problem>
+            <script type="loncapa/python">
+            {}
+            </script>
+            <stringresponse answer="$answer">
+              <textline size="20"/>
+            </stringresponse>
+            </problem>
+        """).format(script)
+        self.system.anonymous_student_id = anonymous_student_id
+        return new_loncapa_problem(xml, capa_system=self.system, seed=seed)
+
+    def test_script_executed_once_per_seed(self):
+        script = "import random\nanswer = str(random.randint(0, 1e9))"
+        with patch('capa.capa_problem.safe_exec', wraps=capa_problem.safe_exec) as mock_exec:
+            first = self.build_problem(script)
+            second = self.build_problem(script, anonymous_student_id='another student')
+            self.assertEqual(mock_exec.call_count, 1)
+            self.assertEqual(first.context['answer'], second.context['answer'])
+            self.assertEqual(second.context['anonymous_student_id'], 'another student')
+
+            third = self.build_problem(script, seed=1)
+            self.assertEqual(mock_exec.call_count, 2)
+            self.assertNotEqual(first.context['answer'], third.context['answer'])
+
+    def test_script_using_student_id(self):
+        script = "answer = anonymous_student_id"
+        with patch('capa.capa_problem.safe_exec', wraps=capa_problem.safe_exec) as mock_exec:
+            first = self.build_problem(script)
+            second = self.build_problem(script, anonymous_student_id='another student')
+            self.assertEqual(mock_exec.call_count, 2)
+        self.assertEqual(first.context['answer'], 'student')
+        self.assertEqual(second.context['answer'], 'another student')
+
+    def test_problems_are_independent(self):
+        script = "answer = 'four'"
+        first = self.build_problem(script)
+        first.context['answer'] = 'changed'
+        first.tree.set('changed', 'true')
+        first.grade_answers({'1_2_1': 'four'})
+
+        second = self.build_problem(script)
+        self.assertEqual(second.context['answer'], 'four')
+        self.assertIsNone(second.tree.get('changed'))
+        self.assertEqual(second.get_score()['score'], 0)
+        self.assertEqual(second.grade_answers({'1_2_1': 'four'}).get_correctness('1_2_1'), 'correct')
+
+    def test_cache_size(self):
+        cache = capa_problem.ProblemCache(2)
+        cache.set('first', {'value': 1})
+        cache.set('second', {'value': 2})
+        cache.get('first')
+        cache.set('third', {'value': 3})
+        self.assertEqual(cache.get('first'), {'value': 1})
+        self.assertIsNone(cache.get('second'))
+        self.assertEqual(cache.get('third'), {'value': 3})
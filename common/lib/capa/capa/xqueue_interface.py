@@ -67,11 +67,13 @@ class XQueueInterface(object):
     Interface to the external grading system
     """
 
-    def __init__(self, url, django_auth, requests_auth=None):
+    def __init__(self, url, django_auth, requests_auth=None, timeout=None):
         self.url = unicode(url)
         self.auth = django_auth
         self.session = requests.Session()
         self.session.auth = requests_auth
+        # seconds to wait for xqueue to respond, or None to wait forever
+        self.timeout = timeout
 
     def send_to_queue(self, header, body, files_to_upload=None):
         """
@@ -134,10 +136,13 @@ class XQueueInterface(object):
 
     def _http_post(self, url, data, files=None):
         try:
-            r = self.session.post(url, data=data, files=files)
+            r = self.session.post(url, data=data, files=files, timeout=self.timeout)
         except requests.exceptions.ConnectionError, err:
             log.error(err)
             return (1, 'cannot connect to server')
+        except requests.exceptions.Timeout, err:
+            log.error(err)
+            return (1, 'server timed out')
 
         if r.status_code not in [200]:
             return (1, 'unexpected HTTP status code [%d]' % r.status_code)
@@ -56,8 +56,27 @@ def safemembers(members):
 
     return members
 
+def _reporting(members, progress):
+    """
+    Yield the `members`, calling `progress` with the number of members yielded
+    before each one, and with the number of all the members at the end.
+    """
+    count = 0
+    for finfo in members:
+        progress(count)
+        yield finfo
+        count += 1
+    progress(count)
+
 def safetar_extractall(tarf, *args, **kwargs):
     """
     Safe version of `tarf.extractall()`.
+
+    If a `progress` keyword argument is given, it's called with the number of
+    members extracted so far, as they are extracted.
     """
-    return tarf.extractall(members=safemembers(tarf), *args, **kwargs)
+    progress = kwargs.pop('progress', None)
+    members = safemembers(tarf)
+    if progress is not None:
+        members = _reporting(members, progress)
+    return tarf.extractall(members=members, *args, **kwargs)
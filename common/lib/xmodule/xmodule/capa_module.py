@@ -172,6 +172,21 @@ class CapaDescriptor(CapaFields, RawDescriptor):
         ])
         return non_editable_fields
 
+    @property
+    def max_score_definition(self):
+        """
+        The content the max score of the problem is computed from, which is
+        its XML, or None if the max score may differ between students or
+        change independently of the XML: when the problem is randomized per
+        student or attempt (its responses may then depend on the seed), runs
+        scripts, or includes other files.
+        """
+        if self.rerandomize != 'never':
+            return None
+        if '<include' in self.data or '<script' in self.data:
+            return None
+        return self.data
+
     # Proxy to CapaModule for access to any of its attributes
     answer_available = module_attr('answer_available')
     check_button_name = module_attr('check_button_name')
@@ -0,0 +1,181 @@
+"""
+A size bounded cache of asset content on the local disk.
+
+Assets are stored under the md5 digest GridFS computes for them, so an entry
+can never be stale: an asset which is replaced gets a new digest, and the
+entry of its old content is simply never looked up again until it's evicted.
+The least recently used entries are evicted when the cache grows past its
+size, down to EVICTION_LOW_WATER of it so that the directory isn't scanned on
+every addition to a full cache; reading an entry bumps its modification time,
+so that several processes can share the same directory.
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+
+from .content import STREAM_DATA_CHUNK_SIZE
+
+try:
+    from dogapi import dog_stats_api
+except ImportError:
+    dog_stats_api = None
+
+log = logging.getLogger(__name__)
+
+DIGEST_RE = re.compile(r'^[0-9a-f]{32}$')
+
+# the fraction of its size a full cache is evicted down to
+EVICTION_LOW_WATER = 0.9
+
+
+class DiskContentCache(object):
+    """
+    A cache of asset content in the files of `directory`, whose total size is kept under `max_bytes`.
+    Assets larger than `max_file_bytes` aren't cached.
+    """
+    def __init__(self, directory, max_bytes, max_file_bytes=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_bytes if max_file_bytes is None else min(max_file_bytes, max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.current_bytes = sum(size for __, __, size in self._entries())
+
+    def _path(self, digest):
+        """
+        Returns the path of the file holding the content of the given digest.
+        """
+        if not DIGEST_RE.match(digest or ''):
+            raise ValueError("Not an md5 digest: {!r}".format(digest))
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _record(self, outcome):
+        """
+        Counts a lookup in the statistics of the cache and in metrics.
+        """
+        if outcome == 'hit':
+            self.hits += 1
+        else:
+            self.misses += 1
+        if dog_stats_api:
+            dog_stats_api.increment('contentstore.disk_cache.{}'.format(outcome))
+
+    def open(self, digest):
+        """
+        Returns the cached content of the given digest as a file open for reading, or None.
+        """
+        path = self._path(digest)
+        try:
+            cached_file = open(path, 'rb')
+        except IOError:
+            self._record('miss')
+            return None
+        try:
+            # mark as recently used
+            os.utime(path, None)
+        except OSError:
+            pass
+        self._record('hit')
+        return cached_file
+
+    def add(self, digest, stream, length):
+        """
+        Copies `length` bytes of content with the given digest from `stream` into the cache, and
+        returns the cached content as a file open for reading. Returns None if the content is too
+        large to be cached, or doesn't match its digest.
+        """
+        if length is None or length > self.max_file_bytes:
+            return None
+        path = self._path(digest)
+        if not os.path.isdir(os.path.dirname(path)):
+            try:
+                os.makedirs(os.path.dirname(path))
+            except OSError:
+                # created by another process in the meantime
+                pass
+
+        # write to a hidden temporary file first, so that no reader ever sees a partial entry
+        md5 = hashlib.md5()
+        temp_file = tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix='.', delete=False)
+        try:
+            with temp_file:
+                while True:
+                    chunk = stream.read(STREAM_DATA_CHUNK_SIZE)
+                    if len(chunk) == 0:
+                        break
+                    md5.update(chunk)
+                    temp_file.write(chunk)
+            if md5.hexdigest() != digest:
+                log.warning("Content read for %s doesn't match its digest; not caching it", digest)
+                os.remove(temp_file.name)
+                return None
+            os.rename(temp_file.name, path)
+        except (IOError, OSError):
+            log.exception("Failed to add %s to the disk cache", digest)
+            if os.path.exists(temp_file.name):
+                os.remove(temp_file.name)
+            return None
+
+        with self._lock:
+            self.current_bytes += length
+            if self.current_bytes > self.max_bytes:
+                self._evict()
+        return open(path, 'rb')
+
+    def remove(self, digest):
+        """
+        Removes the content of the given digest from the cache, if it's there.
+        """
+        path = self._path(digest)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self.current_bytes -= size
+
+    def _entries(self):
+        """
+        Returns a (modification time, path, size) triple for each file in the cache.
+        """
+        entries = []
+        for dirpath, __, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if filename.startswith('.'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # evicted by another process
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def _evict(self):
+        """
+        Removes the least recently used files until the cache is under EVICTION_LOW_WATER of its
+        size, if it's over its size. The size is recomputed from the directory, as other processes
+        may share it. Must be called with the lock held.
+        """
+        entries = sorted(self._entries())
+        self.current_bytes = sum(size for __, __, size in entries)
+        if self.current_bytes <= self.max_bytes:
+            return
+        low_water_bytes = int(self.max_bytes * EVICTION_LOW_WATER)
+        for __, path, size in entries:
+            if self.current_bytes <= low_water_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # evicted by another process
+                pass
+            self.current_bytes -= size
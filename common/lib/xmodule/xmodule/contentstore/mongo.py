@@ -7,6 +7,7 @@ from xmodule.contentstore.content import XASSET_LOCATION_TAG
 import logging
 
 from .content import StaticContent, ContentStore, StaticContentStream
+from .disk_cache import DiskContentCache
 from xmodule.exceptions import NotFoundError
 from fs.osfs import OSFS
 import os
@@ -16,14 +17,24 @@ from opaque_keys.edx.keys import AssetKey
 from xmodule.modulestore.django import ASSET_IGNORE_REGEX
 
 
+# default size of the disk cache of asset content
+DISK_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+
 class MongoContentStore(ContentStore):
 
     # pylint: disable=W0613
-    def __init__(self, host, db, port=27017, user=None, password=None, bucket='fs', collection=None, **kwargs):
+    def __init__(self, host, db, port=27017, user=None, password=None, bucket='fs', collection=None,
+                 disk_cache_dir=None, disk_cache_max_bytes=DISK_CACHE_MAX_BYTES, disk_cache_max_file_bytes=None,
+                 **kwargs):
         """
         Establish the connection with the mongo backend and connect to the collections
 
         :param collection: ignores but provided for consistency w/ other doc_store_config patterns
+        :param disk_cache_dir: if given, the content of assets is cached in this directory, which may be
+            shared by processes on the same host, so that it's only read from GridFS once
+        :param disk_cache_max_bytes: the maximum total size of the disk cache
+        :param disk_cache_max_file_bytes: the size of the largest asset to put in the disk cache
         """
         logging.debug('Using MongoDB for static content serving at host={0} db={1}'.format(host, db))
         _db = pymongo.database.Database(
@@ -43,6 +54,10 @@ class MongoContentStore(ContentStore):
 
         self.fs_files = _db[bucket + ".files"]  # the underlying collection GridFS uses
 
+        self.disk_cache = None
+        if disk_cache_dir is not None:
+            self.disk_cache = DiskContentCache(disk_cache_dir, disk_cache_max_bytes, disk_cache_max_file_bytes)
+
     def close_connections(self):
         """
         Closes any open connections to the underlying databases
@@ -83,6 +98,8 @@ class MongoContentStore(ContentStore):
     def delete(self, location_or_id):
         if isinstance(location_or_id, AssetKey):
             location_or_id, _ = self.asset_db_key(location_or_id)
+        if self.disk_cache is not None:
+            self._remove_from_disk_cache(self.fs_files.find_one({'_id': location_or_id}, fields=['md5']))
         # Deletes of non-existent files are considered successful
         self.fs.delete(location_or_id)
 
@@ -91,7 +108,7 @@ class MongoContentStore(ContentStore):
 
         try:
             if as_stream:
-                fp = self.fs.get(content_id)
+                fp = self._open_cached(self.fs.get(content_id))
                 thumbnail_location = getattr(fp, 'thumbnail_location', None)
                 if thumbnail_location:
                     thumbnail_location = location.course_key.make_asset_key('thumbnail', thumbnail_location[4])
@@ -99,10 +116,11 @@ class MongoContentStore(ContentStore):
                     location, fp.displayname, fp.content_type, fp, last_modified_at=fp.uploadDate,
                     thumbnail_location=thumbnail_location,
                     import_path=getattr(fp, 'import_path', None),
-                    length=fp.length, locked=getattr(fp, 'locked', False)
+                    length=fp.length, locked=getattr(fp, 'locked', False),
+                    content_digest=getattr(fp, 'md5', None),
                 )
             else:
-                with self.fs.get(content_id) as fp:
+                with self._open_cached(self.fs.get(content_id)) as fp:
                     thumbnail_location = getattr(fp, 'thumbnail_location', None)
                     if thumbnail_location:
                         thumbnail_location = location.course_key.make_asset_key('thumbnail', thumbnail_location[4])
@@ -110,7 +128,8 @@ class MongoContentStore(ContentStore):
                         location, fp.displayname, fp.content_type, fp.read(), last_modified_at=fp.uploadDate,
                         thumbnail_location=thumbnail_location,
                         import_path=getattr(fp, 'import_path', None),
-                        length=fp.length, locked=getattr(fp, 'locked', False)
+                        length=fp.length, locked=getattr(fp, 'locked', False),
+                        content_digest=getattr(fp, 'md5', None),
                     )
         except NoFile:
             if throw_on_not_found:
@@ -118,6 +137,30 @@ class MongoContentStore(ContentStore):
             else:
                 return None
 
+    def _remove_from_disk_cache(self, asset):
+        """
+        Frees the space taken in the disk cache by the content of the `asset` document of the files
+        collection, which is about to be deleted.
+        """
+        if self.disk_cache is not None and asset is not None and asset.get('md5'):
+            self.disk_cache.remove(asset['md5'])
+
+    def _open_cached(self, grid_file):
+        """
+        Returns a file-like object to read the content of `grid_file` from, which is a file of the
+        disk cache, if enabled, and exposes the same attributes as `grid_file`.
+        """
+        if self.disk_cache is None or not getattr(grid_file, 'md5', None):
+            return grid_file
+        cached_file = self.disk_cache.open(grid_file.md5)
+        if cached_file is None:
+            cached_file = self.disk_cache.add(grid_file.md5, grid_file, grid_file.length)
+            if cached_file is None:
+                # not cacheable; start over from the beginning of the content
+                grid_file.seek(0)
+                return grid_file
+        return CachedGridFile(grid_file, cached_file)
+
     def export(self, location, output_directory):
         content = self.find(location)
 
@@ -186,6 +229,7 @@ class MongoContentStore(ContentStore):
             items = self.fs_files.find(query)
             assets_to_delete = assets_to_delete + items.count()
             for asset in items:
+                self._remove_from_disk_cache(asset)
                 self.fs.delete(asset[prefix])
 
             self.fs_files.remove(query)
@@ -328,6 +372,7 @@ class MongoContentStore(ContentStore):
         matching_assets = self.fs_files.find(course_query)
         for asset in matching_assets:
             asset_key = self.make_id_son(asset)
+            self._remove_from_disk_cache(asset)
             self.fs.delete(asset_key)
 
     # codifying the original order which pymongo used for the dicts coming out of location_to_dict
@@ -389,3 +434,34 @@ def query_for_course(course_key, category=None):
     else:
         dbkey['{}.run'.format(prefix)] = course_key.run
     return dbkey
+
+
+class CachedGridFile(object):
+    """
+    The content of a GridFS file read from a local copy, with the GridFS file's attributes.
+    """
+    def __init__(self, grid_file, cached_file):
+        self._grid_file = grid_file
+        self._cached_file = cached_file
+
+    def read(self, size=-1):
+        return self._cached_file.read(size)
+
+    def seek(self, pos, whence=os.SEEK_SET):
+        self._cached_file.seek(pos, whence)
+
+    def tell(self):
+        return self._cached_file.tell()
+
+    def close(self):
+        self._cached_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._grid_file, name)
@@ -65,6 +65,10 @@ def create_modulestore_instance(engine, content_store, doc_store_config, options
     except InvalidCacheBackendError:
         metadata_inheritance_cache = get_cache('default')
 
+    # split modulestore documents are only shared between processes if a cache is configured for them
+    if 'split_documents' in getattr(settings, 'CACHES', {}):
+        _options.setdefault('document_cache_subsystem', get_cache('split_documents'))
+
     return class_(
         contentstore=content_store,
         metadata_inheritance_cache_subsystem=metadata_inheritance_cache,
@@ -15,7 +15,7 @@ structure:
 import pymongo
 import sys
 import logging
-import copy
+import random
 import re
 from uuid import uuid4
 
@@ -36,6 +36,7 @@ from xblock.fields import Scope, ScopeIds, Reference, ReferenceList, ReferenceVa
 
 from xmodule.modulestore import ModuleStoreWriteBase, ModuleStoreEnum
 from xmodule.modulestore.draft_and_published import ModuleStoreDraftAndPublished
+from xmodule.modulestore.mongo.inheritance_index import MetadataInheritanceIndex
 from opaque_keys.edx.locations import Location
 from xmodule.modulestore.exceptions import ItemNotFoundError, InvalidLocationError, ReferentialIntegrityError
 from xmodule.modulestore.inheritance import own_metadata, InheritanceMixin, inherit_metadata, InheritanceKeyValueStore
@@ -431,9 +432,25 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         """
         Restart updating the meta-data inheritance cache for the given course.
         Refresh the meta-data inheritance cache now since it was temporarily disabled.
+
+        The subtree edit times of the ancestors of the blocks written during the
+        operation were not updated either, so every container of the course is
+        marked as edited now.
         """
         if course_id in self.ignore_write_events_on_courses:
             self.ignore_write_events_on_courses.remove(course_id)
+            query = SON([
+                ('_id.tag', 'i4x'),
+                ('_id.org', course_id.org),
+                ('_id.course', course_id.course),
+                ('_id.category', {'$in': BLOCK_TYPES_WITH_CHILDREN})
+            ])
+            self.collection.update(
+                query,
+                {'$set': {'edit_info.subtree_edited_on': datetime.now(UTC)}},
+                multi=True,
+                safe=self.collection.safe
+            )
             self.refresh_cached_metadata_inheritance_tree(course_id)
 
     def _is_bulk_write_in_progress(self, course_id):
@@ -470,6 +487,8 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
 
     def _compute_metadata_inheritance_tree(self, course_id):
         '''
+        Build the MetadataInheritanceIndex of the course from the containers stored in the db.
+
         TODO (cdodge) This method can be deleted when the 'split module store' work has been completed
         '''
         # get all collections in the course, this query should not return any leaf nodes
@@ -496,7 +515,6 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         # it's ok to keep these as deprecated strings b/c the overall cache is indexed by course_key and this
         # is a dictionary relative to that course
         results_by_url = {}
-        root = None
 
         # now go through the results and order them by the location url
         for result in resultset:
@@ -504,50 +522,27 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
             location = as_published(Location._from_deprecated_son(result['_id'], course_id.run))
 
             location_url = location.to_deprecated_string()
+            children = result.get('definition', {}).get('children', [])
             if location_url in results_by_url:
                 # found either draft or live to complement the other revision
-                existing_children = results_by_url[location_url].get('definition', {}).get('children', [])
-                additional_children = result.get('definition', {}).get('children', [])
-                total_children = existing_children + additional_children
                 # use set to get rid of duplicates. We don't care about order; so, it shouldn't matter.
-                results_by_url[location_url].setdefault('definition', {})['children'] = set(total_children)
+                results_by_url[location_url][1].update(children)
             else:
-                results_by_url[location_url] = result
-            if location.category == 'course':
-                root = location_url
-
-        # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
-
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            my_metadata = results_by_url[url].get('metadata', {})
-
-            # go through all the children and recurse, but only if we have
-            # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata
+                results_by_url[location_url] = (result.get('metadata', {}), set(children))
 
-        if root is not None:
-            _compute_inherited_metadata(root)
-
-        return metadata_to_inherit
+        index = MetadataInheritanceIndex()
+        for location_url, (metadata, children) in results_by_url.iteritems():
+            index.add_container(location_url, metadata, children)
+        return index
 
     def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
         '''
         Compute the metadata inheritance for the course.
+
+        `force_refresh` must be used after the inheritance of the course was changed in the db, as it
+        also invalidates the trees other processes may be computing from the former state of the course.
         '''
-        tree = {}
+        tree = None
 
         course_id = self.fill_in_run(course_id)
         if not force_refresh:
@@ -556,17 +551,14 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
                 return self.request_cache.data['metadata_inheritance'][unicode(course_id)]
 
             # then look in any caching subsystem (e.g. memcached)
-            if self.metadata_inheritance_cache_subsystem is not None:
-                tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
-            else:
-                logging.warning(
-                    'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
-                    OK in localdev and testing environment. Not OK in production.'
-                )
+            tree, generation = self._get_metadata_inheritance_tree_from_cache_subsystem(course_id)
+        else:
+            generation = self._next_metadata_inheritance_generation(course_id)
 
-        if not tree:
+        if tree is None:
             # if not in subsystem, or we are on force refresh, then we have to compute
             tree = self._compute_metadata_inheritance_tree(course_id)
+            tree.version = generation
 
             # now write out computed tree to caching subsystem (e.g. memcached), if available
             if self.metadata_inheritance_cache_subsystem is not None:
@@ -575,6 +567,66 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         # now populate a request_cache, if available. NOTE, we are outside of the
         # scope of the above if: statement so that after a memcache hit, it'll get
         # put into the request_cache
+        self._set_request_cached_metadata_inheritance_tree(course_id, tree)
+
+        return tree
+
+    @staticmethod
+    def _metadata_inheritance_generation_key(course_id):
+        """
+        The key of the generation of the cached metadata inheritance tree of the course.
+
+        The generation is incremented on every change to the inheritance of the course. The cached tree
+        records the generation it was computed at (as its version), so that a tree computed by a process
+        from a state of the course that was changed meanwhile by another process is not used.
+        """
+        return u'{}.generation'.format(course_id)
+
+    def _next_metadata_inheritance_generation(self, course_id):
+        """
+        Increment and return the generation of the cached metadata inheritance tree of the course,
+        or None if there is no caching subsystem.
+        """
+        cache = self.metadata_inheritance_cache_subsystem
+        if cache is None:
+            return None
+        key = self._metadata_inheritance_generation_key(course_id)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # the generation was never set, or evicted: start over from a random number, so that the
+            # trees cached at the former generations don't match the new ones
+            cache.add(key, random.getrandbits(48))
+            return cache.incr(key)
+
+    def _get_metadata_inheritance_tree_from_cache_subsystem(self, course_id):
+        """
+        Return the MetadataInheritanceIndex of the course stored in the caching subsystem (e.g. memcached),
+        or None if there is none or it's out of date, along with the current generation of the tree.
+        """
+        if self.metadata_inheritance_cache_subsystem is None:
+            logging.warning(
+                'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
+                OK in localdev and testing environment. Not OK in production.'
+            )
+            return None, None
+
+        generation_key = self._metadata_inheritance_generation_key(course_id)
+        cached = self.metadata_inheritance_cache_subsystem.get_many([unicode(course_id), generation_key])
+        generation = cached.get(generation_key)
+        if generation is None:
+            generation = self._next_metadata_inheritance_generation(course_id)
+        tree = cached.get(unicode(course_id))
+        # ignore trees cached in the format used before MetadataInheritanceIndex, and trees computed
+        # before the latest change of the inheritance of the course
+        if not isinstance(tree, MetadataInheritanceIndex) or tree.version != generation:
+            return None, generation
+        return tree, generation
+
+    def _set_request_cached_metadata_inheritance_tree(self, course_id, tree):
+        """
+        Store the metadata inheritance tree of the course in the request cache, if available.
+        """
         if self.request_cache is not None:
             # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
             # defined
@@ -582,7 +634,52 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
                 self.request_cache.data['metadata_inheritance'] = {}
             self.request_cache.data['metadata_inheritance'][unicode(course_id)] = tree
 
-        return tree
+    def _update_cached_metadata_inheritance_tree(self, xblock, payload):
+        """
+        Update the cached metadata inheritance tree of the course of `xblock` after the `payload` of
+        update_item() has been saved, without recomputing the tree from the whole course.
+
+        Only containers have an effect on inheritance, so nothing is done for other blocks. If no up to
+        date tree is cached, or if another process changed the inheritance of the course since the cached
+        tree was computed, the tree is computed from the db (which already reflects the update).
+        """
+        usage_key = xblock.scope_ids.usage_id
+        course_id = self.fill_in_run(usage_key.course_key.for_branch(None))
+        if self._is_bulk_write_in_progress(course_id) or not xblock.has_children:
+            return
+
+        if self.metadata_inheritance_cache_subsystem is not None:
+            # start from the most recent shared copy of the tree, so that concurrent updates by
+            # other processes are not discarded
+            tree, generation = self._get_metadata_inheritance_tree_from_cache_subsystem(course_id)
+            next_generation = self._next_metadata_inheritance_generation(course_id)
+            if generation is None or next_generation != generation + 1:
+                # another process changed the course after the tree was read
+                tree = None
+        else:
+            tree = None
+            next_generation = None
+            if self.request_cache is not None:
+                tree = self.request_cache.data.get('metadata_inheritance', {}).get(unicode(course_id))
+
+        if tree is None:
+            tree = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+        else:
+            inheritable_metadata = {
+                name: value for name, value in payload['metadata'].iteritems()
+                if name in InheritanceMixin.fields
+            }
+            tree.update_container(
+                as_published(usage_key).to_deprecated_string(),
+                inheritable_metadata,
+                payload['definition.children'],
+                next_generation
+            )
+            if self.metadata_inheritance_cache_subsystem is not None:
+                self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
+            self._set_request_cached_metadata_inheritance_tree(course_id, tree)
+
+        xblock.runtime.cached_metadata = tree
 
     def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None):
         """
@@ -1127,8 +1224,8 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
                 }
                 self._update_ancestors(xblock.scope_ids.usage_id, ancestor_payload)
 
-            # recompute (and update) the metadata inheritance tree which is cached
-            self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
+            # update the metadata inheritance tree which is cached
+            self._update_cached_metadata_inheritance_tree(xblock, payload)
             # fire signal that we've written to DB
         except ItemNotFoundError:
             if not allow_not_found:
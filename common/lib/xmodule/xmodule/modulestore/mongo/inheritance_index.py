@@ -0,0 +1,110 @@
+"""
+A compact index of the inheritable metadata of the blocks of an old-style
+mongo course.
+
+Rather than storing, for every block in the course, a full copy of the
+metadata that it inherits, the index only stores the inheritable fields that
+each container sets explicitly, along with a map from every block to its
+parent. The metadata inherited by a block is computed on first lookup by
+walking up its ancestors, and is shared with its siblings, and with any
+descendants of its parent that don't set inheritable fields themselves.
+
+The index can be updated in place when a container is edited, instead of
+being recomputed from the whole course.
+"""
+
+
+class MetadataInheritanceIndex(object):
+    """
+    The inheritable metadata of a course, indexed by the deprecated string of
+    each block's (published) location.
+
+    `version` is the generation of the cached index of the course the index
+    was computed or last updated at (see MongoModuleStore), so that an index
+    missing a more recent change of the course is not used.
+    """
+    def __init__(self, version=None):
+        self.version = version
+        # maps the url of each container to a tuple of (the inheritable
+        # metadata it sets, the set of the urls of its children)
+        self._containers = {}
+        # maps the url of every block that has a parent to the url of that parent
+        self._parents = {}
+        # memoized metadata to inherit by the children of each container;
+        # never pickled
+        self._inherited = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_inherited'] = {}
+        return state
+
+    def add_container(self, url, metadata, children):
+        """
+        Add the container `url`, which sets the inheritable `metadata` and has
+        the children whose urls are listed in `children`.
+        """
+        self._containers[url] = (metadata, set(children))
+        for child in children:
+            self._parents[child] = url
+
+    def update_container(self, url, metadata, children, version=None):
+        """
+        Record that the container `url` now sets the inheritable `metadata`,
+        and has the children listed in `children`.
+
+        Children which are no longer listed keep their parent: they may still
+        be children of the other revision (draft or published) of the
+        container, and removed blocks are dropped when the index is rebuilt.
+        Children which were just added to the container inherit from it.
+
+        `version` is the new version of the index.
+        """
+        old_children = self._containers.get(url, (None, set()))[1]
+        self._containers[url] = (metadata, old_children.union(children))
+        for child in children:
+            if child not in old_children:
+                self._parents[child] = url
+        self._inherited = {}
+        self.version = version
+
+    def _metadata_of(self, url):
+        """
+        Return the inheritable metadata that applies to the children of the
+        container `url`: its own, on top of what it inherits itself.
+        """
+        if url in self._inherited:
+            return self._inherited[url]
+
+        # find the closest ancestors whose metadata has not been computed yet
+        lineage = []
+        current = url
+        while current is not None and current not in self._inherited and current not in lineage:
+            lineage.append(current)
+            current = self._parents.get(current)
+        inherited = self._inherited.get(current, {})
+
+        for ancestor in reversed(lineage):
+            own_metadata = self._containers.get(ancestor, ({}, None))[0]
+            if own_metadata:
+                inherited = dict(inherited)
+                inherited.update(own_metadata)
+            self._inherited[ancestor] = inherited
+        return inherited
+
+    def get(self, url, default=None):
+        """
+        Return the metadata inherited by the block `url` as a dict of field
+        names to serialized values, or `default` if the block has no parent in
+        the index. The returned dict may be shared and must not be modified.
+        """
+        parent = self._parents.get(url)
+        if parent is None:
+            return default
+        return self._metadata_of(parent)
+
+    def __contains__(self, url):
+        return url in self._parents
+
+    def __len__(self):
+        return len(self._parents)
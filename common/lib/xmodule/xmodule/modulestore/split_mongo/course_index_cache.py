@@ -0,0 +1,188 @@
+"""
+Process-wide cache of the course index entries of the split modulestore.
+
+The course index maps each course to the heads of its branches, and is read on
+every lookup of a course by id. Entries are cached for a short time to live,
+and dropped as soon as the index of their course is changed by this process.
+
+Other processes learn about changes through an optional capped collection of
+course changes: every change to the course index is appended to it, and a
+thread of each process tails it to drop the entries of the changed courses.
+
+The edit counts of the structures looked up (see MongoConnection.get_structure)
+are cached along with the entries, for the same time to live, so that head
+structures updated in place are checked at most that often.
+"""
+import copy
+import logging
+import threading
+import time
+
+from pymongo.errors import CollectionInvalid
+
+log = logging.getLogger(__name__)
+
+# size in bytes of the capped collection of course changes
+COURSE_CHANGES_SIZE = 1024 * 1024
+
+# how long to wait before tailing the course changes again after an error
+COURSE_CHANGES_RETRY_DELAY = 5
+
+# how many structure edit counts are cached before dropping the expired ones
+MAX_EDIT_COUNTS = 10000
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_course_index_cache(name, ttl):
+    """
+    Return the process-wide CourseIndexCache named `name`, creating it on first use.
+    """
+    with _CACHES_LOCK:
+        if name not in _CACHES:
+            _CACHES[name] = CourseIndexCache(ttl)
+        return _CACHES[name]
+
+
+def _course_id(org, course, run):
+    """
+    Return the case insensitive identifier of a course, which all the cache keys for it share.
+    """
+    return (org.lower(), course.lower(), run.lower())
+
+
+def get_course_changes_collection(database, name):
+    """
+    Return the capped collection `name` of course changes, creating it if needed.
+    """
+    try:
+        return database.create_collection(name, capped=True, size=COURSE_CHANGES_SIZE)
+    except CollectionInvalid:
+        # already exists
+        return database[name]
+
+
+class CourseIndexCache(object):
+    """
+    A thread-safe cache of course index entries, which expire after `ttl` seconds.
+    """
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._edit_counts = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    @staticmethod
+    def key(org, course, run, ignore_case=False):
+        """
+        Return the key of the entry of a course, as looked up with or without `ignore_case`.
+        """
+        if ignore_case:
+            return _course_id(org, course, run) + (True,)
+        return (org, course, run, False)
+
+    def get(self, key):
+        """
+        Return a copy of the unexpired entry cached under `key`, or None.
+        """
+        with self._lock:
+            expires, index = self._entries.get(key, (0, None))
+            if expires < time.time():
+                index = None
+        if index is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # callers modify index entries before saving them
+        return copy.deepcopy(index)
+
+    def set(self, key, index):
+        """
+        Cache a copy of the course `index` under `key`.
+        """
+        index = copy.deepcopy(index)
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, index)
+
+    def get_edit_count(self, structure_id):
+        """
+        Return the unexpired edit count cached for the structure `structure_id`, or None.
+        """
+        with self._lock:
+            expires, edit_count = self._edit_counts.get(structure_id, (0, None))
+        if expires < time.time():
+            return None
+        return edit_count
+
+    def set_edit_count(self, structure_id, edit_count):
+        """
+        Cache the edit count of the structure `structure_id`.
+        """
+        now = time.time()
+        with self._lock:
+            if len(self._edit_counts) >= MAX_EDIT_COUNTS:
+                for key, (expires, __) in self._edit_counts.items():
+                    if expires < now:
+                        del self._edit_counts[key]
+            self._edit_counts[structure_id] = (now + self.ttl, edit_count)
+
+    def invalidate(self, org, course, run):
+        """
+        Drop all the entries of the given course, and the edit counts of the heads of its branches.
+        """
+        course_id = _course_id(org, course, run)
+        with self._lock:
+            for key in self._entries.keys():
+                if _course_id(*key[:3]) == course_id:
+                    __, index = self._entries.pop(key)
+                    for structure_id in index.get('versions', {}).itervalues():
+                        self._edit_counts.pop(structure_id, None)
+
+    def clear(self):
+        """
+        Drop all entries, and edit counts.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._edit_counts.clear()
+
+    def watch(self, course_changes):
+        """
+        Start tailing the capped collection `course_changes` in a daemon thread, to drop the entries of
+        the courses changed by other processes. Only the first call starts a thread.
+        """
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(
+                target=self._tail_course_changes, args=(course_changes,), name='course_changes'
+            )
+            self._watcher.daemon = True
+        self._watcher.start()
+
+    def _tail_course_changes(self, course_changes):
+        """
+        Drop the entries of courses as their changes are appended to `course_changes`. Runs forever.
+        """
+        query = None
+        while True:
+            try:
+                if query is None:
+                    # only the changes made from now on are of interest
+                    latest = list(course_changes.find().sort('$natural', -1).limit(1))
+                    query = {'_id': {'$gt': latest[0]['_id']}} if latest else {}
+                cursor = course_changes.find(query, tailable=True, await_data=True)
+                while cursor.alive:
+                    for change in cursor:
+                        query = {'_id': {'$gt': change['_id']}}
+                        self.invalidate(change['org'], change['course'], change['run'])
+                    time.sleep(0.1)
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Error while tailing the course changes; clearing the course index cache")
+                # changes may have been missed
+                self.clear()
+            time.sleep(COURSE_CHANGES_RETRY_DELAY)
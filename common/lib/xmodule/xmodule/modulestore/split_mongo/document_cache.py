@@ -0,0 +1,150 @@
+"""
+Process-wide caches of the documents of the split modulestore.
+
+Structures and definitions are never modified once a course has moved on to a
+new version, so they can be cached by id across requests and threads. The head
+structure of a branch can however be updated in place, which increments its
+`edit_count`: structures are cached under their id and edit count. Each
+cache is a size bounded LRU of the BSON encoding of the documents: every get
+decodes a fresh copy, so callers can modify the documents they get (as the
+modulestore does when versioning them) without affecting the cache. A second
+level cache shared between processes (e.g. memcached) can be given, which is
+looked up on misses of the in-process cache.
+"""
+from collections import OrderedDict
+import logging
+import threading
+
+from bson import BSON
+from bson.son import SON
+
+try:
+    from dogapi import dog_stats_api
+except ImportError:
+    dog_stats_api = None
+
+log = logging.getLogger(__name__)
+
+# default size, in bytes of BSON, of each process-wide cache
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_document_cache(name, max_bytes=DEFAULT_MAX_BYTES, second_level_cache=None):
+    """
+    Return the process-wide DocumentCache named `name`, creating it on first use.
+    """
+    with _CACHES_LOCK:
+        if name not in _CACHES:
+            _CACHES[name] = DocumentCache(name, max_bytes, second_level_cache)
+        return _CACHES[name]
+
+
+class DocumentCache(object):
+    """
+    A thread-safe LRU cache of mongo documents, bounded by the total size of
+    their BSON encoding.
+    """
+    def __init__(self, name, max_bytes, second_level_cache=None):
+        """
+        :param name: identifies the cache in metrics and in the keys of the second level cache
+        :param max_bytes: the maximum total size of the cached documents
+        :param second_level_cache: an optional cache with the django cache interface
+        """
+        self.name = name
+        self.max_bytes = max_bytes
+        self.second_level_cache = second_level_cache
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _second_level_key(self, kind, doc_id, edit_count):
+        """Return the key of a document in the second level cache."""
+        if edit_count:
+            return u"split_documents.{}.{}.{}.{}".format(self.name, kind, doc_id, edit_count)
+        return u"split_documents.{}.{}.{}".format(self.name, kind, doc_id)
+
+    def _record(self, outcome, kind, tier):
+        """Count a lookup in the statistics of the cache and in metrics."""
+        if outcome == 'hit':
+            self.hits += 1
+        else:
+            self.misses += 1
+        if dog_stats_api:
+            dog_stats_api.increment(
+                'split_mongo.document_cache.{}'.format(outcome),
+                tags=[u'cache:{}'.format(self.name), u'kind:{}'.format(kind), u'tier:{}'.format(tier)]
+            )
+
+    def get(self, kind, doc_id, tz_aware=True, edit_count=0):
+        """
+        Return a copy of the document of the given `kind` ('structures' or
+        'definitions'), `doc_id` and `edit_count`, or None if it isn't cached.
+        """
+        key = (kind, doc_id, edit_count)
+        with self._lock:
+            data = self._documents.pop(key, None)
+            if data is not None:
+                # re-insert as the most recently used
+                self._documents[key] = data
+
+        if data is not None:
+            self._record('hit', kind, 'process')
+        elif self.second_level_cache is not None:
+            try:
+                data = self.second_level_cache.get(self._second_level_key(kind, doc_id, edit_count))
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Failed to read %s %s from the second level cache", kind, doc_id)
+            if data is not None:
+                self._record('hit', kind, 'shared')
+                self._add(key, data)
+
+        if data is None:
+            self._record('miss', kind, 'all')
+            return None
+        return BSON(data).decode(as_class=SON, tz_aware=tz_aware)
+
+    def set(self, kind, document):
+        """
+        Cache `document`, of the given `kind`, under its `_id` and `edit_count`.
+        """
+        data = BSON.encode(document)
+        edit_count = document.get('edit_count', 0)
+        self._add((kind, document['_id'], edit_count), data)
+        if self.second_level_cache is not None:
+            try:
+                self.second_level_cache.set(self._second_level_key(kind, document['_id'], edit_count), data)
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Failed to write %s %s to the second level cache", kind, document['_id'])
+
+    def _add(self, key, data):
+        """
+        Add the BSON `data` to the in-process cache, evicting the least
+        recently used documents to stay within `max_bytes`.
+        """
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._documents.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous)
+            self._documents[key] = data
+            self.current_bytes += len(data)
+            while self.current_bytes > self.max_bytes:
+                _evicted_key, evicted = self._documents.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def clear(self):
+        """
+        Empty the in-process cache.
+        """
+        with self._lock:
+            self._documents.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._documents)
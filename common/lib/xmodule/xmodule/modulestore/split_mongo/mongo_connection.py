@@ -5,16 +5,35 @@ import re
 import pymongo
 from bson import son
 from xmodule.exceptions import HeartbeatFailure
+from xmodule.modulestore.split_mongo.document_cache import get_document_cache, DEFAULT_MAX_BYTES
+from xmodule.modulestore.split_mongo.course_index_cache import (
+    CourseIndexCache, get_course_index_cache, get_course_changes_collection
+)
 
 class MongoConnection(object):
     """
     Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
     """
     def __init__(
-        self, db, collection, host, port=27017, tz_aware=True, user=None, password=None, **kwargs
+        self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
+        document_cache_bytes=DEFAULT_MAX_BYTES, document_cache_subsystem=None,
+        course_index_cache_ttl=0, course_change_notifications=False, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        Structures and definitions are cached by id in a process-wide cache of at most
+        `document_cache_bytes`, shared by all the connections to the same collections, and in the
+        optional `document_cache_subsystem` (e.g. memcached). A size of 0 disables caching.
+
+        If `course_index_cache_ttl` is set, course index entries looked up by get_course_index are
+        cached in process for that many seconds, or until this process changes them, and so are the
+        edit counts of the structures looked up by get_structure. As the heads of branches may then
+        be stale, this is meant for stores which don't modify courses (e.g. in the LMS).
+
+        If `course_change_notifications` is set, every change to the course index is also recorded in
+        a capped collection, which processes caching the course index tail to learn about the changes
+        made by other processes.
         """
         self.database = pymongo.database.Database(
             pymongo.MongoClient(
@@ -42,6 +61,48 @@ class MongoConnection(object):
         self.structures.write_concern = {'w': 1}
         self.definitions.write_concern = {'w': 1}
 
+        self.tz_aware = tz_aware
+        if document_cache_bytes:
+            self.document_cache = get_document_cache(
+                u"{}.{}".format(db, collection), document_cache_bytes, document_cache_subsystem
+            )
+        else:
+            self.document_cache = None
+
+        if course_change_notifications:
+            self.course_changes = get_course_changes_collection(self.database, collection + '.course_changes')
+        else:
+            self.course_changes = None
+
+        if course_index_cache_ttl:
+            self.course_index_cache = get_course_index_cache(u"{}.{}".format(db, collection), course_index_cache_ttl)
+            if self.course_changes is not None:
+                self.course_index_cache.watch(self.course_changes)
+        else:
+            self.course_index_cache = None
+
+    def _get_cached(self, kind, key, edit_count=0):
+        """
+        Get the document of the given kind ('structures' or 'definitions') whose id is the given key
+        from the cache, or else from the db, caching it.
+        """
+        if self.document_cache is not None:
+            document = self.document_cache.get(kind, key, self.tz_aware, edit_count)
+            if document is not None:
+                return document
+
+        document = getattr(self, kind).find_one({'_id': key})
+        if document is not None:
+            self._cache(kind, document)
+        return document
+
+    def _cache(self, kind, document):
+        """
+        Cache the document of the given kind, if caching is enabled
+        """
+        if self.document_cache is not None:
+            self.document_cache.set(kind, document)
+
     def heartbeat(self):
         """
         Check that the db is reachable.
@@ -54,8 +115,30 @@ class MongoConnection(object):
     def get_structure(self, key):
         """
         Get the structure from the persistence mechanism whose id is the given key
+
+        As head structures can be updated in place (see update_structure), the edit count of the
+        structure is read from the db first, and only a cached copy with that edit count is used.
+        With a course index cache, the edit count is cached along with the course index entries,
+        so that it's only read from the db once per time to live.
         """
-        return self.structures.find_one({'_id': key})
+        if self.document_cache is None:
+            return self.structures.find_one({'_id': key})
+        edit_count = None
+        if self.course_index_cache is not None:
+            edit_count = self.course_index_cache.get_edit_count(key)
+        if edit_count is None:
+            current = self.structures.find_one({'_id': key}, fields=['edit_count'])
+            if current is None:
+                return None
+            edit_count = current.get('edit_count', 0)
+            if self.course_index_cache is not None:
+                self.course_index_cache.set_edit_count(key, edit_count)
+        structure = self._get_cached('structures', key, edit_count)
+        if self.course_index_cache is not None and structure is not None:
+            if structure.get('edit_count', 0) != edit_count:
+                # read from the db after being updated in place since its edit count was cached
+                self.course_index_cache.set_edit_count(key, structure.get('edit_count', 0))
+        return structure
 
     def find_matching_structures(self, query):
         """
@@ -69,24 +152,39 @@ class MongoConnection(object):
         Create the structure in the db
         """
         self.structures.insert(structure)
+        self._cache('structures', structure)
 
     def update_structure(self, structure):
         """
-        Update the db record for structure
+        Update the db record for structure, incrementing its edit count so that the copies cached
+        by other processes aren't used anymore
         """
+        structure['edit_count'] = structure.get('edit_count', 0) + 1
         self.structures.update({'_id': structure['_id']}, structure)
+        self._cache('structures', structure)
+        if self.course_index_cache is not None:
+            self.course_index_cache.set_edit_count(structure['_id'], structure['edit_count'])
 
     def get_course_index(self, key, ignore_case=False):
         """
         Get the course_index from the persistence mechanism whose id is the given key
         """
+        if self.course_index_cache is not None:
+            cache_key = CourseIndexCache.key(key.org, key.course, key.run, ignore_case)
+            course_index = self.course_index_cache.get(cache_key)
+            if course_index is not None:
+                return course_index
+
         case_regex = ur"(?i)^{}$" if ignore_case else ur"{}"
-        return self.course_index.find_one(
+        course_index = self.course_index.find_one(
             son.SON([
                 (key_attr, re.compile(case_regex.format(getattr(key, key_attr))))
                 for key_attr in ('org', 'course', 'run')
             ])
         )
+        if course_index is not None and self.course_index_cache is not None:
+            self.course_index_cache.set(cache_key, course_index)
+        return course_index
 
     def find_matching_course_indexes(self, query):
         """
@@ -100,6 +198,7 @@ class MongoConnection(object):
         Create the course_index in the db
         """
         self.course_index.insert(course_index)
+        self._course_index_changed(course_index)
 
     def update_course_index(self, course_index):
         """
@@ -109,22 +208,38 @@ class MongoConnection(object):
             son.SON([('org', course_index['org']), ('course', course_index['course']), ('run', course_index['run'])]),
             course_index
         )
+        self._course_index_changed(course_index)
 
     def delete_course_index(self, course_index):
         """
         Delete the course_index from the persistence mechanism whose id is the given course_index
         """
-        return self.course_index.remove(son.SON([
+        result = self.course_index.remove(son.SON([
             ('org', course_index['org']),
             ('course', course_index['course']),
             ('run', course_index['run'])
         ]))
+        self._course_index_changed(course_index)
+        return result
+
+    def _course_index_changed(self, course_index):
+        """
+        Drop the cached entries of the course of course_index, and notify other processes of the change
+        """
+        if self.course_index_cache is not None:
+            self.course_index_cache.invalidate(course_index['org'], course_index['course'], course_index['run'])
+        if self.course_changes is not None:
+            self.course_changes.insert(son.SON([
+                ('org', course_index['org']),
+                ('course', course_index['course']),
+                ('run', course_index['run']),
+            ]))
 
     def get_definition(self, key):
         """
         Get the definition from the persistence mechanism whose id is the given key
         """
-        return self.definitions.find_one({'_id': key})
+        return self._get_cached('definitions', key)
 
     def find_matching_definitions(self, query):
         """
@@ -138,5 +253,6 @@ class MongoConnection(object):
         Create the definition in the db
         """
         self.definitions.insert(definition)
+        self._cache('definitions', definition)
 
 
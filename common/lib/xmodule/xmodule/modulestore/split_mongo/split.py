@@ -50,6 +50,7 @@ Representation:
 """
 import threading
 import datetime
+from collections import OrderedDict
 import logging
 from importlib import import_module
 from path import path
@@ -74,6 +75,7 @@ from ..exceptions import ItemNotFoundError
 from .definition_lazy_loader import DefinitionLazyLoader
 from .caching_descriptor_system import CachingDescriptorSystem
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
+from xmodule.modulestore.split_mongo.document_cache import DEFAULT_MAX_BYTES
 from xmodule.error_module import ErrorDescriptor
 from xmodule.modulestore.split_mongo import encode_key_for_mongo, decode_key_from_mongo
 
@@ -114,22 +116,42 @@ class SplitMongoModuleStore(ModuleStoreWriteBase):
     # version) but those functions will have an optional arg for setting these.
     SEARCH_TARGET_DICT = ['wiki_slug']
 
+    # maximum number of course versions whose CachingDescriptorSystem each thread keeps
+    THREAD_CACHE_SIZE = 10
+
     def __init__(self, contentstore, doc_store_config, fs_root, render_template,
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None,
+                 document_cache_bytes=DEFAULT_MAX_BYTES,
+                 document_cache_subsystem=None,
+                 course_index_cache_ttl=0,
+                 course_change_notifications=False,
                  **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param document_cache_bytes: size of the process-wide cache of structures and definitions (0 to disable)
+        :param document_cache_subsystem: optional cache shared between processes (e.g. memcached) for
+            structures and definitions
+        :param course_index_cache_ttl: how many seconds to cache the heads of course branches in process
+            (0 to disable). Only meant for stores which don't modify courses, such as the LMS's.
+        :param course_change_notifications: whether to record changes to the heads of course branches
+            in a capped collection, which stores caching them tail to learn about new heads
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
 
-        self.db_connection = MongoConnection(**doc_store_config)
+        self.db_connection = MongoConnection(
+            document_cache_bytes=document_cache_bytes,
+            document_cache_subsystem=document_cache_subsystem,
+            course_index_cache_ttl=course_index_cache_ttl,
+            course_change_notifications=course_change_notifications,
+            **doc_store_config
+        )
         self.db = self.db_connection.database
 
-        # Code review question: How should I expire entries?
-        # _add_cache could use a lru mechanism to control the cache size?
+        # CachingDescriptorSystems of the most recently used course versions, per thread. The
+        # structures and definitions themselves are cached process-wide by the db_connection.
         self.thread_cache = threading.local()
 
         if default_class is not None:
@@ -157,6 +179,8 @@ class SplitMongoModuleStore(ModuleStoreWriteBase):
         # drop the assets
         super(SplitMongoModuleStore, self)._drop_database()
 
+        if self.db_connection.course_index_cache is not None:
+            self.db_connection.course_index_cache.clear()
         connection = self.db.connection
         connection.drop_database(self.db.name)
         connection.close()
@@ -252,9 +276,12 @@ class SplitMongoModuleStore(ModuleStoreWriteBase):
         :param course_version_guid:
         """
         if not hasattr(self.thread_cache, 'course_cache'):
-            self.thread_cache.course_cache = {}
-        system = self.thread_cache.course_cache
-        return system.get(course_version_guid)
+            self.thread_cache.course_cache = OrderedDict()
+        system = self.thread_cache.course_cache.pop(course_version_guid, None)
+        if system is not None:
+            # re-insert as the most recently used
+            self.thread_cache.course_cache[course_version_guid] = system
+        return system
 
     def _add_cache(self, course_version_guid, system):
         """
@@ -263,8 +290,12 @@ class SplitMongoModuleStore(ModuleStoreWriteBase):
         :param system:
         """
         if not hasattr(self.thread_cache, 'course_cache'):
-            self.thread_cache.course_cache = {}
-        self.thread_cache.course_cache[course_version_guid] = system
+            self.thread_cache.course_cache = OrderedDict()
+        course_cache = self.thread_cache.course_cache
+        course_cache.pop(course_version_guid, None)
+        course_cache[course_version_guid] = system
+        while len(course_cache) > self.THREAD_CACHE_SIZE:
+            course_cache.popitem(last=False)
         return system
 
     def _clear_cache(self, course_version_guid=None):
@@ -278,7 +309,7 @@ class SplitMongoModuleStore(ModuleStoreWriteBase):
             except KeyError:
                 pass
         else:
-            self.thread_cache.course_cache = {}
+            self.thread_cache.course_cache = OrderedDict()
 
     def _lookup_course(self, course_locator):
         '''
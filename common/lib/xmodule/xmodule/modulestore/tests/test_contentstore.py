@@ -196,6 +196,28 @@ class TestContentstore(unittest.TestCase):
         __, count = self.contentstore.get_all_content_for_course(dest_course)
         self.assertEqual(count, len(self.course1_files))
 
+    def test_disk_cache(self):
+        """
+        Test that content is read from the disk cache, which forgets deleted assets
+        """
+        self.set_up_assets(False)
+        cache_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        contentstore = MongoContentStore(HOST, DB, port=PORT, disk_cache_dir=cache_dir)
+        asset_key = self.course1_key.make_asset_key('asset', self.course1_files[1])
+        expected = self.contentstore.find(asset_key)
+
+        for __ in range(2):
+            content = contentstore.find(asset_key, as_stream=True)
+            self.assertEqual(''.join(content.stream_data()), expected.data)
+            content.close()
+            self.assertEqual(contentstore.find(asset_key).data, expected.data)
+        self.assertEqual((contentstore.disk_cache.hits, contentstore.disk_cache.misses), (3, 1))
+        self.assertEqual(contentstore.disk_cache.current_bytes, expected.length)
+
+        contentstore.delete(asset_key)
+        self.assertEqual(contentstore.disk_cache.current_bytes, 0)
+
     @ddt.data(True, False)
     def test_delete_assets(self, deprecated):
         """
@@ -64,6 +64,37 @@ class MemoryCache(object):
         """
         self._data[key] = value
 
+    def get_many(self, keys):
+        """
+        Get the keys that are set from the cache, as a dict.
+
+        Args:
+            keys: The keys to get.
+        """
+        return {key: self._data[key] for key in keys if key in self._data}
+
+    def add(self, key, value):
+        """
+        Set a key in the cache, unless it is already set.
+
+        Args:
+            key: The key to add.
+            value: The value to set the key to.
+        """
+        self._data.setdefault(key, value)
+
+    def incr(self, key):
+        """
+        Increment the number stored in a key, raising a ValueError if it isn't set.
+
+        Args:
+            key: The key to increment.
+        """
+        if key not in self._data:
+            raise ValueError("Key '{}' not found".format(key))
+        self._data[key] += 1
+        return self._data[key]
+
 
 class MongoModulestoreBuilder(object):
     """
@@ -0,0 +1,62 @@
+"""
+Tests for the MetadataInheritanceIndex used by the mongo modulestore.
+"""
+import pickle
+from unittest import TestCase
+
+from xmodule.modulestore.mongo.inheritance_index import MetadataInheritanceIndex
+
+COURSE = 'i4x://org/course/course/run'
+CHAPTER = 'i4x://org/course/chapter/chapter'
+SEQUENTIAL = 'i4x://org/course/sequential/sequential'
+VERTICAL = 'i4x://org/course/vertical/vertical'
+PROBLEM = 'i4x://org/course/problem/problem'
+HTML = 'i4x://org/course/html/html'
+
+
+class TestMetadataInheritanceIndex(TestCase):
+    """
+    Tests for MetadataInheritanceIndex.
+    """
+    def setUp(self):
+        super(TestMetadataInheritanceIndex, self).setUp()
+        self.index = MetadataInheritanceIndex(version=1)
+        self.index.add_container(COURSE, {'graceperiod': '1 day', 'due': 'course due'}, [CHAPTER])
+        self.index.add_container(CHAPTER, {}, [SEQUENTIAL])
+        self.index.add_container(SEQUENTIAL, {'due': 'sequential due'}, [VERTICAL])
+        self.index.add_container(VERTICAL, {}, [PROBLEM, HTML])
+
+    def test_inherited_metadata(self):
+        self.assertEqual(self.index.get(CHAPTER), {'graceperiod': '1 day', 'due': 'course due'})
+        self.assertEqual(self.index.get(PROBLEM), {'graceperiod': '1 day', 'due': 'sequential due'})
+        self.assertIsNone(self.index.get(COURSE))
+        self.assertEqual(self.index.get('i4x://org/course/problem/orphan', {}), {})
+
+    def test_metadata_is_shared(self):
+        # blocks whose ancestors don't set anything share the same dict
+        self.assertIs(self.index.get(PROBLEM), self.index.get(HTML))
+        self.assertIs(self.index.get(PROBLEM), self.index.get(VERTICAL))
+        self.assertIs(self.index.get(SEQUENTIAL), self.index.get(CHAPTER))
+
+    def test_update_container(self):
+        self.index.get(PROBLEM)
+        self.index.update_container(VERTICAL, {'due': 'vertical due'}, [PROBLEM], version=2)
+        self.assertEqual(self.index.version, 2)
+        self.assertEqual(self.index.get(PROBLEM), {'graceperiod': '1 day', 'due': 'vertical due'})
+        # the child that was removed from the container keeps its parent until the index is rebuilt
+        self.assertEqual(self.index.get(HTML), {'graceperiod': '1 day', 'due': 'vertical due'})
+
+    def test_move_child(self):
+        new_vertical = 'i4x://org/course/vertical/new_vertical'
+        self.index.update_container(CHAPTER, {'due': 'chapter due'}, [SEQUENTIAL, new_vertical])
+        self.index.update_container(new_vertical, {}, [HTML])
+        self.index.update_container(VERTICAL, {}, [PROBLEM])
+        self.assertEqual(self.index.get(HTML), {'graceperiod': '1 day', 'due': 'chapter due'})
+        self.assertEqual(self.index.get(PROBLEM), {'graceperiod': '1 day', 'due': 'sequential due'})
+
+    def test_pickle(self):
+        self.index.get(PROBLEM)
+        unpickled = pickle.loads(pickle.dumps(self.index))
+        self.assertEqual(unpickled._inherited, {})  # pylint: disable=protected-access
+        self.assertEqual(unpickled.version, 1)
+        self.assertEqual(unpickled.get(PROBLEM), self.index.get(PROBLEM))
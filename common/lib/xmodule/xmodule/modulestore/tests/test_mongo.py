@@ -38,6 +38,7 @@ from git.test.lib.asserts import assert_not_none
 from xmodule.x_module import XModuleMixin
 from xmodule.modulestore.mongo.base import as_draft
 from xmodule.modulestore.tests.factories import check_mongo_calls
+from xmodule.modulestore.tests.test_cross_modulestore_import_export import MemoryCache
 
 
 log = logging.getLogger(__name__)
@@ -757,6 +758,26 @@ class TestMongoModuleStore(unittest.TestCase):
         self.assertTrue(self.draft_store.has_changes(parent_location))
         self.assertTrue(self.draft_store.has_changes(child_location))
 
+    def test_metadata_inheritance_generation(self):
+        """
+        Test that a cached metadata inheritance tree is dropped once another process changes the course.
+        """
+        course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        self.draft_store.metadata_inheritance_cache_subsystem = MemoryCache()
+        try:
+            tree = self.draft_store._get_cached_metadata_inheritance_tree(course_key)
+            cached_tree, generation = self.draft_store._get_metadata_inheritance_tree_from_cache_subsystem(course_key)
+            self.assertIs(cached_tree, tree)
+            self.assertEqual(tree.version, generation)
+
+            # another process changes the inheritance of the course
+            self.draft_store._next_metadata_inheritance_generation(course_key)
+            cached_tree, generation = self.draft_store._get_metadata_inheritance_tree_from_cache_subsystem(course_key)
+            self.assertIsNone(cached_tree)
+            self.assertEqual(generation, tree.version + 1)
+        finally:
+            self.draft_store.metadata_inheritance_cache_subsystem = None
+
     def test_update_edit_info_ancestors(self):
         """
         Tests that edited_on, edited_by, subtree_edited_on, and subtree_edited_by are set correctly during update
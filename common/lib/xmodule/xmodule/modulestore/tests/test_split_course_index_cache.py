@@ -0,0 +1,74 @@
+"""
+Tests for the in-process cache of the split modulestore's course index.
+"""
+from unittest import TestCase
+
+from xmodule.modulestore.split_mongo.course_index_cache import CourseIndexCache
+
+
+def make_index(org='testx', course='GreekHero', run='run', head='head'):
+    """
+    Return a course index entry.
+    """
+    return {'org': org, 'course': course, 'run': run, 'versions': {'draft': head}}
+
+
+class TestCourseIndexCache(TestCase):
+    """
+    Tests for CourseIndexCache.
+    """
+    def test_get_returns_copies(self):
+        cache = CourseIndexCache(60)
+        key = CourseIndexCache.key('testx', 'GreekHero', 'run')
+        cache.set(key, make_index())
+
+        cached = cache.get(key)
+        self.assertEqual(cached, make_index())
+        cached['versions']['draft'] = 'new head'
+        self.assertEqual(cache.get(key), make_index())
+        self.assertEqual((cache.hits, cache.misses), (2, 0))
+
+    def test_expiry(self):
+        cache = CourseIndexCache(-1)
+        key = CourseIndexCache.key('testx', 'GreekHero', 'run')
+        cache.set(key, make_index())
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.misses, 1)
+
+    def test_ignore_case(self):
+        cache = CourseIndexCache(60)
+        cache.set(CourseIndexCache.key('testx', 'GreekHero', 'run', ignore_case=True), make_index())
+        self.assertIsNotNone(cache.get(CourseIndexCache.key('TestX', 'greekhero', 'RUN', ignore_case=True)))
+        self.assertIsNone(cache.get(CourseIndexCache.key('TestX', 'greekhero', 'RUN')))
+
+    def test_edit_counts(self):
+        cache = CourseIndexCache(60)
+        self.assertIsNone(cache.get_edit_count('head'))
+        cache.set_edit_count('head', 0)
+        self.assertEqual(cache.get_edit_count('head'), 0)
+        cache.set_edit_count('head', 2)
+        self.assertEqual(cache.get_edit_count('head'), 2)
+        cache.clear()
+        self.assertIsNone(cache.get_edit_count('head'))
+
+        expired_cache = CourseIndexCache(-1)
+        expired_cache.set_edit_count('head', 1)
+        self.assertIsNone(expired_cache.get_edit_count('head'))
+
+    def test_invalidate(self):
+        cache = CourseIndexCache(60)
+        keys = [
+            CourseIndexCache.key('testx', 'GreekHero', 'run'),
+            CourseIndexCache.key('testx', 'GreekHero', 'run', ignore_case=True),
+        ]
+        other_key = CourseIndexCache.key('testx', 'wonderful', 'run')
+        for key in keys:
+            cache.set(key, make_index())
+        cache.set(other_key, make_index(course='wonderful'))
+
+        cache.set_edit_count('head', 1)
+        cache.invalidate('TESTX', 'greekhero', 'run')
+        for key in keys:
+            self.assertIsNone(cache.get(key))
+        self.assertIsNotNone(cache.get(other_key))
+        self.assertIsNone(cache.get_edit_count('head'))
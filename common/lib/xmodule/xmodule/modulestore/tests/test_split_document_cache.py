@@ -0,0 +1,110 @@
+"""
+Tests for the process-wide cache of split modulestore documents.
+"""
+import datetime
+from unittest import TestCase
+
+from bson import BSON
+from bson.objectid import ObjectId
+from pytz import UTC
+
+from xmodule.modulestore.split_mongo.document_cache import DocumentCache
+
+
+class DictCache(object):
+    """
+    Stands in for a second level cache (e.g. memcached).
+    """
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key, default=None):
+        """Get a key from the cache."""
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        """Set a key in the cache."""
+        self.data[key] = value
+
+
+def make_structure(num_blocks=1):
+    """
+    Return a structure-like document with `num_blocks` blocks.
+    """
+    return {
+        '_id': ObjectId(),
+        'root': 'course',
+        'blocks': {
+            'block{}'.format(index): {'fields': {'display_name': 'Block {}'.format(index)}}
+            for index in range(num_blocks)
+        },
+        'edited_on': datetime.datetime(2014, 1, 1, tzinfo=UTC),
+    }
+
+
+class TestDocumentCache(TestCase):
+    """
+    Tests for DocumentCache.
+    """
+    def test_get_returns_copies(self):
+        cache = DocumentCache('test', 1024 * 1024)
+        structure = make_structure()
+        cache.set('structures', structure)
+
+        cached = cache.get('structures', structure['_id'])
+        self.assertEqual(cached, structure)
+        cached['blocks']['block0']['fields']['display_name'] = 'Changed'
+        self.assertEqual(
+            cache.get('structures', structure['_id'])['blocks']['block0']['fields']['display_name'],
+            'Block 0'
+        )
+        self.assertEqual((cache.hits, cache.misses), (2, 0))
+
+    def test_miss(self):
+        cache = DocumentCache('test', 1024 * 1024)
+        self.assertIsNone(cache.get('structures', ObjectId()))
+        self.assertIsNone(cache.get('definitions', ObjectId()))
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_lru_eviction(self):
+        first, second, third = make_structure(), make_structure(), make_structure()
+        cache = DocumentCache('test', 0)
+        cache.set('structures', first)
+        # no single document fits
+        self.assertEqual(len(cache), 0)
+
+        # room for two documents
+        cache.max_bytes = len(BSON.encode(first)) + len(BSON.encode(second))
+        cache.set('structures', first)
+        cache.set('structures', second)
+        # use first, so that second is the least recently used
+        cache.get('structures', first['_id'])
+        cache.set('structures', third)
+
+        self.assertIsNotNone(cache.get('structures', first['_id']))
+        self.assertIsNone(cache.get('structures', second['_id']))
+        self.assertIsNotNone(cache.get('structures', third['_id']))
+        self.assertLessEqual(cache.current_bytes, cache.max_bytes)
+
+    def test_second_level_cache(self):
+        shared = DictCache()
+        structure = make_structure()
+        DocumentCache('test', 1024 * 1024, shared).set('structures', structure)
+
+        # another process only finds it in the shared cache
+        cache = DocumentCache('test', 1024 * 1024, shared)
+        self.assertEqual(cache.get('structures', structure['_id']), structure)
+        self.assertEqual(len(cache), 1)
+
+    def test_edit_count(self):
+        cache = DocumentCache('test', 1024 * 1024)
+        structure = make_structure()
+        cache.set('structures', structure)
+
+        # the structure was updated in place by another process
+        self.assertIsNone(cache.get('structures', structure['_id'], edit_count=1))
+
+        structure['edit_count'] = 1
+        structure['root'] = 'updated'
+        cache.set('structures', structure)
+        self.assertEqual(cache.get('structures', structure['_id'], edit_count=1)['root'], 'updated')
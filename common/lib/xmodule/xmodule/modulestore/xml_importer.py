@@ -2,15 +2,20 @@ import logging
 import os
 import mimetypes
 from path import path
+import hashlib
+import itertools
 import json
 import re
+import sys
+import threading
+from multiprocessing.pool import ThreadPool
 
 from .xml import XMLModuleStore, ImportSystem, ParentTracker
 from xblock.runtime import KvsFieldData, DictKeyValueStore
 from xmodule.x_module import XModuleDescriptor
 from opaque_keys.edx.keys import UsageKey
 from xblock.fields import Scope, Reference, ReferenceList, ReferenceValueDict
-from xmodule.contentstore.content import StaticContent
+from xmodule.contentstore.content import StaticContent, STREAM_DATA_CHUNK_SIZE
 from .inheritance import own_metadata
 from xmodule.errortracker import make_error_tracker
 from .store_utilities import rewrite_nonportable_content_links
@@ -24,9 +29,69 @@ from xmodule.modulestore import ModuleStoreEnum
 log = logging.getLogger(__name__)
 
 
+# how many files of static content are uploaded at once
+STATIC_IMPORT_WORKERS = 4
+
+# the attributes of assets updated in place when their content didn't change
+STATIC_CONTENT_ATTRS = ('displayname', 'contentType', 'locked', 'import_path')
+
+
+def _read_chunks(file_path):
+    """
+    Yield the content of the file at `file_path`, in chunks.
+    """
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(STREAM_DATA_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _file_md5(file_path):
+    """
+    Return the md5 hex digest of the content of the file at `file_path`.
+    """
+    md5 = hashlib.md5()
+    for chunk in _read_chunks(file_path):
+        md5.update(chunk)
+    return md5.hexdigest()
+
+
+def _generate_thumbnail(static_content_store, content, content_path):
+    """
+    Save a thumbnail of the asset `content`, generated from the file at
+    `content_path`, and point the asset at it.
+    """
+    thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(
+        content, tempfile_path=content_path
+    )
+    if thumbnail_content is None:
+        return
+    try:
+        static_content_store.set_attr(
+            content.location, 'thumbnail_location', thumbnail_location.to_deprecated_list_repr()
+        )
+    except Exception:  # pylint: disable=broad-except
+        log.exception(u'Error setting the thumbnail of {0}'.format(content.location))
+
+
 def import_static_content(
         course_data_path, static_content_store,
-        target_course_id, subpath='static', verbose=False):
+        target_course_id, subpath='static', verbose=False, progress=None,
+        workers=STATIC_IMPORT_WORKERS):
+    """
+    Import the files of the `subpath` directory of `course_data_path` into
+    `static_content_store`, as assets of `target_course_id`.
+
+    The files are streamed from disk by `workers` threads, and the files whose
+    content is the same as that of the existing asset (comparing md5 digests)
+    aren't uploaded again. The thumbnails of images are generated by another
+    thread, once the images are uploaded.
+
+    If given, `progress` is called with the numbers of files processed so far
+    and of all the files, as they are imported.
+    """
 
     remap_dict = {}
 
@@ -46,54 +111,80 @@ def import_static_content(
     mimetypes.add_type('application/octet-stream', '.srt')
     mimetypes_list = mimetypes.types_map.values()
 
-    for dirname, _, filenames in os.walk(static_dir):
-        for filename in filenames:
+    # the assets already in the store, to skip the files which didn't change
+    existing_assets = dict(
+        (asset['asset_key'].name, asset)
+        for asset in static_content_store.get_all_content_for_course(target_course_id)[0]
+    )
 
-            content_path = os.path.join(dirname, filename)
+    # walk the directory first, to know how many files there are
+    static_files = [
+        os.path.join(dirname, filename)
+        for dirname, _, filenames in os.walk(static_dir)
+        for filename in filenames
+    ]
 
-            if re.match(ASSET_IGNORE_REGEX, filename):
-                if verbose:
-                    log.debug('skipping static content %s...', content_path)
-                continue
+    # thumbnails are generated in the background, while the files are uploaded
+    thumbnail_pool = ThreadPool(1)
+
+    def _import_file(content_path):
+        """
+        Import the file at `content_path`, returning the path of the asset
+        in the course and its key, or None if the file is skipped.
+        """
+        filename = os.path.basename(content_path)
 
+        if re.match(ASSET_IGNORE_REGEX, filename):
             if verbose:
-                log.debug('importing static content %s...', content_path)
+                log.debug('skipping static content %s...', content_path)
+            return None
+
+        try:
+            # make sure the file can be read, before streaming it
+            open(content_path, 'rb').close()
+        except IOError:
+            if filename.startswith('._'):
+                # OS X "companion files". See
+                # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
+                return None
+            # Not a 'hidden file', then re-raise exception
+            raise
+
+        # strip away leading path from the name
+        fullname_with_subpath = content_path.replace(static_dir, '')
+        if fullname_with_subpath.startswith('/'):
+            fullname_with_subpath = fullname_with_subpath[1:]
+        asset_key = StaticContent.compute_location(target_course_id, fullname_with_subpath)
+
+        policy_ele = policy.get(asset_key.path, {})
+        displayname = policy_ele.get('displayname', filename)
+        locked = policy_ele.get('locked', False)
+        mime_type = policy_ele.get('contentType')
+
+        # Check extracted contentType in list of all valid mimetypes
+        if not mime_type or mime_type not in mimetypes_list:
+            mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
+        content = StaticContent(
+            asset_key, displayname, mime_type, _read_chunks(content_path),
+            import_path=fullname_with_subpath, locked=locked
+        )
+        is_image = mime_type is not None and mime_type.split('/')[0] == 'image'
 
-            try:
-                with open(content_path, 'rb') as f:
-                    data = f.read()
-            except IOError:
-                if filename.startswith('._'):
-                    # OS X "companion files". See
-                    # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
-                    continue
-                # Not a 'hidden file', then re-raise exception
-                raise
-
-            # strip away leading path from the name
-            fullname_with_subpath = content_path.replace(static_dir, '')
-            if fullname_with_subpath.startswith('/'):
-                fullname_with_subpath = fullname_with_subpath[1:]
-            asset_key = StaticContent.compute_location(target_course_id, fullname_with_subpath)
-
-            policy_ele = policy.get(asset_key.path, {})
-            displayname = policy_ele.get('displayname', filename)
-            locked = policy_ele.get('locked', False)
-            mime_type = policy_ele.get('contentType')
-
-            # Check extracted contentType in list of all valid mimetypes
-            if not mime_type or mime_type not in mimetypes_list:
-                mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
-            content = StaticContent(
-                asset_key, displayname, mime_type, data,
-                import_path=fullname_with_subpath, locked=locked
+        existing = existing_assets.get(asset_key.name)
+        if existing is not None and existing.get('md5') == _file_md5(content_path):
+            if verbose:
+                log.debug('static content %s is unchanged...', content_path)
+            attrs = dict(zip(STATIC_CONTENT_ATTRS, (displayname, mime_type, locked, fullname_with_subpath)))
+            changed_attrs = dict(
+                (attr, value) for attr, value in attrs.iteritems() if existing.get(attr) != value
             )
-
-            # first let's save a thumbnail so we can get back a thumbnail location
-            thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
-
-            if thumbnail_content is not None:
-                content.thumbnail_location = thumbnail_location
+            if changed_attrs:
+                static_content_store.set_attrs(asset_key, changed_attrs)
+            if is_image and not existing.get('thumbnail_location'):
+                thumbnail_pool.apply_async(_generate_thumbnail, (static_content_store, content, content_path))
+        else:
+            if verbose:
+                log.debug('importing static content %s...', content_path)
 
             # then commit the content
             try:
@@ -102,20 +193,136 @@ def import_static_content(
                 log.exception(u'Error importing {0}, error={1}'.format(
                     fullname_with_subpath, err
                 ))
+            else:
+                if is_image:
+                    thumbnail_pool.apply_async(_generate_thumbnail, (static_content_store, content, content_path))
+
+        # store the remapping information which will be needed
+        # to subsitute in the module data
+        return fullname_with_subpath, asset_key
 
-            # store the remapping information which will be needed
-            # to subsitute in the module data
-            remap_dict[fullname_with_subpath] = asset_key
+    total = len(static_files)
+    if progress is not None:
+        progress(0, total)
+
+    pool = ThreadPool(workers) if workers > 1 else None
+    try:
+        if pool is not None:
+            results = pool.imap_unordered(_import_file, static_files)
+        else:
+            results = itertools.imap(_import_file, static_files)
+
+        for done, result in enumerate(results, 1):
+            if result is not None:
+                fullname_with_subpath, asset_key = result
+                remap_dict[fullname_with_subpath] = asset_key
+            if progress is not None:
+                progress(done, total)
+    except Exception:
+        if pool is not None:
+            pool.terminate()
+        thumbnail_pool.terminate()
+        raise
+
+    if pool is not None:
+        pool.close()
+        pool.join()
+    # wait for the thumbnails, as the files are about to be deleted
+    thumbnail_pool.close()
+    thumbnail_pool.join()
 
     return remap_dict
 
 
+class _StaticImportStopped(Exception):
+    """
+    Raised to stop a _StaticContentImport.
+    """
+    pass
+
+
+class _StaticContentImport(threading.Thread):
+    """
+    The import of the static content of a course from several subdirectories,
+    which can run in a thread of its own, alongside the import of the modules.
+
+    The numbers of files imported so far and of files to import are in `done`
+    and `total`, and the exception raised by the import, if any, is re-raised
+    by `finish`. `progress`, if given, is called with the counts as files are
+    imported, so only when the import runs in the calling thread.
+    """
+    def __init__(self, course_data_path, static_content_store, target_course_id, subpaths,
+                 verbose=False, progress=None):
+        super(_StaticContentImport, self).__init__(name='import_static_content')
+        self.daemon = True
+        self.course_data_path = course_data_path
+        self.static_content_store = static_content_store
+        self.target_course_id = target_course_id
+        self.subpaths = subpaths
+        self.verbose = verbose
+        self.progress = progress
+        self.done = 0
+        self.total = 0
+        self._exc_info = None
+        self._stopped = threading.Event()
+
+    def run(self):
+        try:
+            for subpath in self.subpaths:
+                self._import(subpath)
+        except _StaticImportStopped:
+            pass
+        except Exception:  # pylint: disable=broad-except
+            self._exc_info = sys.exc_info()
+
+    def _import(self, subpath):
+        """
+        Import the static content of `subpath`, keeping count of the files.
+        """
+        done_before, total_before = self.done, self.total
+
+        def _progress(done, total):
+            if self._stopped.is_set():
+                raise _StaticImportStopped()
+            self.done = done_before + done
+            self.total = total_before + total
+            if self.progress is not None:
+                self.progress('static', self.done, self.total)
+
+        import_static_content(
+            self.course_data_path, self.static_content_store,
+            self.target_course_id, subpath=subpath, verbose=self.verbose,
+            progress=_progress
+        )
+
+    def stop(self):
+        """
+        Stop importing files, if the import is running in its own thread.
+        """
+        self._stopped.set()
+
+    def finish(self, progress=None, interval=1.0):
+        """
+        Wait for the import to finish, calling `progress` with its counts
+        every `interval` seconds, and re-raise its exception if it failed.
+        """
+        while self.is_alive():
+            if progress is not None:
+                progress('static', self.done, self.total)
+            self.join(interval)
+        if progress is not None:
+            progress('static', self.done, self.total)
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+
+
 def import_from_xml(
         store, user_id, data_dir, course_dirs=None,
         default_class='xmodule.raw_module.RawDescriptor',
         load_error_modules=True, static_content_store=None,
         target_course_id=None, verbose=False,
-        do_import_static=True, create_new_course_if_not_present=False):
+        do_import_static=True, create_new_course_if_not_present=False,
+        progress=None, parallel_static=False):
     """
     Import the specified xml data_dir into the "store" modulestore,
     using org and course as the location org and course.
@@ -140,6 +347,16 @@ def import_from_xml(
     : create_new_course_if_not_present:
         If True, then a new course is created if it doesn't already exist.
         The check for existing courses is case-insensitive.
+
+    :param progress:
+        If given, called with the name of a stage of the import ('static',
+        'modules' or 'drafts'), and the numbers of items of the stage imported
+        so far and of all the items of the stage, as the import progresses.
+        It can raise an exception to abort the import.
+
+    :param parallel_static:
+        If True, the static content is imported in a thread of its own, while
+        the modules are imported.
     """
 
     xml_module_store = XMLModuleStore(
@@ -257,12 +474,10 @@ def import_from_xml(
                 # TODO: shouldn't this raise an exception if course wasn't found?
 
                 # then import all the static content
+                static_subpaths = []
                 if static_content_store is not None and do_import_static:
                     # first pass to find everything in /static/
-                    import_static_content(
-                        course_data_path, static_content_store,
-                        dest_course_id, subpath='static', verbose=verbose
-                    )
+                    static_subpaths.append('static')
 
                 elif verbose and not do_import_static:
                     log.debug(
@@ -282,47 +497,98 @@ def import_from_xml(
 
                 simport = 'static_import'
                 if os.path.exists(course_data_path / simport):
-                    import_static_content(
-                        course_data_path, static_content_store,
-                        dest_course_id, subpath=simport, verbose=verbose
+                    static_subpaths.append(simport)
+
+                static_import = _StaticContentImport(
+                    course_data_path, static_content_store,
+                    dest_course_id, static_subpaths, verbose=verbose,
+                    progress=None if parallel_static else progress
+                )
+                if parallel_static:
+                    static_import.start()
+                else:
+                    static_import.run()
+                    static_import.finish()
+
+                try:
+                    _import_course_modules(
+                        xml_module_store, store, user_id, course_data_path,
+                        course_key, dest_course_id, course,
+                        do_import_static, verbose, progress, static_import
                     )
+                    static_import.finish(progress)
+                except Exception:
+                    # don't leave the static content import running, e.g. when
+                    # `progress` cancels the import while waiting for it
+                    if parallel_static:
+                        static_import.stop()
+                        static_import.join()
+                    raise
 
-                # now loop through all the modules
-                for module in xml_module_store.modules[course_key].itervalues():
-                    if module.scope_ids.block_type == 'course':
-                        # we've already saved the course module up at the top
-                        # of the loop so just skip over it in the inner loop
-                        continue
+    return xml_module_store, course_items
 
-                    if verbose:
-                        log.debug('importing module location {loc}'.format(
-                            loc=module.location
-                        ))
 
-                    _import_module_and_update_references(
-                        module, store,
-                        user_id,
-                        course_key,
-                        dest_course_id,
-                        do_import_static=do_import_static,
-                        runtime=course.runtime
-                    )
+def _import_course_modules(
+        xml_module_store, store, user_id, course_data_path,
+        source_course_id, dest_course_id, course,
+        do_import_static, verbose, progress, static_import):
+    """
+    Import the modules of the course other than the course module, publish
+    them, and import the drafts of the course (see import_from_xml).
 
-                # finally, publish the course
-                store.publish(course.location, user_id)
-
-                # now import any DRAFT items
-                _import_course_draft(
-                    xml_module_store,
-                    store,
-                    user_id,
-                    course_data_path,
-                    course_key,
-                    dest_course_id,
-                    course.runtime
-                )
+    `progress` is also called with the counts of `static_import`, as it may
+    run in its own thread.
+    """
+    def _progress(stage, done, total):
+        if progress is not None:
+            progress(stage, done, total)
+            if static_import.is_alive():
+                progress('static', static_import.done, static_import.total)
+
+    modules = xml_module_store.modules[source_course_id]
+    # the course module was imported first
+    done = 1
+
+    # now loop through all the modules
+    for module in modules.itervalues():
+        if module.scope_ids.block_type == 'course':
+            # we've already saved the course module up at the top
+            # of the loop so just skip over it in the inner loop
+            continue
+
+        _progress('modules', done, len(modules))
+        done += 1
+
+        if verbose:
+            log.debug('importing module location {loc}'.format(
+                loc=module.location
+            ))
+
+        _import_module_and_update_references(
+            module, store,
+            user_id,
+            source_course_id,
+            dest_course_id,
+            do_import_static=do_import_static,
+            runtime=course.runtime
+        )
 
-    return xml_module_store, course_items
+    _progress('modules', len(modules), len(modules))
+
+    # finally, publish the course
+    store.publish(course.location, user_id)
+
+    # now import any DRAFT items
+    _import_course_draft(
+        xml_module_store,
+        store,
+        user_id,
+        course_data_path,
+        source_course_id,
+        dest_course_id,
+        course.runtime,
+        progress=_progress
+    )
 
 
 def _import_module_and_update_references(
@@ -400,7 +666,8 @@ def _import_course_draft(
         course_data_path,
         source_course_id,
         target_course_id,
-        mongo_runtime
+        mongo_runtime,
+        progress=None
 ):
     '''
     This will import all the content inside of the 'drafts' folder, if it exists
@@ -409,6 +676,9 @@ def _import_course_draft(
     Therefore, we need to use slightly different call points into
     the import process_xml as we can't simply call XMLModuleStore() constructor
     (like we do for importing public content)
+
+    If given, `progress` is called with 'drafts' and the numbers of draft
+    verticals imported so far and of all the draft verticals.
     '''
     draft_dir = course_data_path + "/drafts"
     if not os.path.exists(draft_dir):
@@ -506,8 +776,13 @@ def _import_course_draft(
                     logging.exception('Error while parsing course xml.')
 
         # For each index_in_children_list key, there is a list of vertical descriptors.
+        total = sum(len(descriptors) for descriptors in drafts.itervalues())
+        done = 0
         for key in sorted(drafts.iterkeys()):
             for descriptor in drafts[key]:
+                if progress is not None:
+                    progress('drafts', done, total)
+                done += 1
                 course_key = descriptor.location.course_key
                 try:
                     def _import_module(module):
@@ -553,6 +828,9 @@ def _import_course_draft(
                 except Exception:
                     logging.exception('There while importing draft descriptor %s', descriptor)
 
+        if progress is not None:
+            progress('drafts', total, total)
+
 
 def allowed_metadata_by_category(category):
     # should this be in the descriptors?!?
@@ -1,5 +1,5 @@
 import unittest
-from xmodule.contentstore.content import StaticContent
+from xmodule.contentstore.content import StaticContent, StaticContentStream, STREAM_DATA_CHUNK_SIZE
 from xmodule.contentstore.content import ContentStore
 from opaque_keys.edx.locations import SlashSeparatedCourseKey, AssetLocation
 
@@ -10,6 +10,26 @@ class Content:
         self.content_type = content_type
 
 
+class FakeGridFile(object):
+    """
+    A file of `length` bytes, computed rather than held in memory, which records the size of its reads.
+    """
+    def __init__(self, length):
+        self.length = length
+        self.position = 0
+        self.largest_read = 0
+
+    def seek(self, position):
+        self.position = position
+
+    def read(self, size):
+        size = max(min(size, self.length - self.position), 0)
+        self.largest_read = max(self.largest_read, size)
+        data = ''.join(chr((self.position + offset) % 256) for offset in xrange(size))
+        self.position += size
+        return data
+
+
 class ContentTest(unittest.TestCase):
     def test_thumbnail_none(self):
         # We had a bug where a thumbnail location of None was getting transformed into a Location tuple, with
@@ -46,3 +66,19 @@ class ContentTest(unittest.TestCase):
             AssetLocation(u'foo', u'bar', None, u'asset', u'images_course_image.jpg', None),
             asset_location
         )
+
+    def test_stream_data_in_range(self):
+        content = StaticContent('loc', 'name', 'content_type', 'abcdefgh', length=8)
+        self.assertEqual(''.join(content.stream_data_in_range(2, 4)), 'cde')
+
+        # a 100MB asset is streamed in bounded chunks, reading only the requested bytes
+        stream = FakeGridFile(100 * 1024 * 1024)
+        content = StaticContentStream('loc', 'name', 'content_type', stream, length=stream.length)
+        first_byte = 50 * 1024 * 1024 + 10
+        last_byte = first_byte + 3 * STREAM_DATA_CHUNK_SIZE
+        chunks = list(content.stream_data_in_range(first_byte, last_byte))
+        self.assertEqual(sum(len(chunk) for chunk in chunks), last_byte - first_byte + 1)
+        self.assertEqual(chunks[0][0], chr(first_byte % 256))
+        self.assertEqual(chunks[-1][-1], chr(last_byte % 256))
+        self.assertEqual(stream.largest_read, STREAM_DATA_CHUNK_SIZE)
+        self.assertEqual(stream.position, last_byte + 1)
@@ -0,0 +1,103 @@
+"""
+Tests for the disk cache of asset content.
+"""
+import hashlib
+import os
+import shutil
+from StringIO import StringIO
+from tempfile import mkdtemp
+import unittest
+
+from xmodule.contentstore.disk_cache import DiskContentCache
+
+
+def digest(data):
+    """
+    Returns the md5 hex digest of `data`.
+    """
+    return hashlib.md5(data).hexdigest()
+
+
+class DiskContentCacheTest(unittest.TestCase):
+    """
+    Tests for DiskContentCache.
+    """
+    def setUp(self):
+        super(DiskContentCacheTest, self).setUp()
+        self.directory = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def add(self, cache, data):
+        """
+        Adds `data` to `cache`, and returns what the cache returned.
+        """
+        cached_file = cache.add(digest(data), StringIO(data), len(data))
+        if cached_file is not None:
+            with cached_file:
+                return cached_file.read()
+        return None
+
+    def test_add_and_open(self):
+        cache = DiskContentCache(self.directory, 1000)
+        self.assertIsNone(cache.open(digest('content')))
+        self.assertEqual(self.add(cache, 'content'), 'content')
+        with cache.open(digest('content')) as cached_file:
+            self.assertEqual(cached_file.read(), 'content')
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.current_bytes, len('content'))
+
+        # another cache on the same directory sees it
+        self.assertEqual(DiskContentCache(self.directory, 1000).current_bytes, len('content'))
+
+    def test_not_cached(self):
+        cache = DiskContentCache(self.directory, 1000, max_file_bytes=10)
+        self.assertIsNone(self.add(cache, 'a' * 11))
+        # content which doesn't match its digest
+        self.assertIsNone(cache.add(digest('content'), StringIO('tampered'), len('tampered')))
+        self.assertIsNone(cache.open(digest('content')))
+        self.assertEqual(os.listdir(os.path.join(self.directory, digest('content')[:2])), [])
+        self.assertEqual(cache.current_bytes, 0)
+        with self.assertRaises(ValueError):
+            cache.open('../../etc/passwd')
+
+    def test_lru_eviction(self):
+        cache = DiskContentCache(self.directory, 20)
+        first, second, third = 'a' * 8, 'b' * 8, 'c' * 8
+        self.add(cache, first)
+        self.add(cache, second)
+        os.utime(cache._path(digest(first)), (1, 1))  # pylint: disable=protected-access
+        os.utime(cache._path(digest(second)), (2, 2))  # pylint: disable=protected-access
+        # use first, so that second is the least recently used
+        cache.open(digest(first)).close()
+        self.add(cache, third)
+
+        self.assertIsNotNone(cache.open(digest(first)))
+        self.assertIsNone(cache.open(digest(second)))
+        self.assertIsNotNone(cache.open(digest(third)))
+        self.assertEqual(cache.current_bytes, 16)
+
+    def test_eviction_low_water(self):
+        cache = DiskContentCache(self.directory, 100)
+        entries = [str(index) * 10 for index in range(10)]
+        for mtime, data in enumerate(entries):
+            self.add(cache, data)
+            os.utime(cache._path(digest(data)), (mtime, mtime))  # pylint: disable=protected-access
+        self.assertEqual(cache.current_bytes, 100)
+
+        # the cache is evicted down to 90% of its size, leaving room for the next addition
+        self.add(cache, 'a' * 10)
+        self.assertEqual(cache.current_bytes, 90)
+        self.assertIsNone(cache.open(digest(entries[0])))
+        self.assertIsNone(cache.open(digest(entries[1])))
+        self.add(cache, 'b' * 10)
+        self.assertEqual(cache.current_bytes, 100)
+        self.assertIsNotNone(cache.open(digest(entries[2])))
+
+    def test_remove(self):
+        cache = DiskContentCache(self.directory, 1000)
+        self.add(cache, 'content')
+        cache.remove(digest('content'))
+        self.assertIsNone(cache.open(digest('content')))
+        self.assertEqual(cache.current_bytes, 0)
+        # removing content which isn't cached is a noop
+        cache.remove(digest('content'))
@@ -1,6 +1,7 @@
 """
 Tests that check that we ignore the appropriate files when importing courses.
 """
+import hashlib
 import unittest
 from mock import Mock
 from xmodule.modulestore.xml_importer import import_static_content
@@ -15,9 +16,10 @@ class IgnoredFilesTestCase(unittest.TestCase):
         course_id = SlashSeparatedCourseKey("edX", "tilde", "Fall_2012")
         content_store = Mock()
         content_store.generate_thumbnail.return_value = ("content", "location")
+        content_store.get_all_content_for_course.return_value = ([], 0)
         import_static_content(course_dir, content_store, course_id)
         saved_static_content = [call[0][0] for call in content_store.save.call_args_list]
-        name_val = {sc.name: sc.data for sc in saved_static_content}
+        name_val = {sc.name: "".join(sc.data) for sc in saved_static_content}
         self.assertIn("example.txt", name_val)
         self.assertNotIn("example.txt~", name_val)
         self.assertIn("GREEN", name_val["example.txt"])
@@ -30,12 +32,36 @@ class IgnoredFilesTestCase(unittest.TestCase):
         course_id = SlashSeparatedCourseKey("edX", "dot-underscore", "2014_Fall")
         content_store = Mock()
         content_store.generate_thumbnail.return_value = ("content", "location")
+        content_store.get_all_content_for_course.return_value = ([], 0)
         import_static_content(course_dir, content_store, course_id)
         saved_static_content = [call[0][0] for call in content_store.save.call_args_list]
-        name_val = {sc.name: sc.data for sc in saved_static_content}
+        name_val = {sc.name: "".join(sc.data) for sc in saved_static_content}
         self.assertIn("example.txt", name_val)
         self.assertIn(".example.txt", name_val)
         self.assertNotIn("._example.txt", name_val)
         self.assertNotIn(".DS_Store", name_val)
         self.assertIn("GREEN", name_val["example.txt"])
         self.assertIn("BLUE", name_val[".example.txt"])
+
+    def test_unchanged_static_files(self):
+        """
+        Test that the files which didn't change aren't uploaded again
+        """
+        course_dir = DATA_DIR / "tilde"
+        course_id = SlashSeparatedCourseKey("edX", "tilde", "Fall_2012")
+        with open(course_dir / "static" / "example.txt", "rb") as example:
+            md5 = hashlib.md5(example.read()).hexdigest()
+        asset_key = course_id.make_asset_key("asset", "example.txt")
+        content_store = Mock()
+        content_store.get_all_content_for_course.return_value = ([{
+            "asset_key": asset_key,
+            "md5": md5,
+            "displayname": "old name",
+            "contentType": "text/plain",
+            "locked": False,
+            "import_path": "example.txt",
+        }], 1)
+        remap_dict = import_static_content(course_dir, content_store, course_id)
+        self.assertFalse(content_store.save.called)
+        content_store.set_attrs.assert_called_once_with(asset_key, {"displayname": "example.txt"})
+        self.assertEqual(remap_dict["example.txt"].name, "example.txt")
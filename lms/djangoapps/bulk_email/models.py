@@ -12,6 +12,9 @@ file and check it in at the same time as your model changes. To do that,
 
 """
 import logging
+import re
+from string import Formatter
+
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models, transaction
@@ -198,6 +201,73 @@ class CourseEmailTemplate(models.Model):
         # finally, return the result, after wrapping long lines and without converting to an encoded byte array.
         return wrap_message(result)
 
+    @staticmethod
+    def _compile(format_string, message_body, context, recipient_keys):
+        """
+        Prepare the rendering of messages with `_render`, for recipients whose
+        contexts are `context` updated with their own values for `recipient_keys`.
+
+        Returns a function taking a dict of the recipient's values, and returning
+        the message `_render` would.
+
+        As long lines are wrapped one by one, the lines of the template which don't
+        use `recipient_keys` are rendered here once, instead of once per recipient.
+        """
+        formatter = Formatter()
+        message_body_tag = COURSE_EMAIL_MESSAGE_BODY_TAG.format()
+        tag_inserted = False
+
+        def uses_recipient_keys(line):
+            """Whether a template line has a field using the recipient's values"""
+            for __, field_name, format_spec, __ in formatter.parse(line):
+                if field_name is None:
+                    continue
+                if re.match(r'[^.[]*', field_name).group() in recipient_keys or '{' in format_spec:
+                    return True
+            return False
+
+        # (text, has_tag, is_rendered) for each line, joined per recipient
+        parts = []
+        for line in format_string.split('\n'):
+            # the message body is inserted in place of the first tag, see _render
+            has_tag = not tag_inserted and COURSE_EMAIL_MESSAGE_BODY_TAG in line
+            tag_inserted = tag_inserted or has_tag
+            if uses_recipient_keys(line):
+                parts.append((line, has_tag, False))
+            else:
+                result = line.format(**context)
+                if has_tag:
+                    result = result.replace(message_body_tag, message_body, 1)
+                parts.append((wrap_message(result), False, True))
+
+        def render(recipient_context):
+            """Render the message of a recipient"""
+            full_context = dict(context)
+            full_context.update(recipient_context)
+            lines = []
+            for text, has_tag, is_rendered in parts:
+                if not is_rendered:
+                    text = text.format(**full_context)
+                    if has_tag:
+                        text = text.replace(message_body_tag, message_body, 1)
+                    text = wrap_message(text)
+                lines.append(text)
+            return u'\n'.join(lines)
+
+        return render
+
+    def compile_plaintext(self, plaintext, context, recipient_keys):
+        """
+        Prepare the rendering of plain text messages for many recipients, see `_compile`.
+        """
+        return CourseEmailTemplate._compile(self.plain_template, plaintext, context, recipient_keys)
+
+    def compile_htmltext(self, htmltext, context, recipient_keys):
+        """
+        Prepare the rendering of HTML text messages for many recipients, see `_compile`.
+        """
+        return CourseEmailTemplate._compile(self.html_template, htmltext, context, recipient_keys)
+
     def render_plaintext(self, plaintext, context):
         """
         Create plain text message.
@@ -5,6 +5,7 @@ to a course.
 import re
 import random
 import json
+from multiprocessing.pool import ThreadPool
 from time import sleep
 
 from dogapi import dog_stats_api
@@ -49,6 +50,9 @@ from util.query import use_read_replica_if_available
 
 log = get_task_logger(__name__)
 
+# The values of the email context which differ between recipients.
+RECIPIENT_CONTEXT_KEYS = ('name', 'email')
+
 
 # Errors that an individual email is failing to be sent, and should just
 # be treated as a fail.
@@ -441,82 +445,112 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
     from_addr = _get_source_address(course_email.course_id, course_title)
 
     course_email_template = CourseEmailTemplate.get_template()
+    connections = []
+    pool = None
     try:
-        connection = get_connection()
-        connection.open()
-
-        # Define context values to use in all course emails:
+        # Open the connections the messages are sent over, in parallel if there are several:
+        for __ in range(getattr(settings, 'BULK_EMAIL_CONNECTIONS_PER_TASK', 1)):
+            connections.append(get_connection())
+            connections[-1].open()
+        if len(connections) > 1:
+            pool = ThreadPool(len(connections))
+
+        # Define context values to use in all course emails, and render the parts of
+        # the templates which are the same for all recipients once:
         email_context = {'name': '', 'email': ''}
         email_context.update(global_email_context)
+        render_plaintext = course_email_template.compile_plaintext(
+            course_email.text_message, email_context, RECIPIENT_CONTEXT_KEYS
+        )
+        render_htmltext = course_email_template.compile_htmltext(
+            course_email.html_message, email_context, RECIPIENT_CONTEXT_KEYS
+        )
 
-        while to_list:
-            # Update context with user-specific values from the user at the end of the list.
-            # At the end of processing this user, they will be popped off of the to_list.
-            # That way, the to_list will always contain the recipients remaining to be emailed.
-            # This is convenient for retries, which will need to send to those who haven't
-            # yet been emailed, but not send to those who have already been sent to.
-            current_recipient = to_list[-1]
-            email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-
-            # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
-
-            # Create email:
-            email_msg = EmailMultiAlternatives(
-                subject,
-                plaintext_msg,
-                from_addr,
-                [email],
-                connection=connection
-            )
-            email_msg.attach_alternative(html_msg, 'text/html')
-
+        def build_messages(recipients):
+            """Construct the message of each recipient, using templates and context"""
+            for recipient in recipients:
+                recipient_context = {'email': recipient['email'], 'name': recipient['profile__name']}
+                email_msg = EmailMultiAlternatives(
+                    subject,
+                    render_plaintext(recipient_context),
+                    from_addr,
+                    [recipient['email']]
+                )
+                email_msg.attach_alternative(render_htmltext(recipient_context), 'text/html')
+                yield email_msg
+
+        def send_message(connection, email_msg):
+            """Send a message over a connection, returning the error raised if any"""
             # Throttle if we have gotten the rate limiter.  This is not very high-tech,
             # but if a task has been retried for rate-limiting reasons, then we sleep
-            # for a period of time between all emails within this task.  Choice of
-            # the value depends on the number of workers that might be sending email in
-            # parallel, and what the SES throttle rate is.
+            # for a period of time between all emails on each connection of this task.
+            # Choice of the value depends on the number of workers that might be sending
+            # email in parallel, and what the SES throttle rate is.
             if subtask_status.retried_nomax > 0:
                 sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
-
             try:
-                log.debug('Email with id %s to be sent to %s', email_id, email)
-
                 with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
                     connection.send_messages([email_msg])
+            except Exception as exc:  # pylint: disable=broad-except
+                return exc
+            return None
+
+        while to_list:
+            # Send to the recipients at the end of the list, one per connection.
+            # Recipients are removed from the to_list once they have been processed.
+            # That way, the to_list will always contain the recipients remaining to be emailed.
+            # This is convenient for retries, which will need to send to those who haven't
+            # yet been emailed, but not send to those who have already been sent to.
+            recipients = to_list[-len(connections):][::-1]
+            for recipient in recipients:
+                log.debug('Email with id %s to be sent to %s', email_id, recipient['email'])
+            sends = zip(connections, build_messages(recipients))
+            if pool is None:
+                errors = [send_message(*send) for send in sends]
+            else:
+                errors = pool.map(lambda send: send_message(*send), sends)
+
+            processed = set()
+            retry_exc = None
+            for recipient, exc in zip(recipients, errors):
+                email = recipient['email']
+                if exc is None:
+                    dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
+                    if settings.BULK_EMAIL_LOG_SENT_EMAILS:
+                        log.info('Email with id %s sent to %s', email_id, email)
+                    else:
+                        log.debug('Email with id %s sent to %s', email_id, email)
+                    subtask_status.increment(succeeded=1)
 
-            except SMTPDataError as exc:
                 # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
-                if exc.smtp_code >= 400 and exc.smtp_code < 500:
-                    # This will cause the outer handler to catch the exception and retry the entire task.
-                    raise exc
-                else:
+                elif isinstance(exc, SMTPDataError) and not 400 <= exc.smtp_code < 500:
                     # This will fall through and not retry the message.
                     log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc.smtp_error)
                     dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
                     subtask_status.increment(failed=1)
 
-            except SINGLE_EMAIL_FAILURE_ERRORS as exc:
-                # This will fall through and not retry the message.
-                log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc)
-                dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                subtask_status.increment(failed=1)
+                elif isinstance(exc, SINGLE_EMAIL_FAILURE_ERRORS):
+                    # This will fall through and not retry the message.
+                    log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc)
+                    dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
+                    subtask_status.increment(failed=1)
 
-            else:
-                dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
-                if settings.BULK_EMAIL_LOG_SENT_EMAILS:
-                    log.info('Email with id %s sent to %s', email_id, email)
                 else:
-                    log.debug('Email with id %s sent to %s', email_id, email)
-                subtask_status.increment(succeeded=1)
+                    # This will cause the outer handlers to catch the exception and retry the
+                    # entire task, once the other messages sent in parallel are accounted for.
+                    retry_exc = retry_exc or exc
+                    continue
+
+                processed.add(id(recipient))
 
-            # Pop the user that was emailed off the end of the list only once they have
-            # successfully been processed.  (That way, if there were a failure that
+            # Remove the users that were emailed from the list only once they have
+            # been processed.  (That way, if there were a failure that
             # needed to be retried, the user is still on the list.)
-            to_list.pop()
+            to_list[-len(recipients):] = [
+                recipient for recipient in to_list[-len(recipients):] if id(recipient) not in processed
+            ]
+            if retry_exc is not None:
+                raise retry_exc
 
     except INFINITE_RETRY_ERRORS as exc:
         dog_stats_api.increment('course_email.infinite_retry', tags=[_statsd_tag(course_title)])
@@ -572,7 +606,10 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         return subtask_status, None
     finally:
         # Clean up at the end.
-        connection.close()
+        if pool is not None:
+            pool.close()
+        for connection in connections:
+            connection.close()
 
 
 def _get_current_task():
@@ -178,6 +178,13 @@ class TestEmailSendFromDashboard(ModuleStoreTestCase):
             [self.instructor.email] + [s.email for s in self.staff] + [s.email for s in self.students]
         )
 
+    @override_settings(BULK_EMAIL_CONNECTIONS_PER_TASK=3)
+    def test_send_to_all_over_several_connections(self):
+        """
+        Make sure email send to all goes there when sent over parallel connections.
+        """
+        self.test_send_to_all()
+
     def test_no_duplicate_emails_staff_instructor(self):
         """
         Test that no duplicate emails are sent to a course instructor that is
@@ -104,6 +104,29 @@ class CourseEmailTemplateTest(TestCase):
         context = self._get_sample_plain_context()
         template.render_plaintext("My new plain text.", context)
 
+    def test_compile_html(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_html_context()
+        render = template.compile_htmltext("My new html text.", context, ('email',))
+        for email in ('your-email@test.com', u'\u00e9mail@test.com'):
+            context['email'] = email
+            self.assertEquals(render({'email': email}), template.render_htmltext("My new html text.", context))
+
+    def test_compile_plain(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_plain_context()
+        render = template.compile_plaintext("My new\nplain text.", context, ('email',))
+        for email in ('your-email@test.com', u'\u00e9mail@test.com'):
+            context['email'] = email
+            self.assertEquals(render({'email': email}), template.render_plaintext("My new\nplain text.", context))
+
+    def test_compile_without_context(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_plain_context()
+        del context['course_title']
+        with self.assertRaises(KeyError):
+            template.compile_plaintext("My new plain text.", context, ('email',))
+
 
 class CourseAuthorizationTest(TestCase):
     """Test the CourseAuthorization model."""
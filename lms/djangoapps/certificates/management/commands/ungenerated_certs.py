@@ -28,6 +28,10 @@ class Command(BaseCommand):
 
     Use the --noop option to test without actually putting certificates on the
     queue to be generated.
+
+    Use the --outbox option to save the requests in the xqueue outbox, so that
+    students are graded without waiting for xqueue, and the requests are sent in
+    batches by the flush_xqueue_outbox command.
     """
 
     option_list = BaseCommand.option_list + (
@@ -36,6 +40,12 @@ class Command(BaseCommand):
                     dest='noop',
                     default=False,
                     help="Don't add certificate requests to the queue"),
+        make_option('--outbox',
+                    action='store_true',
+                    dest='outbox',
+                    default=False,
+                    help="Save the certificate requests in the xqueue outbox, to be sent by "
+                    "the flush_xqueue_outbox command, instead of posting them one by one"),
         make_option('--insecure',
                     action='store_true',
                     dest='insecure',
@@ -91,7 +101,7 @@ class Command(BaseCommand):
             enrolled_students = User.objects.filter(
                 courseenrollment__course_id=course_key)
 
-            xq = XQueueCertInterface()
+            xq = XQueueCertInterface(use_outbox=options['outbox'])
             if options['insecure']:
                 xq.use_https = False
             total = enrolled_students.count()
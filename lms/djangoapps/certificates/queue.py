@@ -7,6 +7,7 @@ from courseware import grades, courses
 from django.test.client import RequestFactory
 from capa.xqueue_interface import XQueueInterface
 from capa.xqueue_interface import make_xheader, make_hashkey
+from courseware.xqueue_outbox import OutboxXQueueInterface
 from django.conf import settings
 from requests.auth import HTTPBasicAuth
 from student.models import UserProfile, CourseEnrollment
@@ -53,7 +54,7 @@ class XQueueCertInterface(object):
 
     """
 
-    def __init__(self, request=None):
+    def __init__(self, request=None, use_outbox=False):
 
         # Get basic auth (username/password) for
         # xqueue connection if it's in the settings
@@ -70,7 +71,9 @@ class XQueueCertInterface(object):
         else:
             self.request = request
 
-        self.xqueue_interface = XQueueInterface(
+        # with the outbox, requests are sent by the flush_xqueue_outbox command
+        interface_class = OutboxXQueueInterface if use_outbox else XQueueInterface
+        self.xqueue_interface = interface_class(
             settings.XQUEUE_INTERFACE['url'],
             settings.XQUEUE_INTERFACE['django_auth'],
             requests_auth,
@@ -16,6 +16,7 @@ from xblock.core import XBlock
 
 from student.models import CourseEnrollmentAllowed
 from external_auth.models import ExternalAuthMap
+from courseware.course_summaries import CourseSummary
 from courseware.masquerade import is_masquerading_as_student
 from django.utils.timezone import UTC
 from student.models import CourseEnrollment
@@ -73,6 +74,9 @@ def has_access(user, action, obj, course_key=None):
     if isinstance(obj, CourseDescriptor):
         return _has_access_course_desc(user, action, obj)
 
+    if isinstance(obj, CourseSummary):
+        return _has_access_course_summary(user, action, obj)
+
     if isinstance(obj, ErrorDescriptor):
         return _has_access_error_desc(user, action, obj, course_key)
 
@@ -217,6 +221,23 @@ def _has_access_course_desc(user, action, course):
     return _dispatch(checkers, action, user, course)
 
 
+def _has_access_course_summary(user, action, summary):
+    """
+    Check if user has access to a course, given its CourseSummary.
+
+    Valid actions:
+
+    'load' -- load the courseware, see inside the course
+    'staff' -- staff access to course.
+    """
+    checkers = {
+        'load': lambda: _has_access_descriptor(user, 'load', summary, summary.id),
+        'staff': lambda: _has_staff_access_to_descriptor(user, summary, summary.id),
+    }
+
+    return _dispatch(checkers, action, user, summary)
+
+
 def _has_access_error_desc(user, action, descriptor, course_key):
     """
     Only staff should see error descriptors.
@@ -0,0 +1,116 @@
+"""
+Lightweight summaries of courses, for pages listing many courses at once
+(e.g. the student dashboard) which don't need the full course descriptors.
+
+Summaries are loaded in bulk for a list of course keys, and cached in the
+general cache for a short time, so that listing courses costs one cache
+lookup instead of a modulestore query per course. Their date texts are
+localized, so they are cached per language.
+"""
+from datetime import datetime
+import logging
+
+from django.conf import settings
+from django.utils.timezone import UTC
+from django.utils.translation import get_language
+
+from util.cache import cache
+from xmodule.error_module import ErrorDescriptor
+from xmodule.modulestore.django import modulestore
+
+log = logging.getLogger(__name__)
+
+# how long, in seconds, summaries are cached (overridable in settings)
+COURSE_SUMMARY_CACHE_TIMEOUT = 300
+
+
+class CourseSummary(object):
+    """
+    The fields of a course needed to list it, copied from its descriptor.
+
+    It can be used in place of the descriptor by the dashboard templates, and
+    by has_access for the 'load' and 'staff' actions.
+    """
+    # checked like the tags of a descriptor by courseware.access
+    _class_tags = frozenset()
+
+    def __init__(self, course):
+        # courseware.courses imports courseware.access, which imports this module
+        from courseware.courses import course_image_url
+
+        self.id = course.id  # pylint: disable=invalid-name
+        self.location = course.location
+        self.number = course.number
+        self.display_name = course.display_name
+        self.display_name_with_default = course.display_name_with_default
+        self.display_number_with_default = course.display_number_with_default
+        self.display_org_with_default = course.display_org_with_default
+        self.cert_name_short = course.cert_name_short
+        self.cert_name_long = course.cert_name_long
+        self.certificates_show_before_end = course.certificates_show_before_end
+        self.end_of_course_survey_url = course.end_of_course_survey_url
+        self.lowest_passing_grade = course.lowest_passing_grade
+        self.start = course.start
+        self.end = course.end
+        self.start_date_text = course.start_date_text
+        self.end_date_text = course.end_date_text
+        self.start_date_is_still_default = course.start_date_is_still_default
+        self.days_early_for_beta = course.days_early_for_beta
+        self.visible_to_staff_only = course.visible_to_staff_only
+        self.course_image_url = course_image_url(course)
+
+    def has_ended(self):
+        """
+        Returns True if the current time is after the course end date, see CourseDescriptor.has_ended.
+        """
+        if self.end is None:
+            return False
+        return datetime.now(UTC()) > self.end
+
+    def has_started(self):
+        """
+        Returns True if the current time is after the course start date.
+        """
+        return datetime.now(UTC()) > self.start
+
+    def may_certify(self):
+        """
+        Return True if it is acceptable to show the student a certificate download link.
+        """
+        return self.certificates_show_before_end or self.has_ended()
+
+    def __repr__(self):
+        return "CourseSummary({})".format(self.id)
+
+
+def _cache_key(course_key, language):
+    """
+    Return the key of the summary of a course in the cache.
+    """
+    return u"course_summary.{}.{}".format(language, course_key.to_deprecated_string())
+
+
+def get_course_summaries(course_keys):
+    """
+    Return a dict of course key -> CourseSummary for the given course keys.
+
+    Courses which don't exist or fail to load are left out (and logged).
+    """
+    language = get_language()
+    keys = {_cache_key(course_key, language): course_key for course_key in course_keys}
+    cached = cache.get_many(keys.keys())
+    summaries = {keys[key]: summary for key, summary in cached.iteritems()}
+
+    missing = {}
+    for key, course_key in keys.iteritems():
+        if course_key in summaries:
+            continue
+        course = modulestore().get_course(course_key)
+        if course is None or isinstance(course, ErrorDescriptor):
+            log.error(u"Could not summarize %s course %s", "broken" if course else "non-existent", course_key)
+            continue
+        summaries[course_key] = missing[key] = CourseSummary(course)
+
+    if missing:
+        cache.set_many(missing, getattr(settings, 'COURSE_SUMMARY_CACHE_TIMEOUT', COURSE_SUMMARY_CACHE_TIMEOUT))
+    return summaries
@@ -1,6 +1,7 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
 from collections import defaultdict
+from itertools import islice
 import json
 import random
 import logging
@@ -13,20 +14,29 @@ from django.test.client import RequestFactory
 from dogapi import dog_stats_api
 
 from courseware import courses
-from courseware.model_data import FieldDataCache
+from courseware.model_data import FieldDataCache, BulkFieldDataCache
 from student.models import anonymous_id_for_user
 from xmodule import graders
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.util.duedate import get_extended_due_date
-from .models import StudentModule
+from .access import has_access
+from .models import (
+    AnswerDistribution, AnswerDistributionBackfill, StudentModule, PersistentSectionGrade, ProblemMaxScore
+)
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
 from opaque_keys import InvalidKeyError
 
 log = logging.getLogger("edx.courseware")
 
+# Returned instead of a list of scores for sections the student never touched
+NOT_ATTEMPTED = object()
+
+# Number of students whose state is prefetched together by iterate_grades_for
+BULK_GRADING_BATCH_SIZE = 100
+
 
 def yield_dynamic_descriptor_descendents(descriptor, module_creator):
     """
@@ -79,6 +89,9 @@ def answer_distributions(course_key):
     generate the report.
 
     This method will try to use a read-replica database if one is available.
+
+    Once the answers of the course are counted (see AnswerDistributionBackfill),
+    the distributions are read from the AnswerDistribution counts instead.
     """
     # dict: { module.module_state_key : (url_name, display_name) }
     state_keys_to_problem_info = {}  # For caching, used by url_and_display_name
@@ -101,9 +114,25 @@ def answer_distributions(course_key):
 
         return state_keys_to_problem_info[usage_key]
 
+    answer_counts = defaultdict(lambda: defaultdict(int))
+
+    if AnswerDistributionBackfill.is_completed(course_key):
+        for row in AnswerDistribution.get_for_course(course_key):
+            try:
+                url, display_name = url_and_display_name(row.module_state_key.map_into_course(course_key))
+            except (ItemNotFoundError, InvalidKeyError):
+                log.warning(
+                    u"Answer Distribution: Item {} not found in course {}; "
+                    u"its answers will be omitted from the answer distribution CSV.".format(
+                        row.module_state_key, course_key
+                    )
+                )
+                continue
+            answer_counts[(url, display_name, row.part_id)][row.answer] += row.count
+        return answer_counts
+
     # Iterate through all problems submitted for this course in no particular
     # order, and build up our answer_counts dict that we will eventually return
-    answer_counts = defaultdict(lambda: defaultdict(int))
     for module in StudentModule.all_submitted_problems_read_only(course_key):
         try:
             state_dict = json.loads(module.state) if module.state else {}
@@ -141,16 +170,16 @@ def answer_distributions(course_key):
     return answer_counts
 
 @transaction.commit_manually
-def grade(student, request, course, keep_raw_scores=False):
+def grade(student, request, course, keep_raw_scores=False, bulk_cache=None):
     """
     Wraps "_grade" with the manual_transaction context manager just in case
     there are unanticipated errors.
     """
     with manual_transaction():
-        return _grade(student, request, course, keep_raw_scores)
+        return _grade(student, request, course, keep_raw_scores, bulk_cache)
 
 
-def _grade(student, request, course, keep_raw_scores):
+def _grade(student, request, course, keep_raw_scores, bulk_cache=None):
     """
     Unwrapped version of "grade"
 
@@ -169,6 +198,9 @@ def _grade(student, request, course, keep_raw_scores):
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
 
+    If a BulkFieldDataCache covering the student is passed as `bulk_cache`,
+    student state is read from it instead of being queried per module.
+
     More information on the format is in the docstring for CourseGrader.
     """
     grading_context = course.grading_context
@@ -181,6 +213,14 @@ def _grade(student, request, course, keep_raw_scores):
         course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
     )
 
+    # Stored per-section scores, fetched in one query. Sections that are
+    # stored, clean and up to date are not recomputed.
+    use_persistent_grades = persistent_grades_enabled()
+    stored_grades = PersistentSectionGrade.get_for_student(student, course.id) if use_persistent_grades else {}
+
+    # Indexed max scores of the problems of the course, fetched in one query
+    max_scores = get_max_scores(course.id)
+
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
     # passed to the grader
@@ -190,65 +230,32 @@ def _grade(student, request, course, keep_raw_scores):
             section_descriptor = section['section_descriptor']
             section_name = section_descriptor.display_name_with_default
 
-            # some problems have state that is updated independently of interaction
-            # with the LMS, so they need to always be scored. (E.g. foldit.,
-            # combinedopenended)
-            should_grade_section = any(
-                descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
+            stored_grade = stored_grades.get(section_descriptor.location)
+            located_scores = get_stored_section_scores(
+                stored_grade, section_descriptor, submissions_scores, section['xmoduledescriptors']
             )
-
-            # If there are no problems that always have to be regraded, check to
-            # see if any of our locations are in the scores from the submissions
-            # API. If scores exist, we have to calculate grades for this section.
-            if not should_grade_section:
-                should_grade_section = any(
-                    descriptor.location.to_deprecated_string() in submissions_scores
-                    for descriptor in section['xmoduledescriptors']
+            if located_scores is None:
+                store_scores = use_persistent_grades and _is_section_cacheable(section, submissions_scores)
+                if store_scores and stored_grade is None:
+                    with manual_transaction():
+                        stored_grade = PersistentSectionGrade.reserve(
+                            student, course.id, section_descriptor.location
+                        )
+                located_scores = _compute_section_scores(
+                    student, request, course, section, submissions_scores, bulk_cache, max_scores
                 )
-
-            if not should_grade_section:
-                with manual_transaction():
-                    should_grade_section = StudentModule.objects.filter(
-                        student=student,
-                        module_state_key__in=[
-                            descriptor.location for descriptor in section['xmoduledescriptors']
-                        ]
-                    ).exists()
+                if store_scores:
+                    with manual_transaction():
+                        PersistentSectionGrade.save_scores(
+                            stored_grade,
+                            section_content_version(section_descriptor),
+                            None if located_scores is NOT_ATTEMPTED else located_scores
+                        )
 
             # If we haven't seen a single problem in the section, we don't have
             # to grade it at all! We can assume 0%
-            if should_grade_section:
-                scores = []
-
-                def create_module(descriptor):
-                    '''creates an XModule instance given a descriptor'''
-                    # TODO: We need the request to pass into here. If we could forego that, our arguments
-                    # would be simpler
-                    with manual_transaction():
-                        field_data_cache = FieldDataCache([descriptor], course.id, student)
-                    return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
-
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
-
-                    (correct, total) = get_score(
-                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
-                    )
-                    if correct is None and total is None:
-                        continue
-
-                    if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
-                        if total > 1:
-                            correct = random.randrange(max(total - 2, 1), total + 1)
-                        else:
-                            correct = total
-
-                    graded = module_descriptor.graded
-                    if not total > 0:
-                        #We simply cannot grade a problem that is 12/0, because we might need it as a percentage
-                        graded = False
-
-                    scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
-
+            if located_scores is not NOT_ATTEMPTED:
+                scores = [score for __, score in located_scores]
                 _, graded_total = graders.aggregate_scores(scores, section_name)
                 if keep_raw_scores:
                     raw_scores += scores
@@ -279,6 +286,206 @@ def _grade(student, request, course, keep_raw_scores):
     return grade_summary
 
 
+def persistent_grades_enabled():
+    """
+    Return True if section grades should be read from and written to the
+    PersistentSectionGrade store.
+    """
+    # Randomly generated profile scores must never be persisted
+    return settings.FEATURES.get('ENABLE_PERSISTENT_GRADES', False) and not settings.GENERATE_PROFILE_SCORES
+
+
+def get_max_scores(course_id):
+    """
+    Return the ProblemMaxScore index of the course as passed to get_score, or
+    None if the index is disabled.
+    """
+    if not settings.FEATURES.get('ENABLE_MAX_SCORE_INDEX', False):
+        return None
+    with manual_transaction():
+        return ProblemMaxScore.get_for_course(course_id)
+
+
+def section_content_version(section_descriptor):
+    """
+    Return a string that changes whenever the content of the section (or
+    anything below it) is edited. Stored section grades computed against a
+    different version are ignored.
+
+    Split courses are versioned by the structure the section was loaded from,
+    which is replaced on every edit of the course. Old mongo courses are
+    versioned by the last edit of the section's subtree.
+    """
+    version_guid = getattr(section_descriptor.location.course_key, 'version_guid', None)
+    if version_guid is None:
+        course_entry = getattr(section_descriptor.runtime, 'course_entry', None)
+        if course_entry is not None:
+            version_guid = course_entry['structure']['_id']
+    if version_guid is not None:
+        return u'structure:{}'.format(version_guid)
+
+    edited_on = getattr(section_descriptor, 'subtree_edited_on', None)
+    return unicode(edited_on) if edited_on is not None else u''
+
+
+def _is_section_cacheable(section, submissions_scores):
+    """
+    Sections containing modules that are scored outside of the LMS (modules
+    that must always be recalculated, or that have a score in the
+    submissions API) can't be stored.
+    """
+    for descriptor in section['xmoduledescriptors']:
+        if descriptor.always_recalculate_grades:
+            return False
+        if descriptor.location.to_deprecated_string() in submissions_scores:
+            return False
+    return True
+
+
+def get_stored_section_scores(stored_grade, section_descriptor, submissions_scores, descriptors=None):
+    """
+    Return the stored scores of a section as a list of (location, Score)
+    tuples (or NOT_ATTEMPTED), or None if there is no usable stored grade and
+    the section has to be recomputed.
+
+    `descriptors` are the scored descriptors of the section, if known. When
+    they are not, a section stored as not attempted is recomputed whenever the
+    student has any submissions API score.
+    """
+    if stored_grade is None or stored_grade.dirty:
+        return None
+    if stored_grade.content_version != section_content_version(section_descriptor):
+        return None
+
+    located_scores = stored_grade.get_scores()
+    if located_scores is None:
+        # The student may have been scored through the submissions API in
+        # this section since it was stored
+        if submissions_scores and (descriptors is None or any(
+            descriptor.location.to_deprecated_string() in submissions_scores for descriptor in descriptors
+        )):
+            return None
+        return NOT_ATTEMPTED
+    # A module may have received a submissions API score after this row was
+    # written, in which case it takes precedence.
+    if any(location in submissions_scores for location, __ in located_scores):
+        return None
+    return located_scores
+
+
+def _compute_section_scores(student, request, course, section, submissions_scores, bulk_cache=None,
+                            max_scores=None):
+    """
+    Compute the scores of every scored module in a graded section by
+    instantiating the modules (except the unattempted problems whose max
+    score is in `max_scores`, see get_score).
+
+    Returns a list of (location string, Score) tuples, or NOT_ATTEMPTED if the
+    student has never interacted with the section.
+    """
+    section_descriptor = section['section_descriptor']
+
+    # some problems have state that is updated independently of interaction
+    # with the LMS, so they need to always be scored. (E.g. foldit.,
+    # combinedopenended)
+    should_grade_section = any(
+        descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
+    )
+
+    # If there are no problems that always have to be regraded, check to
+    # see if any of our locations are in the scores from the submissions
+    # API. If scores exist, we have to calculate grades for this section.
+    if not should_grade_section:
+        should_grade_section = any(
+            descriptor.location.to_deprecated_string() in submissions_scores
+            for descriptor in section['xmoduledescriptors']
+        )
+
+    if not should_grade_section:
+        locations = [descriptor.location for descriptor in section['xmoduledescriptors']]
+        if bulk_cache is not None and bulk_cache.covers(student, locations):
+            should_grade_section = bulk_cache.has_student_modules(student, locations)
+        else:
+            with manual_transaction():
+                should_grade_section = StudentModule.objects.filter(
+                    student=student,
+                    module_state_key__in=locations
+                ).exists()
+
+    if not should_grade_section:
+        return NOT_ATTEMPTED
+
+    located_scores = []
+
+    def create_module(descriptor):
+        '''creates an XModule instance given a descriptor'''
+        # TODO: We need the request to pass into here. If we could forego that, our arguments
+        # would be simpler
+        with manual_transaction():
+            field_data_cache = FieldDataCache([descriptor], course.id, student, bulk_cache=bulk_cache)
+        return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
+
+    for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
+
+        (correct, total) = get_score(
+            course.id, student, module_descriptor, create_module, scores_cache=submissions_scores,
+            bulk_cache=bulk_cache, max_scores=max_scores
+        )
+        if correct is None and total is None:
+            continue
+
+        if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
+            if total > 1:
+                correct = random.randrange(max(total - 2, 1), total + 1)
+            else:
+                correct = total
+
+        graded = module_descriptor.graded
+        if not total > 0:
+            #We simply cannot grade a problem that is 12/0, because we might need it as a percentage
+            graded = False
+
+        located_scores.append((
+            module_descriptor.location.to_deprecated_string(),
+            Score(correct, total, graded, module_descriptor.display_name_with_default)
+        ))
+
+    return located_scores
+
+
+@transaction.commit_manually
+def find_stale_section_grades(student, request, course):
+    """
+    Compare the usable stored section grades of `student` against a full
+    computation of the same sections, and return the locations of the
+    sections whose stored scores differ.
+
+    Sections without a usable stored grade are skipped, since `grade` would
+    recompute them anyway.
+    """
+    with manual_transaction():
+        stored_grades = PersistentSectionGrade.get_for_student(student, course.id)
+    submissions_scores = sub_api.get_scores(
+        course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
+    )
+
+    stale_sections = []
+    for sections in course.grading_context['graded_sections'].itervalues():
+        for section in sections:
+            section_descriptor = section['section_descriptor']
+            stored_scores = get_stored_section_scores(
+                stored_grades.get(section_descriptor.location), section_descriptor, submissions_scores,
+                section['xmoduledescriptors']
+            )
+            if stored_scores is None:
+                continue
+            computed_scores = _compute_section_scores(student, request, course, section, submissions_scores)
+            if computed_scores != stored_scores:
+                stale_sections.append(section_descriptor.location)
+
+    return stale_sections
+
+
 def grade_for_percentage(grade_cutoffs, percentage):
     """
     Returns a letter grade as defined in grading_policy (e.g. 'A' 'B' 'C' for 6.002x) or None.
@@ -348,6 +555,11 @@ def _progress_summary(student, request, course):
 
     submissions_scores = sub_api.get_scores(course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id))
 
+    # Graded sections that were already scored by `grade` don't need their
+    # problems to be scored again.
+    stored_grades = PersistentSectionGrade.get_for_student(student, course.id) if persistent_grades_enabled() else {}
+    max_scores = get_max_scores(course.id)
+
     chapters = []
     # Don't include chapters that aren't displayable (e.g. due to error)
     for chapter_module in course_module.get_display_items():
@@ -366,17 +578,28 @@ def _progress_summary(student, request, course):
                 graded = section_module.graded
                 scores = []
 
-                module_creator = section_module.xmodule_runtime.get_module
-
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_module, module_creator):
-                    course_id = course.id
-                    (correct, total) = get_score(
-                        course_id, student, module_descriptor, module_creator, scores_cache=submissions_scores
-                    )
-                    if correct is None and total is None:
-                        continue
-
-                    scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
+                located_scores = get_stored_section_scores(
+                    stored_grades.get(section_module.location), section_module, submissions_scores
+                )
+                if located_scores is not None and located_scores is not NOT_ATTEMPTED:
+                    # The stored scores were collected in the same order as below
+                    scores = [
+                        Score(score.earned, score.possible, graded, score.section)
+                        for __, score in located_scores
+                    ]
+                else:
+                    module_creator = section_module.xmodule_runtime.get_module
+
+                    for module_descriptor in yield_dynamic_descriptor_descendents(section_module, module_creator):
+                        course_id = course.id
+                        (correct, total) = get_score(
+                            course_id, student, module_descriptor, module_creator, scores_cache=submissions_scores,
+                            max_scores=max_scores
+                        )
+                        if correct is None and total is None:
+                            continue
+
+                        scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
 
                 scores.reverse()
                 section_total, _ = graders.aggregate_scores(
@@ -403,7 +626,8 @@ def _progress_summary(student, request, course):
     return chapters
 
 
-def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None):
+def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None, bulk_cache=None,
+              max_scores=None):
     """
     Return the score for a user on a problem, as a tuple (correct, total).
     e.g. (5,7) if you got 5 out of 7 points.
@@ -417,6 +641,11 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
            Can return None if user doesn't have access, or if something else went wrong.
     scores_cache: A dict of location names to (earned, possible) point tuples.
            If an entry is found in this cache, it takes precedence.
+    bulk_cache: An optional BulkFieldDataCache to read the StudentModule from.
+    max_scores: An optional dict of problem locations to the ProblemMaxScore rows of the
+           course, as returned by ProblemMaxScore.get_for_course. The max scores of problems
+           the student hasn't been graded on are looked up there, and added to it (and the
+           index) when missing.
     """
     scores_cache = scores_cache or {}
 
@@ -443,33 +672,43 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         # These are not problems, and do not have a score
         return (None, None)
 
-    try:
-        student_module = StudentModule.objects.get(
-            student=user,
-            course_id=course_id,
-            module_state_key=problem_descriptor.location
-        )
-    except StudentModule.DoesNotExist:
-        student_module = None
+    if bulk_cache is not None and bulk_cache.covers(user, [problem_descriptor.location]):
+        student_module = bulk_cache.get_student_module(user, problem_descriptor.location)
+    else:
+        try:
+            student_module = StudentModule.objects.get(
+                student=user,
+                course_id=course_id,
+                module_state_key=problem_descriptor.location
+            )
+        except StudentModule.DoesNotExist:
+            student_module = None
 
     if student_module is not None and student_module.max_grade is not None:
         correct = student_module.grade if student_module.grade is not None else 0
         total = student_module.max_grade
+        if max_scores is not None:
+            _check_indexed_max_score(course_id, problem_descriptor, total, max_scores)
     else:
-        # If the problem was not in the cache, or hasn't been graded yet,
-        # we need to instantiate the problem.
-        # Otherwise, the max score (cached in student_module) won't be available
-        problem = module_creator(problem_descriptor)
-        if problem is None:
-            return (None, None)
-
         correct = 0.0
-        total = problem.max_score()
-
-        # Problem may be an error module (if something in the problem builder failed)
-        # In which case total might be None
+        total = _get_indexed_max_score(course_id, user, problem_descriptor, max_scores)
         if total is None:
-            return (None, None)
+            # If the problem was not in the cache, or hasn't been graded yet,
+            # and its max score isn't indexed, we need to instantiate the problem.
+            # Otherwise, the max score (cached in student_module) won't be available
+            problem = module_creator(problem_descriptor)
+            if problem is None:
+                return (None, None)
+
+            total = problem.max_score()
+
+            # Problem may be an error module (if something in the problem builder failed)
+            # In which case total might be None
+            if total is None:
+                return (None, None)
+
+            if max_scores is not None:
+                _index_max_score(course_id, problem_descriptor, total, max_scores)
 
     # Now we re-weight the problem, if specified
     weight = problem_descriptor.weight
@@ -483,6 +722,61 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
     return (correct, total)
 
 
+def _get_indexed_max_score(course_id, user, problem_descriptor, max_scores):
+    """
+    Return the max score of the problem from the index, or None if it isn't indexed for
+    the problem's current definition or the user can't load the problem.
+    """
+    if max_scores is None:
+        return None
+    row = max_scores.get(problem_descriptor.location)
+    if row is None or row.student_dependent or row.max_score is None:
+        return None
+    if row.definition_hash != ProblemMaxScore.definition_hash_for(problem_descriptor):
+        return None
+    # instantiating the problem would have checked this
+    if getattr(user, 'known', True) and not has_access(user, 'load', problem_descriptor, course_id):
+        return None
+    return row.max_score
+
+
+def _index_max_score(course_id, problem_descriptor, total, max_scores):
+    """
+    Index the max score of the problem computed by instantiating it.
+    """
+    definition_hash = ProblemMaxScore.definition_hash_for(problem_descriptor)
+    if definition_hash is None:
+        return
+    row = max_scores.get(problem_descriptor.location)
+    if row is not None and row.definition_hash == definition_hash and row.student_dependent:
+        return
+    with manual_transaction():
+        max_scores[problem_descriptor.location] = ProblemMaxScore.save_max_score(
+            course_id, problem_descriptor.location, definition_hash, total
+        )
+
+
+def _check_indexed_max_score(course_id, problem_descriptor, total, max_scores):
+    """
+    Flag the indexed max score of the problem as student dependent if it differs from
+    the max score `total` recorded for a student, so that it isn't trusted anymore.
+    """
+    row = max_scores.get(problem_descriptor.location)
+    if row is None or row.student_dependent or row.max_score == total:
+        return
+    definition_hash = ProblemMaxScore.definition_hash_for(problem_descriptor)
+    if row.definition_hash != definition_hash:
+        return
+    log.info(
+        u"Max score of %s differs between students (%s, %s); it won't be indexed",
+        problem_descriptor.location, row.max_score, total
+    )
+    with manual_transaction():
+        max_scores[problem_descriptor.location] = ProblemMaxScore.save_max_score(
+            course_id, problem_descriptor.location, definition_hash, None, student_dependent=True
+        )
+
+
 @contextmanager
 def manual_transaction():
     """A context manager for managing manual transactions"""
@@ -496,7 +790,19 @@ def manual_transaction():
         transaction.commit()
 
 
-def iterate_grades_for(course_id, students):
+@transaction.commit_manually
+def _prefetch_grading_state(descriptors, course_key, students):
+    """
+    Return a BulkFieldDataCache of the state of `students` for `descriptors`.
+
+    Like `grade`, this manages its own transaction, since iterate_grades_for
+    is called from tasks and commands that aren't under transaction management.
+    """
+    with manual_transaction():
+        return BulkFieldDataCache(descriptors, course_key, students)
+
+
+def iterate_grades_for(course_id, students, batch_size=BULK_GRADING_BATCH_SIZE):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
     (student, gradeset, err_msg) for every student enrolled in the course.
@@ -513,33 +819,47 @@ def iterate_grades_for(course_id, students):
     - grade_breakdown : A breakdown of the major components that
         make up the final grade. (For display)
     - raw_scores: contains scores for every graded module
+
+    Students are graded in batches of `batch_size`. The state of each batch for
+    every module that can affect grading is prefetched into a
+    BulkFieldDataCache with a few chunked queries, instead of querying it per
+    student and module.
     """
     course = courses.get_course_by_id(course_id)
+    graded_descriptors = course.grading_context['all_descriptors']
 
     # We make a fake request because grading code expects to be able to look at
     # the request. We have to attach the correct user to the request before
     # grading that student.
     request = RequestFactory().get('/')
 
-    for student in students:
-        with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=['action:{}'.format(course_id)]):
-            try:
-                request.user = student
-                # Grading calls problem rendering, which calls masquerading,
-                # which checks session vars -- thus the empty session dict below.
-                # It's not pretty, but untangling that is currently beyond the
-                # scope of this feature.
-                request.session = {}
-                gradeset = grade(student, request, course)
-                yield student, gradeset, ""
-            except Exception as exc:  # pylint: disable=broad-except
-                # Keep marching on even if this student couldn't be graded for
-                # some reason, but log it for future reference.
-                log.exception(
-                    'Cannot grade student %s (%s) in course %s because of exception: %s',
-                    student.username,
-                    student.id,
-                    course_id,
-                    exc.message
-                )
-                yield student, {}, exc.message
+    students = iter(students)
+    while True:
+        batch = list(islice(students, batch_size))
+        if not batch:
+            break
+
+        bulk_cache = _prefetch_grading_state(graded_descriptors, course.id, batch)
+
+        for student in batch:
+            with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=['action:{}'.format(course_id)]):
+                try:
+                    request.user = student
+                    # Grading calls problem rendering, which calls masquerading,
+                    # which checks session vars -- thus the empty session dict below.
+                    # It's not pretty, but untangling that is currently beyond the
+                    # scope of this feature.
+                    request.session = {}
+                    gradeset = grade(student, request, course, bulk_cache=bulk_cache)
+                    yield student, gradeset, ""
+                except Exception as exc:  # pylint: disable=broad-except
+                    # Keep marching on even if this student couldn't be graded for
+                    # some reason, but log it for future reference.
+                    log.exception(
+                        'Cannot grade student %s (%s) in course %s because of exception: %s',
+                        student.username,
+                        student.id,
+                        course_id,
+                        exc.message
+                    )
+                    yield student, {}, exc.message
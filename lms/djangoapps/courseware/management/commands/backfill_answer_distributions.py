@@ -0,0 +1,166 @@
+"""
+Count the answers of the existing states of the students of a course into
+the answer distributions (AnswerDistribution), after which they are kept up
+to date as the students submit problems.
+"""
+from collections import defaultdict
+from functools import partial
+from itertools import imap
+from multiprocessing.pool import ThreadPool
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+
+from courseware.models import AnswerDistribution, AnswerDistributionBackfill, StudentModule
+
+
+def _problem_states(course_key):
+    """
+    The states of the problems of the course. The primary database is used
+    rather than the read replica, so that no state saved since the backfill
+    started is missed.
+    """
+    return StudentModule.objects.filter(course_id=course_key, module_type='problem')
+
+
+def chunks(course_key, last_id, max_id, chunk_size):
+    """
+    Yield the (start id, end id) ranges of the states of the course from
+    `last_id` (excluded) to `max_id`, `chunk_size` states at a time.
+    """
+    while last_id < max_id:
+        ids = list(_problem_states(course_key).filter(
+            id__gt=last_id, id__lte=max_id
+        ).order_by('id').values_list('id', flat=True)[chunk_size - 1:chunk_size])
+        end_id = ids[0] if ids else max_id
+        yield last_id, end_id
+        last_id = end_id
+
+
+@transaction.autocommit
+def count_chunk(course_key, id_range):
+    """
+    Count the answers of the submitted problems with ids in `id_range`.
+
+    Returns `id_range` and a dict of problem location -> {(part id, answer) -> count}.
+    """
+    # end the transaction of previous reads, so that the states are read as they are
+    # now rather than from the snapshot of an earlier chunk
+    transaction.commit_unless_managed()
+    start_id, end_id = id_range
+    counts = defaultdict(lambda: defaultdict(int))
+    modules = _problem_states(course_key).filter(grade__isnull=False, id__gt=start_id, id__lte=end_id)
+    for module in modules.iterator():
+        answers = AnswerDistribution.submitted_answers(module.module_type, module.grade, module.state)
+        for part_id, answer in answers.iteritems():
+            counts[module.module_state_key][(part_id, answer)] += 1
+    transaction.commit_unless_managed()
+    return id_range, counts
+
+
+def count_chunk_in_thread(course_key, id_range):
+    """
+    Run count_chunk in a thread of the pool, closing the database connection
+    of the thread once done.
+    """
+    try:
+        return count_chunk(course_key, id_range)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    """
+    Count the answers of the states of a course into its answer
+    distributions, in chunks of increasing ids counted by --workers threads.
+
+    The progress is saved after each chunk (see AnswerDistributionBackfill),
+    so an interrupted backfill resumes where it stopped when run again.
+    States saved while their chunk is being counted may be counted as they
+    were when read.
+    """
+    args = "<course_id> [<course_id>...]"
+    help = "Count the answers of the existing states of courses into their answer distributions"
+
+    option_list = BaseCommand.option_list + (
+        make_option('--chunk-size',
+                    type='int',
+                    dest='chunk_size',
+                    default=1000,
+                    help='Number of states counted at a time'),
+        make_option('--workers',
+                    type='int',
+                    dest='workers',
+                    default=4,
+                    help='Number of chunks counted in parallel'),
+    )
+
+    def handle(self, *args, **options):
+        if not args:
+            raise CommandError("backfill_answer_distributions requires at least one <course_id>")
+        if options['chunk_size'] < 1 or options['workers'] < 1:
+            raise CommandError("--chunk-size and --workers must be positive")
+
+        for course_id in args:
+            try:
+                course_key = CourseKey.from_string(course_id)
+            except InvalidKeyError:
+                course_key = SlashSeparatedCourseKey.from_deprecated_string(course_id)
+            self.backfill(course_key, options['chunk_size'], options['workers'])
+
+    def backfill(self, course_key, chunk_size, workers):
+        """
+        Count the answers of the states of the course not counted yet.
+        """
+        backfill = self._start(course_key)
+        if backfill.completed:
+            self.stdout.write(u"The answers of {} are already counted\n".format(course_key))
+            return
+
+        pool = ThreadPool(workers) if workers > 1 else None
+        try:
+            count = partial(count_chunk_in_thread if pool else count_chunk, course_key)
+            id_ranges = chunks(course_key, backfill.last_id, backfill.max_id, chunk_size)
+            # chunks are saved in order, so that all the states up to last_id are counted
+            for (__, end_id), counts in (pool.imap if pool else imap)(count, id_ranges):
+                self._save_chunk(backfill, end_id, counts)
+                self.stdout.write(u"Counted the answers of {} up to id {} of {}\n".format(
+                    course_key, end_id, backfill.max_id
+                ))
+        finally:
+            if pool:
+                pool.terminate()
+
+        backfill.completed = True
+        backfill.save()
+        self.stdout.write(u"Counted the answers of {}\n".format(course_key))
+
+    @transaction.autocommit
+    def _start(self, course_key):
+        """
+        Return the backfill of the course, starting it if needed.
+
+        The backfill is saved before looking up the last state of the course, so
+        that the states created from then on are counted as they are saved.
+        """
+        backfill, __ = AnswerDistributionBackfill.objects.get_or_create(course_id=course_key)
+        if backfill.max_id is None:
+            backfill.max_id = StudentModule.objects.filter(course_id=course_key).aggregate(Max('id'))['id__max'] or 0
+            backfill.save()
+        return backfill
+
+    @transaction.commit_on_success
+    def _save_chunk(self, backfill, end_id, counts):
+        """
+        Add the counts of a chunk to the answer distributions, and save that the
+        states up to `end_id` are counted.
+        """
+        for module_state_key, deltas in counts.iteritems():
+            AnswerDistribution.add_counts(backfill.course_id, module_state_key, deltas)
+        backfill.last_id = end_id
+        backfill.save()
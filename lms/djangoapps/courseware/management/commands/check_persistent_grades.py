@@ -0,0 +1,66 @@
+"""
+Verify the stored section grades (PersistentSectionGrade) of a course
+against a full grade computation.
+"""
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.client import RequestFactory
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+
+from courseware.courses import get_course_by_id
+from courseware.grades import find_stale_section_grades
+from courseware.models import PersistentSectionGrade
+from student.models import CourseEnrollment
+
+
+class Command(BaseCommand):
+    """
+    For every enrolled student, recompute each section that has a usable
+    stored grade and report the sections whose stored scores are wrong.
+    With --fix, those sections are marked dirty so they get recomputed on
+    the next grading.
+    """
+    args = "<course_id>"
+    help = "Compare the stored section grades of a course against a full grade computation"
+
+    option_list = BaseCommand.option_list + (
+        make_option('--fix',
+                    action='store_true',
+                    dest='fix',
+                    default=False,
+                    help='Mark inconsistent stored grades dirty'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("check_persistent_grades requires one argument: <course_id>")
+
+        try:
+            course_key = CourseKey.from_string(args[0])
+        except InvalidKeyError:
+            course_key = SlashSeparatedCourseKey.from_deprecated_string(args[0])
+        course = get_course_by_id(course_key)
+
+        # Grading code expects a request; see iterate_grades_for
+        request = RequestFactory().get('/')
+        num_checked = num_stale = 0
+        for student in CourseEnrollment.users_enrolled_in(course_key):
+            request.user = student
+            request.session = {}
+            stale_sections = find_stale_section_grades(student, request, course)
+            num_checked += 1
+            if not stale_sections:
+                continue
+
+            num_stale += 1
+            for section_key in stale_sections:
+                self.stdout.write(u"Inconsistent stored grade: {} {}\n".format(student.username, section_key))
+            if options['fix']:
+                PersistentSectionGrade.mark_dirty(student.id, course_key, stale_sections)
+
+        self.stdout.write(u"Checked {} students in {}: {} with inconsistent stored grades\n".format(
+            num_checked, course_key, num_stale
+        ))
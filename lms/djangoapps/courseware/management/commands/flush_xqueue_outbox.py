@@ -0,0 +1,51 @@
+"""
+Send the submissions saved in the xqueue outbox (see courseware.xqueue_outbox).
+"""
+from optparse import make_option
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from courseware.xqueue_outbox import flush_outbox
+
+
+class Command(BaseCommand):
+    """
+    Send the submissions due in the xqueue outbox, once or, with --loop, every
+    --interval seconds until interrupted.
+    """
+    help = "Send the submissions saved in the xqueue outbox"
+
+    option_list = BaseCommand.option_list + (
+        make_option('--loop',
+                    action='store_true',
+                    dest='loop',
+                    default=False,
+                    help='Keep flushing the outbox until interrupted'),
+        make_option('--interval',
+                    type='float',
+                    dest='interval',
+                    default=1.0,
+                    help='Seconds to wait between flushes with --loop'),
+    )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self._flush()
+            if sent or failed:
+                self.stdout.write("Sent {} xqueue submissions, {} failed\n".format(sent, failed))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    @transaction.autocommit
+    def _flush(self):
+        """
+        Flush the outbox, committing as it goes so that other workers see the
+        claimed submissions.
+        """
+        result = flush_outbox()
+        # end the transaction of the reads too, so that the next flush sees new submissions
+        transaction.commit_unless_managed()
+        return result
@@ -0,0 +1,71 @@
+"""
+Recompute the stored section grades (PersistentSectionGrade) of every
+student enrolled in a course, or of a single student.
+"""
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+
+from courseware.grades import iterate_grades_for
+from courseware.models import PersistentSectionGrade
+from student.models import CourseEnrollment
+
+
+class Command(BaseCommand):
+    """
+    Mark the stored section grades of a course dirty and regrade every
+    enrolled student, which rewrites the stored grades. Run this after
+    turning on FEATURES['ENABLE_PERSISTENT_GRADES'] for an existing course.
+    """
+    args = "<course_id>"
+    help = "Rebuild the stored section grades of a course"
+
+    option_list = BaseCommand.option_list + (
+        make_option('-u', '--user',
+                    metavar='USERNAME',
+                    dest='username',
+                    default=None,
+                    help='Only rebuild the grades of this username or email address'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("rebuild_persistent_grades requires one argument: <course_id>")
+        if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+            raise CommandError("FEATURES['ENABLE_PERSISTENT_GRADES'] is not enabled")
+
+        try:
+            course_key = CourseKey.from_string(args[0])
+        except InvalidKeyError:
+            course_key = SlashSeparatedCourseKey.from_deprecated_string(args[0])
+
+        students = CourseEnrollment.users_enrolled_in(course_key)
+        username = options['username']
+        if username:
+            if '@' in username:
+                students = students.filter(email=username)
+            else:
+                students = students.filter(username=username)
+            for student in students:
+                PersistentSectionGrade.mark_dirty(student.id, course_key)
+        else:
+            PersistentSectionGrade.objects.filter(course_id=course_key).update(
+                dirty=True, version=F('version') + 1
+            )
+
+        num_graded = num_failed = 0
+        for student, __, err_msg in iterate_grades_for(course_key, students):
+            if err_msg:
+                num_failed += 1
+                self.stdout.write(u"Could not grade {}: {}\n".format(student.username, err_msg))
+            else:
+                num_graded += 1
+
+        self.stdout.write(u"Rebuilt stored grades of {} students in {} ({} failed)\n".format(
+            num_graded, course_key, num_failed
+        ))
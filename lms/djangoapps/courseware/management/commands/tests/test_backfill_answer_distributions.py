@@ -0,0 +1,119 @@
+"""
+Tests of the answer distribution counts, and of the
+backfill_answer_distributions command.
+"""
+import json
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from courseware.models import AnswerDistribution, AnswerDistributionBackfill, StudentModule
+from courseware.tests.factories import StudentModuleFactory, course_id, location
+
+
+def problem_state(**answers):
+    """
+    The state of a problem with `answers` as its student answers.
+    """
+    return json.dumps({'student_answers': answers})
+
+
+class AnswerDistributionTest(TestCase):
+    """
+    Test counting the answers of the states of a course, and keeping the counts
+    up to date.
+    """
+    def setUp(self):
+        self.problem = location('problem1')
+
+    def counts(self):
+        """
+        The counts of the answers of the course, as {(part id, answer): count}.
+        """
+        return {
+            (row.part_id, row.answer): row.count
+            for row in AnswerDistribution.get_for_course(course_id)
+        }
+
+    def create_module(self, grade=1, **answers):
+        """
+        Create the state of a student who submitted `answers`.
+        """
+        return StudentModuleFactory(
+            course_id=course_id, module_state_key=self.problem, state=problem_state(**answers), grade=grade
+        )
+
+    def test_backfill(self):
+        for answer in ['a', 'a', 'b', 'a', 'c']:
+            self.create_module(part1=answer)
+        # not submitted
+        self.create_module(grade=None, part1='d')
+        self.assertEqual(self.counts(), {})
+
+        call_command('backfill_answer_distributions', course_id.to_deprecated_string(), chunk_size=2, workers=1)
+
+        self.assertEqual(self.counts(), {('part1', 'a'): 3, ('part1', 'b'): 1, ('part1', 'c'): 1})
+        backfill = AnswerDistributionBackfill.objects.get(course_id=course_id)
+        self.assertTrue(backfill.completed)
+        self.assertEqual(backfill.last_id, backfill.max_id)
+
+        # running it again doesn't count the states twice
+        call_command('backfill_answer_distributions', course_id.to_deprecated_string(), workers=1)
+        self.assertEqual(self.counts()[('part1', 'a')], 3)
+
+    def test_resume_backfill(self):
+        first = self.create_module(part1='a')
+        self.create_module(part1='b')
+        AnswerDistributionBackfill.objects.create(course_id=course_id, max_id=StudentModule.objects.latest('id').id)
+
+        # the states already counted are updated as they are saved
+        AnswerDistribution.add_counts(course_id, self.problem, {('part1', 'a'): 1})
+        AnswerDistributionBackfill.objects.update(last_id=first.id)
+        first.state = problem_state(part1='c')
+        first.save()
+
+        call_command('backfill_answer_distributions', course_id.to_deprecated_string(), workers=1)
+        self.assertEqual(self.counts(), {('part1', 'b'): 1, ('part1', 'c'): 1})
+
+    def test_count_on_save(self):
+        AnswerDistributionBackfill.objects.create(course_id=course_id, max_id=0, completed=True)
+
+        module = self.create_module(grade=None, part1='a')
+        self.assertEqual(self.counts(), {})
+
+        # submitted
+        module.grade = 1
+        module.save()
+        self.assertEqual(self.counts(), {('part1', 'a'): 1})
+
+        # answered again
+        module = StudentModule.objects.get(id=module.id)
+        module.state = problem_state(part1='b', part2='1')
+        module.save()
+        self.assertEqual(self.counts(), {('part1', 'b'): 1, ('part2', '1'): 1})
+
+        # saved unchanged
+        StudentModule.objects.get(id=module.id).save()
+        self.assertEqual(self.counts(), {('part1', 'b'): 1, ('part2', '1'): 1})
+
+        # reset
+        StudentModule.objects.get(id=module.id).delete()
+        self.assertEqual(self.counts(), {})
+
+    def test_concurrent_saves(self):
+        AnswerDistributionBackfill.objects.create(course_id=course_id, max_id=0, completed=True)
+        module = self.create_module(part1='a')
+
+        # two requests answer again from the same loaded state
+        first = StudentModule.objects.get(id=module.id)
+        second = StudentModule.objects.get(id=module.id)
+        first.state = problem_state(part1='b')
+        first.save()
+        second.state = problem_state(part1='c')
+        second.save()
+        self.assertEqual(self.counts(), {('part1', 'c'): 1})
+        self.assertFalse(AnswerDistribution.objects.filter(count__lt=0).exists())
+
+    def test_not_counted_before_backfill(self):
+        self.create_module(part1='a')
+        self.assertFalse(AnswerDistribution.objects.exists())
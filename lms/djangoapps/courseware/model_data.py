@@ -45,7 +45,7 @@ class FieldDataCache(object):
     A cache of django model objects needed to supply the data
     for a module and its decendants
     """
-    def __init__(self, descriptors, course_id, user, select_for_update=False):
+    def __init__(self, descriptors, course_id, user, select_for_update=False, bulk_cache=None):
         '''
         Find any courseware.models objects that are needed by any descriptor
         in descriptors. Attempts to minimize the number of queries to the database.
@@ -57,10 +57,14 @@ class FieldDataCache(object):
         course_id: The id of the current course
         user: The user for which to cache data
         select_for_update: True if rows should be locked until end of transaction
+        bulk_cache: An optional BulkFieldDataCache that was prefetched for
+            many users. Objects it covers are taken from it instead of
+            being queried.
         '''
         self.cache = {}
         self.descriptors = descriptors
         self.select_for_update = select_for_update
+        self.bulk_cache = bulk_cache
 
         assert isinstance(course_id, CourseKey)
         self.course_id = course_id
@@ -142,6 +146,11 @@ class FieldDataCache(object):
         """
         Queries the database for all of the fields in the specified scope
         """
+        if self.bulk_cache is not None and not self.select_for_update:
+            field_objects = self.bulk_cache.retrieve_fields(scope, fields, self.user, self.descriptors)
+            if field_objects is not None:
+                return field_objects
+
         if scope == Scope.user_state:
             return self._chunked_query(
                 StudentModule,
@@ -268,9 +277,142 @@ class FieldDataCache(object):
 
         cache_key = self._cache_key_from_kvs_key(key)
         self.cache[cache_key] = field_object
+        if self.bulk_cache is not None and key.scope == Scope.user_state:
+            self.bulk_cache.add_student_module(field_object)
         return field_object
 
 
+class BulkFieldDataCache(object):
+    """
+    A read-mostly cache of the courseware.models objects of many users for
+    many descriptors, fetched in a few chunked queries.
+
+    This is meant for bulk operations such as grading a whole course: a
+    FieldDataCache constructed with `bulk_cache` takes the objects covered
+    here from memory instead of querying for every descriptor and user.
+    """
+    def __init__(self, descriptors, course_id, users, chunk_size=500, user_chunk_size=100):
+        '''
+        Arguments
+        descriptors: A list of XModuleDescriptors to prefetch state for
+        course_id: The id of the current course
+        users: The users for which to cache data
+        chunk_size: Maximum number of usage ids per query
+        user_chunk_size: Maximum number of users per query
+        '''
+        assert isinstance(course_id, CourseKey)
+        self.course_id = course_id
+        self.chunk_size = chunk_size
+
+        self.usage_ids = set(descriptor.scope_ids.usage_id for descriptor in descriptors)
+        self.block_types = set(descriptor.scope_ids.block_type for descriptor in descriptors)
+        self.user_ids = set(user.pk for user in users if user.is_authenticated())
+
+        # user id -> {usage id -> StudentModule}
+        self._student_modules = defaultdict(dict)
+        # usage id -> [XModuleUserStateSummaryField]
+        self._user_state_summaries = defaultdict(list)
+        # user id -> [XModuleStudentPrefsField]
+        self._preferences = defaultdict(list)
+        # user id -> [XModuleStudentInfoField]
+        self._user_infos = defaultdict(list)
+
+        for summary in self._chunked_query(XModuleUserStateSummaryField, 'usage_id__in', self.usage_ids):
+            self._user_state_summaries[summary.usage_id.map_into_course(course_id)].append(summary)
+
+        for user_ids in chunks(self.user_ids, user_chunk_size):
+            for student_module in self._chunked_query(
+                StudentModule, 'module_state_key__in', self.usage_ids,
+                course_id=course_id, student__in=user_ids,
+            ):
+                self.add_student_module(student_module)
+
+            for preference in self._chunked_query(
+                XModuleStudentPrefsField, 'module_type__in', self.block_types, student__in=user_ids,
+            ):
+                self._preferences[preference.student_id].append(preference)
+
+            for user_info in XModuleStudentInfoField.objects.filter(student__in=user_ids):
+                self._user_infos[user_info.student_id].append(user_info)
+
+    def _chunked_query(self, model_class, chunk_field, items, **kwargs):
+        """
+        Queries model_class with `chunk_field` set to chunks of size
+        `self.chunk_size`, and all other parameters from `**kwargs`
+        """
+        return chain.from_iterable(
+            model_class.objects.filter(**dict([(chunk_field, chunk)] + kwargs.items()))
+            for chunk in chunks(items, self.chunk_size)
+        )
+
+    def add_student_module(self, student_module):
+        """
+        Add (or replace) a StudentModule in the cache, e.g. after it was
+        created by a FieldDataCache.
+        """
+        usage_id = student_module.module_state_key.map_into_course(self.course_id)
+        self._student_modules[student_module.student_id][usage_id] = student_module
+
+    def covers(self, user, usage_ids):
+        """
+        Return True if the StudentModules of `user` for all of `usage_ids`
+        were prefetched, so that a missing entry means there is no row.
+        """
+        return user.pk in self.user_ids and all(usage_id in self.usage_ids for usage_id in usage_ids)
+
+    def get_student_module(self, user, usage_id):
+        """
+        Return the StudentModule of `user` for `usage_id`, or None if the
+        user has no state for it. Only meaningful if `covers` is True.
+        """
+        return self._student_modules[user.pk].get(usage_id)
+
+    def has_student_modules(self, user, usage_ids):
+        """
+        Return True if `user` has a StudentModule for any of `usage_ids`.
+        Only meaningful if `covers` is True.
+        """
+        student_modules = self._student_modules[user.pk]
+        return any(usage_id in student_modules for usage_id in usage_ids)
+
+    def retrieve_fields(self, scope, fields, user, descriptors):
+        """
+        Return the cached objects for the fields in `scope` needed by
+        `descriptors` for `user`, or None if they weren't all prefetched.
+        """
+        usage_ids = [descriptor.scope_ids.usage_id for descriptor in descriptors]
+        field_names = set(field.name for field in fields)
+
+        if scope == Scope.user_state:
+            if not self.covers(user, usage_ids):
+                return None
+            student_modules = self._student_modules[user.pk]
+            return [student_modules[usage_id] for usage_id in usage_ids if usage_id in student_modules]
+        elif scope == Scope.user_state_summary:
+            if not all(usage_id in self.usage_ids for usage_id in usage_ids):
+                return None
+            return [
+                summary
+                for usage_id in usage_ids
+                for summary in self._user_state_summaries[usage_id]
+                if summary.field_name in field_names
+            ]
+        elif scope == Scope.preferences:
+            block_types = set(descriptor.scope_ids.block_type for descriptor in descriptors)
+            if user.pk not in self.user_ids or not block_types <= self.block_types:
+                return None
+            return [
+                preference for preference in self._preferences[user.pk]
+                if preference.module_type in block_types and preference.field_name in field_names
+            ]
+        elif scope == Scope.user_info:
+            if user.pk not in self.user_ids:
+                return None
+            return [user_info for user_info in self._user_infos[user.pk] if user_info.field_name in field_names]
+        else:
+            return None
+
+
 class DjangoKeyValueStore(KeyValueStore):
     """
     This KeyValueStore will read and write data in the following scopes to django models
@@ -12,14 +12,26 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+from collections import defaultdict
+from datetime import datetime
+import hashlib
+import json
+import logging
+
 from django.contrib.auth.models import User
 from django.conf import settings
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import IntegrityError, models, transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
+from pytz import UTC
 
+from xmodule.graders import Score
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule_django.models import CourseKeyField, LocationKeyField
 
+log = logging.getLogger(__name__)
+
 
 class StudentModule(models.Model):
     """
@@ -259,3 +271,672 @@ class OfflineComputedGradeLog(models.Model):
 
     def __unicode__(self):
         return "[OCGLog] %s: %s" % (self.course_id.to_deprecated_string(), self.created)  # pylint: disable=no-member
+
+
+class StudentGradeSummary(models.Model):
+    """
+    The grade of a student in a course as shown in the instructor gradebook.
+
+    The summaries are computed in the background by the refresh_gradebook
+    instructor task, so that the gradebook can be paginated, sorted and
+    searched by the database however large the course is.
+
+    When a score of the student changes, the summary is marked stale (see
+    `mark_stale`) until the student is graded again.
+    """
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+
+    # null if the student could not be graded
+    percent = models.FloatField(null=True, blank=True, db_index=True)
+    letter_grade = models.CharField(max_length=64, blank=True, db_index=True)
+
+    # JSON list of the {label, percent} of each section of the grade breakdown
+    sections = models.TextField(default='[]')
+    error = models.TextField(blank=True)
+
+    updated = models.DateTimeField(auto_now=True, db_index=True)
+    # when a score of the student last changed since the summary was
+    # computed, or null if the summary is up to date
+    stale_since = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        unique_together = (('user', 'course_id'),)
+
+    @classmethod
+    def save_gradeset(cls, user, course_id, gradeset, err_msg, graded_since):
+        """
+        Create or overwrite the summary of the student's `gradeset`, as
+        returned by courseware.grades.grade. An empty gradeset means the student
+        could not be graded because of `err_msg`.
+
+        The summary stays stale if a score changed after `graded_since`, when
+        the grading of the student started, since the gradeset may predate it.
+        """
+        row, _ = cls.objects.get_or_create(user=user, course_id=course_id)
+        if gradeset:
+            row.percent = gradeset['percent']
+            row.letter_grade = gradeset['grade'] or ''
+            row.set_sections(gradeset['section_breakdown'])
+            row.error = ''
+        else:
+            row.percent = None
+            row.letter_grade = ''
+            row.error = err_msg
+        row.updated = datetime.now(UTC)
+        values = {
+            'percent': row.percent,
+            'letter_grade': row.letter_grade,
+            'sections': row.sections,
+            'error': row.error,
+            'updated': row.updated,
+        }
+        rows = cls.objects.filter(pk=row.pk)
+        # some databases drop the microseconds of the stored times
+        graded_since = graded_since.replace(microsecond=0)
+        up_to_date = models.Q(stale_since__isnull=True) | models.Q(stale_since__lt=graded_since)
+        if rows.filter(up_to_date).update(stale_since=None, **values):
+            row.stale_since = None
+        else:
+            rows.update(**values)
+        return row
+
+    @classmethod
+    def mark_stale(cls, user_id, course_id):
+        """
+        Record that a score of the student changed since their summary was
+        computed.
+        """
+        cls.objects.filter(user__id=user_id, course_id=course_id).update(stale_since=datetime.now(UTC))
+
+    @classmethod
+    def enrolled_in(cls, course_id):
+        """
+        Return the summaries of the students enrolled in `course_id`.
+        """
+        return cls.objects.filter(
+            course_id=course_id,
+            user__courseenrollment__course_id=course_id,
+            user__courseenrollment__is_active=True,
+        )
+
+    @classmethod
+    def with_students(cls, students, course_id):
+        """
+        Add to the User queryset `students` the percent of their summary in
+        `course_id` as `summary_percent`, which is None for the students who
+        have no summary yet, so that they can be sorted by grade.
+        """
+        return students.extra(
+            select={'summary_percent': (
+                'SELECT {summary}.percent FROM {summary} '
+                'WHERE {summary}.user_id = {user}.id AND {summary}.course_id = %s'
+            ).format(summary=cls._meta.db_table, user=User._meta.db_table)},
+            select_params=(course_id.to_deprecated_string(),),
+        )
+
+    @classmethod
+    def students_with_letter_grade(cls, students, course_id, letter_grade):
+        """
+        Filter the User queryset `students` down to those whose summary in
+        `course_id` has `letter_grade`.
+        """
+        return students.extra(
+            where=[(
+                'EXISTS (SELECT 1 FROM {summary} WHERE {summary}.user_id = {user}.id '
+                'AND {summary}.course_id = %s AND {summary}.letter_grade = %s)'
+            ).format(summary=cls._meta.db_table, user=User._meta.db_table)],
+            params=(course_id.to_deprecated_string(), letter_grade),
+        )
+
+    @classmethod
+    def outdated_students(cls, course_id):
+        """
+        Return the students enrolled in `course_id` who have no summary, or a
+        stale one.
+        """
+        up_to_date = cls.objects.filter(course_id=course_id, stale_since__isnull=True)
+        return User.objects.filter(
+            courseenrollment__course_id=course_id,
+            courseenrollment__is_active=True,
+        ).exclude(id__in=up_to_date.values('user_id'))
+
+    @classmethod
+    def last_updated(cls, course_id):
+        """
+        Return when a summary of `course_id` was last updated, or None.
+        """
+        return cls.objects.filter(course_id=course_id).aggregate(models.Max('updated'))['updated__max']
+
+    def get_sections(self):
+        """
+        Return the list of {label, percent} of the sections of the grade.
+        """
+        return json.loads(self.sections)
+
+    def set_sections(self, section_breakdown):
+        """
+        Serialize the labels and percents of a section breakdown.
+        """
+        self.sections = json.dumps([
+            {'label': section['label'], 'percent': section.get('percent', 0.0)}
+            for section in section_breakdown
+        ])
+
+    def __unicode__(self):
+        return u"[StudentGradeSummary] {}: {} = {}".format(self.user_id, self.course_id, self.percent)
+
+
+class PersistentSectionGrade(models.Model):
+    """
+    Stores the raw problem scores of one graded section (subsection) for one
+    student, so that grading a student does not have to instantiate every
+    problem in the course on every request.
+
+    A row is only trusted while it is not `dirty` and its `content_version`
+    matches the section's current version; otherwise the section is
+    recomputed and the row rewritten. Rows are marked dirty whenever a score
+    inside the section changes (see `invalidate`).
+
+    Every time a row is marked dirty its `version` is incremented, and
+    recomputed scores are only saved if the version is still the one read
+    before the computation started (see `save_scores`), so that a score
+    change made while the section is being graded is never lost.
+    """
+    # Depth limit when walking up from a problem to its section
+    MAX_PARENT_DEPTH = 10
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+
+    # Location of the graded section (usually a sequential)
+    section_key = LocationKeyField(max_length=255, db_index=True)
+
+    # Version of the section content these scores were computed against
+    content_version = models.CharField(max_length=255, blank=True, default='')
+
+    # JSON list of {location, earned, possible, graded, section} dicts, one per
+    # scored module in the section, or null if the student never attempted
+    # anything in the section.
+    scores = models.TextField(null=True, blank=True)
+
+    dirty = models.BooleanField(default=False, db_index=True)
+    version = models.IntegerField(default=0)
+
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        unique_together = (('user', 'course_id', 'section_key'),)
+
+    @classmethod
+    def get_for_student(cls, user, course_id):
+        """
+        Return a dict of section location -> PersistentSectionGrade for all
+        stored sections of `user` in `course_id`, fetched with a single query.
+        """
+        return {
+            row.section_key.map_into_course(course_id): row
+            for row in cls.objects.filter(user=user, course_id=course_id)
+        }
+
+    @classmethod
+    def reserve(cls, user, course_id, section_key):
+        """
+        Return the stored grade of a section which has none yet, creating it
+        dirty, so that score changes made while the section is being computed
+        for the first time are recorded on it.
+        """
+        row, _ = cls.objects.get_or_create(
+            user=user, course_id=course_id, section_key=section_key, defaults={'dirty': True}
+        )
+        return row
+
+    @classmethod
+    def save_scores(cls, stored_grade, content_version, scores):
+        """
+        Overwrite the scores of the stored grade `stored_grade`, as read before
+        the scores were computed, and mark it clean.
+
+        `scores` is a list of (location, Score) tuples, or None if the student
+        has not attempted the section.
+
+        Nothing is saved if the row was marked dirty after `stored_grade` was
+        read, since the scores may then predate the change. Returns whether
+        the scores were saved.
+        """
+        stored_grade.content_version = content_version
+        stored_grade.set_scores(scores)
+        stored_grade.dirty = False
+        stored_grade.modified = datetime.now(UTC)
+        return bool(cls.objects.filter(pk=stored_grade.pk, version=stored_grade.version).update(
+            content_version=stored_grade.content_version,
+            scores=stored_grade.scores,
+            dirty=False,
+            modified=stored_grade.modified,
+        ))
+
+    @classmethod
+    def mark_dirty(cls, user_id, course_id, section_keys=None):
+        """
+        Flag the stored sections of a student as needing recomputation. If
+        `section_keys` is None, every section of the course is flagged.
+        """
+        rows = cls.objects.filter(user__id=user_id, course_id=course_id)
+        if section_keys is not None:
+            rows = rows.filter(section_key__in=section_keys)
+        rows.update(dirty=True, version=models.F('version') + 1)
+
+    @classmethod
+    def section_key_for(cls, usage_key):
+        """
+        Return the location of the section (the child of a chapter) that
+        contains `usage_key`, or None if it can't be determined.
+        """
+        store = modulestore()
+        child = usage_key
+        for __ in range(cls.MAX_PARENT_DEPTH):
+            try:
+                parent = store.get_parent_location(child)
+            except ItemNotFoundError:
+                return None
+            if parent is None or parent.category == 'course':
+                return None
+            if parent.category == 'chapter':
+                return child
+            child = parent
+        return None
+
+    @classmethod
+    def invalidate(cls, user_id, course_id, usage_key):
+        """
+        Mark the stored section grade containing `usage_key` dirty for the
+        given student. If the section can't be located, all of the student's
+        sections in the course are marked dirty instead.
+        """
+        if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+            return
+        try:
+            section_key = cls.section_key_for(usage_key.map_into_course(course_id))
+        except Exception:  # pylint: disable=broad-except
+            log.exception(u"Could not find the section of %s; invalidating the whole course", usage_key)
+            section_key = None
+        cls.mark_dirty(user_id, course_id, [section_key] if section_key is not None else None)
+
+    def get_scores(self):
+        """
+        Return the stored scores as a list of (location string, Score) tuples,
+        or None if the section was never attempted.
+        """
+        if self.scores is None:
+            return None
+        return [
+            (entry['location'], Score(entry['earned'], entry['possible'], entry['graded'], entry['section']))
+            for entry in json.loads(self.scores)
+        ]
+
+    def set_scores(self, scores):
+        """
+        Serialize a list of (location string, Score) tuples, or None.
+        """
+        if scores is None:
+            self.scores = None
+            return
+        self.scores = json.dumps([
+            {
+                'location': location,
+                'earned': score.earned,
+                'possible': score.possible,
+                'graded': score.graded,
+                'section': score.section,
+            }
+            for location, score in scores
+        ])
+
+    def __unicode__(self):
+        return u"[PersistentSectionGrade] {}: {} {}{}".format(
+            self.user_id, self.course_id, self.section_key, " (dirty)" if self.dirty else ""
+        )
+
+
+class ProblemMaxScore(models.Model):
+    """
+    Index of the max scores of the problems of a course, so that the totals of
+    problems a student hasn't attempted can be known without instantiating them.
+
+    A row is only trusted while its `definition_hash` matches the hash of the
+    problem's current definition (see `definition_hash_for`). Problems whose max
+    score turns out to depend on the student (e.g. on their seed) are flagged
+    `student_dependent`, and are always instantiated.
+    """
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    module_state_key = LocationKeyField(max_length=255)
+
+    # SHA1 of the definition the max score was computed from
+    definition_hash = models.CharField(max_length=40)
+
+    max_score = models.FloatField(null=True, blank=True)
+    student_dependent = models.BooleanField(default=False)
+
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        unique_together = (('course_id', 'module_state_key'),)
+
+    @staticmethod
+    def definition_hash_for(descriptor):
+        """
+        Return the hash of everything the max score of `descriptor` depends on,
+        or None if its max score can't be indexed.
+        """
+        definition = getattr(descriptor, 'max_score_definition', None)
+        if definition is None:
+            return None
+        if isinstance(definition, unicode):
+            definition = definition.encode('utf-8')
+        return hashlib.sha1(definition).hexdigest()
+
+    @classmethod
+    def get_for_course(cls, course_id):
+        """
+        Return a dict of problem location -> ProblemMaxScore for all the indexed
+        problems of `course_id`, fetched with a single query.
+        """
+        return {
+            row.module_state_key.map_into_course(course_id): row
+            for row in cls.objects.filter(course_id=course_id)
+        }
+
+    @classmethod
+    def save_max_score(cls, course_id, location, definition_hash, max_score, student_dependent=False):
+        """
+        Create or overwrite the indexed max score of a problem.
+        """
+        row, _ = cls.objects.get_or_create(course_id=course_id, module_state_key=location)
+        row.definition_hash = definition_hash
+        row.max_score = max_score
+        row.student_dependent = student_dependent
+        row.save()
+        return row
+
+    def __unicode__(self):
+        return u"[ProblemMaxScore] {} {}: {}{}".format(
+            self.course_id, self.module_state_key, self.max_score,
+            " (student dependent)" if self.student_dependent else ""
+        )
+
+
+class XQueueSubmission(models.Model):
+    """
+    Outbox of the submissions to the external grader (xqueue), written while
+    handling a request and sent later by the flush_xqueue_outbox command.
+
+    Sent submissions are deleted. Those which failed to be sent are retried
+    with an exponential backoff (see `record_failure`), until `failed` is set
+    after too many attempts.
+    """
+    # arguments of XQueueInterface.send_to_queue
+    header = models.TextField()
+    body = models.TextField()
+
+    created = models.DateTimeField(auto_now_add=True)
+    # when the submission should be sent next
+    next_attempt = models.DateTimeField(db_index=True)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    failed = models.BooleanField(default=False, db_index=True)
+
+    @classmethod
+    def enqueue(cls, header, body):
+        """
+        Add a submission to the outbox, to be sent as soon as possible.
+        """
+        return cls.objects.create(header=header, body=body, next_attempt=datetime.now(UTC))
+
+    @classmethod
+    def due(cls, limit):
+        """
+        Return the (at most `limit`) oldest submissions due to be sent.
+        """
+        return list(
+            cls.objects.filter(failed=False, next_attempt__lte=datetime.now(UTC)).order_by('id')[:limit]
+        )
+
+    def claim(self, lease):
+        """
+        Postpone the next attempt of the submission by `lease` (a timedelta),
+        unless another worker claimed it first.
+
+        Returns whether the submission was claimed.
+        """
+        next_attempt = datetime.now(UTC) + lease
+        claimed = XQueueSubmission.objects.filter(
+            id=self.id, next_attempt=self.next_attempt
+        ).update(next_attempt=next_attempt)
+        self.next_attempt = next_attempt
+        return claimed == 1
+
+    def record_failure(self, error, max_attempts, base_delay, max_delay):
+        """
+        Schedule the next attempt of the submission after an `error`, or give up
+        on it after `max_attempts` attempts. The delay between attempts doubles
+        from `base_delay` up to `max_delay` (timedeltas).
+        """
+        self.attempts += 1
+        self.last_error = error
+        if self.attempts >= max_attempts:
+            self.failed = True
+        else:
+            self.next_attempt = datetime.now(UTC) + min(base_delay * 2 ** (self.attempts - 1), max_delay)
+        self.save()
+
+    def __unicode__(self):
+        return u"[XQueueSubmission] {} ({} attempts{})".format(
+            self.id, self.attempts, ", failed" if self.failed else ""
+        )
+
+
+class AnswerDistribution(models.Model):
+    """
+    Number of submitted problems (StudentModule rows of type 'problem' with a
+    grade) whose state has `answer` for the part `part_id` of a problem, so that
+    the answer distributions of a course can be reported without reading the
+    state of every student.
+
+    The counts are kept up to date as the state of the students is saved (see
+    `count_answers_on_save`), once the existing states of the course have been
+    counted by the backfill_answer_distributions command (see
+    AnswerDistributionBackfill).
+    """
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    module_state_key = LocationKeyField(max_length=255)
+    part_id = models.CharField(max_length=255)
+    answer = models.TextField()
+
+    # SHA1 of the course, problem, part and answer, as the answer is too long to be indexed
+    answer_key = models.CharField(max_length=40, unique=True)
+
+    count = models.IntegerField(default=0)
+
+    @staticmethod
+    def answer_key_for(course_id, module_state_key, part_id, answer):
+        """
+        Return the `answer_key` of the count of `answer` to a part of a problem.
+        """
+        key = u"\n".join([
+            course_id.to_deprecated_string(), module_state_key.to_deprecated_string(), part_id, answer
+        ])
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def submitted_answers(module_type, grade, state):
+        """
+        Return a dict of part id -> unicode answer of the state of a
+        StudentModule, which is empty unless the state is of a submitted problem.
+        """
+        if module_type != 'problem' or grade is None or not state:
+            return {}
+        try:
+            raw_answers = json.loads(state).get('student_answers') or {}
+        except (ValueError, AttributeError):
+            return {}
+        return {part_id: unicode(raw_answer) for part_id, raw_answer in raw_answers.items()}
+
+    @classmethod
+    def add_counts(cls, course_id, module_state_key, deltas):
+        """
+        Add `deltas`, a dict of (part id, answer) -> number, to the counts of
+        the answers to the problem `module_state_key`.
+        """
+        for (part_id, answer), delta in deltas.iteritems():
+            if not delta:
+                continue
+            answer_key = cls.answer_key_for(course_id, module_state_key, part_id, answer)
+            if cls.objects.filter(answer_key=answer_key).update(count=models.F('count') + delta):
+                continue
+            sid = transaction.savepoint()
+            try:
+                cls.objects.create(
+                    course_id=course_id, module_state_key=module_state_key, part_id=part_id,
+                    answer=answer, answer_key=answer_key, count=delta
+                )
+                transaction.savepoint_commit(sid)
+            except IntegrityError:
+                # created by another process in the meantime
+                transaction.savepoint_rollback(sid)
+                cls.objects.filter(answer_key=answer_key).update(count=models.F('count') + delta)
+
+    @classmethod
+    def get_for_course(cls, course_id):
+        """
+        Return the counts of the answers of a course, with a single query.
+        """
+        return cls.objects.filter(course_id=course_id, count__gt=0)
+
+    def __unicode__(self):
+        return u"[AnswerDistribution] {} {} {!r}: {}".format(
+            self.module_state_key, self.part_id, self.answer, self.count
+        )
+
+
+class AnswerDistributionBackfill(models.Model):
+    """
+    Progress of the counting of the answers of the existing states of a
+    course (StudentModule rows), by the backfill_answer_distributions command.
+
+    The rows with ids up to `max_id` are counted by the command, in chunks of
+    increasing ids. Those up to `last_id` are counted, and kept up to date as
+    they are saved, as are the rows created since the backfill started (ids
+    above `max_id`). Once `completed`, the answer distributions of the course are
+    read from AnswerDistribution.
+    """
+    course_id = CourseKeyField(max_length=255, unique=True)
+
+    # the id of the last state of the course when the backfill started, null
+    # until it's known
+    max_id = models.IntegerField(null=True, blank=True)
+    # the id of the last state counted by the backfill
+    last_id = models.IntegerField(default=0)
+    completed = models.BooleanField(default=False)
+
+    created = models.DateTimeField(auto_now_add=True)
+    modified = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def is_completed(cls, course_id):
+        """
+        Return whether the answer distributions of the course are counted.
+        """
+        return cls.objects.filter(course_id=course_id, completed=True).exists()
+
+    def counts(self, student_module_id):
+        """
+        Return whether the answers of the StudentModule `student_module_id`
+        are counted.
+        """
+        if self.max_id is None:
+            return False
+        return student_module_id <= self.last_id or student_module_id > self.max_id
+
+    def __unicode__(self):
+        return u"[AnswerDistributionBackfill] {}: {}/{}{}".format(
+            self.course_id, self.last_id, self.max_id, " (completed)" if self.completed else ""
+        )
+
+
+@receiver(post_delete, sender=StudentModule)
+def invalidate_section_grade_on_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Deleting a student's module state (e.g. an instructor resetting a
+    problem) changes that student's score, so the stored section is stale.
+    """
+    PersistentSectionGrade.invalidate(instance.student_id, instance.course_id, instance.module_state_key)
+    StudentGradeSummary.mark_stale(instance.student_id, instance.course_id)
+
+
+@receiver(pre_save, sender=StudentModule)
+@receiver(pre_delete, sender=StudentModule)
+def read_counted_answers(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Before the state of a problem is saved or deleted, read the answers it is
+    counted with, from the row as it is stored rather than as it was loaded.
+
+    The row is locked until the end of the transaction, so that concurrent
+    saves of the same state each count the change from the answers counted
+    by the other one, rather than both from the answers they loaded.
+    """
+    # pylint: disable=protected-access
+    instance._answers_backfill = None
+    instance._counted_answers = {}
+    if instance.module_type != 'problem':
+        return
+    try:
+        instance._answers_backfill = AnswerDistributionBackfill.objects.get(course_id=instance.course_id)
+    except AnswerDistributionBackfill.DoesNotExist:
+        return
+    if instance.pk is not None and instance._answers_backfill.counts(instance.pk):
+        stored = StudentModule.objects.select_for_update().filter(pk=instance.pk).values_list('grade', 'state')
+        if stored:
+            instance._counted_answers = AnswerDistribution.submitted_answers('problem', *stored[0])
+
+
+def _count_answer_changes(instance, new_answers):
+    """
+    Update the answer distributions of the course of `instance` for its
+    answers changing from those read by `read_counted_answers` to
+    `new_answers`, if they're counted.
+    """
+    # pylint: disable=protected-access
+    backfill = getattr(instance, '_answers_backfill', None)
+    if backfill is None or not backfill.counts(instance.id):
+        return
+
+    deltas = defaultdict(int)
+    for part_id, answer in instance._counted_answers.iteritems():
+        deltas[(part_id, answer)] -= 1
+    for part_id, answer in new_answers.iteritems():
+        deltas[(part_id, answer)] += 1
+    AnswerDistribution.add_counts(instance.course_id, instance.module_state_key, deltas)
+    instance._counted_answers = new_answers
+
+
+@receiver(post_save, sender=StudentModule)
+def count_answers_on_save(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Update the answer distributions when a student submits a problem (which
+    saves its state and its grade).
+    """
+    if instance.module_type == 'problem':
+        _count_answer_changes(
+            instance, AnswerDistribution.submitted_answers('problem', instance.grade, instance.state)
+        )
+
+
+@receiver(post_delete, sender=StudentModule)
+def uncount_answers_on_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Remove the answers of a deleted state from the answer distributions.
+    """
+    if instance.module_type == 'problem':
+        _count_answer_changes(instance, {})
@@ -0,0 +1,70 @@
+"""
+Tests for the summaries of courses listed on the student dashboard.
+"""
+from django.test.utils import override_settings
+from mock import patch
+
+from courseware.access import has_access
+from courseware.course_summaries import CourseSummary, get_course_summaries
+from courseware.courses import course_image_url
+from courseware.tests.modulestore_config import TEST_DATA_MIXED_MODULESTORE
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from student.tests.factories import UserFactory
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+
+
+class DictCache(object):
+    """
+    Stands in for the general cache.
+    """
+    def __init__(self):
+        self.data = {}
+
+    def get_many(self, keys):
+        """Get the keys found in the cache."""
+        return {key: self.data[key] for key in keys if key in self.data}
+
+    def set_many(self, data, timeout=None):  # pylint: disable=unused-argument
+        """Set several keys in the cache."""
+        self.data.update(data)
+
+
+@override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
+class CourseSummariesTest(ModuleStoreTestCase):
+    """
+    Tests for get_course_summaries.
+    """
+    def setUp(self):
+        self.course = CourseFactory.create(display_name='Robot Super Course')
+
+    def test_summary(self):
+        summaries = get_course_summaries([self.course.id])
+        summary = summaries[self.course.id]
+        self.assertIsInstance(summary, CourseSummary)
+        self.assertEqual(summary.display_name_with_default, 'Robot Super Course')
+        self.assertEqual(summary.display_org_with_default, self.course.display_org_with_default)
+        self.assertEqual(summary.course_image_url, course_image_url(self.course))
+        self.assertEqual(summary.start_date_text, self.course.start_date_text)
+        self.assertEqual(summary.has_started(), self.course.has_started())
+        self.assertEqual(summary.may_certify(), self.course.may_certify())
+
+    def test_missing_course(self):
+        missing_key = SlashSeparatedCourseKey('missing', 'course', 'run')
+        summaries = get_course_summaries([self.course.id, missing_key])
+        self.assertEqual(summaries.keys(), [self.course.id])
+
+    def test_cached(self):
+        with patch('courseware.course_summaries.cache', DictCache()):
+            get_course_summaries([self.course.id])
+            with patch('courseware.course_summaries.modulestore') as mock_modulestore:
+                summaries = get_course_summaries([self.course.id])
+        self.assertFalse(mock_modulestore.called)
+        self.assertEqual(summaries[self.course.id].id, self.course.id)
+
+    def test_has_access(self):
+        summary = get_course_summaries([self.course.id])[self.course.id]
+        user = UserFactory.create()
+        self.assertEqual(has_access(user, 'load', summary), has_access(user, 'load', self.course))
+        self.assertFalse(has_access(user, 'staff', summary))
+        self.assertTrue(has_access(UserFactory.create(is_staff=True), 'staff', summary))
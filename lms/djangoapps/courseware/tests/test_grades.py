@@ -2,19 +2,28 @@
 Test grade calculation.
 """
 from django.http import Http404
+from django.test import TransactionTestCase
 from django.test.utils import override_settings
-from mock import patch
+from mock import Mock, patch
 
+from django.test.client import RequestFactory
+from capa.tests.response_xml_factory import OptionResponseXMLFactory
+from courseware.model_data import FieldDataCache
+from courseware.module_render import get_module
+from courseware.tests.factories import StudentModuleFactory
 from courseware.tests.modulestore_config import TEST_DATA_MIXED_MODULESTORE
 from student.tests.factories import UserFactory
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.django import modulestore, clear_existing_modulestores
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
-from courseware.grades import grade, iterate_grades_for
+from courseware import grades
+from courseware.grades import grade, iterate_grades_for, find_stale_section_grades, get_score
+from courseware.models import PersistentSectionGrade, ProblemMaxScore
 
 
-def _grade_with_errors(student, request, course, keep_raw_scores=False):
+def _grade_with_errors(student, request, course, keep_raw_scores=False, bulk_cache=None):
     """This fake grade method will throw exceptions for student3 and
     student4, but allow any other students to go through normal grading.
 
@@ -25,7 +34,7 @@ def _grade_with_errors(student, request, course, keep_raw_scores=False):
     if student.username in ['student3', 'student4']:
         raise Exception("I don't like {}".format(student.username))
 
-    return grade(student, request, course, keep_raw_scores=keep_raw_scores)
+    return grade(student, request, course, keep_raw_scores=keep_raw_scores, bulk_cache=bulk_cache)
 
 
 @override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
@@ -106,8 +115,17 @@ class TestGradeIteration(ModuleStoreTestCase):
         self.assertTrue(all_gradesets[student2])
         self.assertTrue(all_gradesets[student5])
 
+    def test_batches_share_prefetched_state(self):
+        """Every student of a batch is graded against the same prefetched cache"""
+        with patch('courseware.grades.grade', wraps=grade) as mock_grade:
+            all_gradesets, all_errors = self._gradesets_and_errors_for(self.course.id, self.students, batch_size=2)
+        self.assertEqual(len(all_errors), 0)
+        self.assertEqual(len(all_gradesets), 5)
+        bulk_caches = [call[1]['bulk_cache'] for call in mock_grade.call_args_list]
+        self.assertEqual(len(set(id(bulk_cache) for bulk_cache in bulk_caches)), 3)
+
     ################################# Helpers #################################
-    def _gradesets_and_errors_for(self, course_id, students):
+    def _gradesets_and_errors_for(self, course_id, students, **kwargs):
         """Simple helper method to iterate through student grades and give us
         two dictionaries -- one that has all students and their respective
         gradesets, and one that has only students that could not be graded and
@@ -115,9 +133,271 @@ class TestGradeIteration(ModuleStoreTestCase):
         students_to_gradesets = {}
         students_to_errors = {}
 
-        for student, gradeset, err_msg in iterate_grades_for(course_id, students):
+        for student, gradeset, err_msg in iterate_grades_for(course_id, students, **kwargs):
             students_to_gradesets[student] = gradeset
             if err_msg:
                 students_to_errors[student] = err_msg
 
         return students_to_gradesets, students_to_errors
+
+
+@override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
+class TestGradeIterationWithoutTransaction(TransactionTestCase):
+    """
+    Test iterating through gradesets outside of transaction management, as
+    the grade report tasks and the rebuild_persistent_grades command do.
+    """
+    def setUp(self):
+        clear_existing_modulestores()
+        self.addCleanup(clear_existing_modulestores)
+        self.addCleanup(ModuleStoreTestCase.drop_mongo_collections)
+        self.course = CourseFactory.create()
+        self.students = [UserFactory.create(username='student{}'.format(index)) for index in range(3)]
+
+    def test_not_under_transaction_management(self):
+        results = list(iterate_grades_for(self.course.id, self.students, batch_size=2))
+        self.assertEqual([student for student, __, __ in results], self.students)
+        self.assertEqual([err_msg for __, __, err_msg in results], ['', '', ''])
+
+
+@override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
+@patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_GRADES': True})
+class TestPersistentSectionGrades(ModuleStoreTestCase):
+    """
+    Test that section grades are stored, reused and invalidated.
+    """
+    def setUp(self):
+        course = CourseFactory.create()
+        chapter = ItemFactory.create(parent_location=course.location, category='chapter')
+        self.section = ItemFactory.create(
+            parent_location=chapter.location,
+            category='sequential',
+            display_name='Homework 1',
+            metadata={'graded': True, 'format': 'Homework'}
+        )
+        self.problem = ItemFactory.create(
+            parent_location=self.section.location,
+            category='problem',
+            display_name='Problem 1',
+            data=OptionResponseXMLFactory().build_xml(
+                question_text='The correct answer is Correct',
+                num_inputs=2,
+                weight=2,
+                options=['Correct', 'Incorrect'],
+                correct_option='Correct'
+            )
+        )
+        self.course = modulestore().get_course(course.id)
+        self.student = UserFactory.create()
+        self.request = RequestFactory().get('/')
+        self.request.user = self.student
+        self.request.session = {}
+
+    def _stored_grade(self):
+        """Return the stored grade of the only graded section"""
+        return PersistentSectionGrade.objects.get(
+            user=self.student, course_id=self.course.id, section_key=self.section.location
+        )
+
+    def _answer_problem(self, earned, possible):
+        """Score the student on the problem through the grade event of its runtime"""
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+            self.course.id, self.student, self.course, depth=None
+        )
+        module = get_module(self.student, self.request, self.problem.location, field_data_cache)._xmodule
+        module.system.publish(module, 'grade', {'value': earned, 'max_value': possible})
+
+    def _grade_answering_meanwhile(self, earned, possible):
+        """Grade the student, who gets scored on the problem while the section is being computed"""
+        compute_section_scores = grades._compute_section_scores
+
+        def compute_and_answer(*args, **kwargs):
+            """Compute the scores of the section, then score the student before they are saved"""
+            located_scores = compute_section_scores(*args, **kwargs)
+            self._answer_problem(earned, possible)
+            return located_scores
+
+        with patch('courseware.grades._compute_section_scores', side_effect=compute_and_answer):
+            grade(self.student, self.request, self.course)
+
+    def test_unattempted_section_is_stored(self):
+        grade(self.student, self.request, self.course)
+        stored = self._stored_grade()
+        self.assertFalse(stored.dirty)
+        self.assertIsNone(stored.get_scores())
+
+    def test_stored_section_is_not_recomputed(self):
+        self._answer_problem(1, 2)
+        first = grade(self.student, self.request, self.course)
+        with patch('courseware.grades._compute_section_scores') as mock_compute:
+            second = grade(self.student, self.request, self.course)
+        self.assertFalse(mock_compute.called)
+        self.assertEqual(first['percent'], second['percent'])
+
+    def test_score_change_marks_section_dirty(self):
+        grade(self.student, self.request, self.course)
+        self._answer_problem(2, 2)
+        self.assertTrue(self._stored_grade().dirty)
+
+        summary = grade(self.student, self.request, self.course)
+        self.assertEqual(summary['percent'], 1.0)
+        stored = self._stored_grade()
+        self.assertFalse(stored.dirty)
+        self.assertEqual(
+            [(score.earned, score.possible) for __, score in stored.get_scores()],
+            [(2, 2)]
+        )
+
+    def test_score_change_while_grading_keeps_section_dirty(self):
+        self._answer_problem(1, 2)
+        grade(self.student, self.request, self.course)
+        self._answer_problem(0, 2)
+        self._grade_answering_meanwhile(2, 2)
+        self.assertTrue(self._stored_grade().dirty)
+        self.assertEqual(grade(self.student, self.request, self.course)['percent'], 1.0)
+        self.assertFalse(self._stored_grade().dirty)
+
+    def test_score_change_while_first_grading_keeps_section_dirty(self):
+        self._grade_answering_meanwhile(2, 2)
+        self.assertTrue(self._stored_grade().dirty)
+        self.assertEqual(grade(self.student, self.request, self.course)['percent'], 1.0)
+
+    def test_submissions_score_in_unattempted_section_recomputes(self):
+        grade(self.student, self.request, self.course)
+        self.assertIsNone(self._stored_grade().get_scores())
+        submissions_scores = {self.problem.location.to_deprecated_string(): (1, 2)}
+        with patch('courseware.grades.sub_api.get_scores', return_value=submissions_scores):
+            with patch('courseware.grades._compute_section_scores', return_value=grades.NOT_ATTEMPTED) as mock_compute:
+                grade(self.student, self.request, self.course)
+        self.assertTrue(mock_compute.called)
+
+    def test_content_version_mismatch_recomputes(self):
+        self._answer_problem(1, 2)
+        grade(self.student, self.request, self.course)
+        PersistentSectionGrade.objects.filter(user=self.student).update(content_version='outdated')
+        with patch('courseware.grades._compute_section_scores', return_value=grades.NOT_ATTEMPTED) as mock_compute:
+            grade(self.student, self.request, self.course)
+        self.assertTrue(mock_compute.called)
+
+    def test_consistency_check(self):
+        self._answer_problem(2, 2)
+        grade(self.student, self.request, self.course)
+        self.assertEqual(find_stale_section_grades(self.student, self.request, self.course), [])
+
+        # Tamper with the stored score behind the store's back
+        stored = self._stored_grade()
+        location, score = stored.get_scores()[0]
+        stored.set_scores([(location, score._replace(earned=0))])
+        stored.save()
+        self.assertEqual(
+            find_stale_section_grades(self.student, self.request, self.course),
+            [self.section.location]
+        )
+
+
+@override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
+class TestProblemMaxScoreIndex(ModuleStoreTestCase):
+    """
+    Test that the max scores of unattempted problems are indexed and reused.
+    """
+    def setUp(self):
+        self.course = CourseFactory.create()
+        self.problem = ItemFactory.create(
+            parent_location=self.course.location,
+            category='problem',
+            data=OptionResponseXMLFactory().build_xml(
+                question_text='The correct answer is Correct',
+                num_inputs=2,
+                options=['Correct', 'Incorrect'],
+                correct_option='Correct'
+            )
+        )
+        self.student = UserFactory.create()
+
+    def _module_creator(self, max_score=2.0):
+        """Return a mock module creator of problems worth `max_score`"""
+        return Mock(return_value=Mock(max_score=Mock(return_value=max_score)))
+
+    def test_max_score_is_indexed(self):
+        max_scores = {}
+        module_creator = self._module_creator()
+        self.assertEqual(
+            get_score(self.course.id, self.student, self.problem, module_creator, max_scores=max_scores),
+            (0.0, 2.0)
+        )
+        self.assertTrue(module_creator.called)
+        self.assertEqual(ProblemMaxScore.get_for_course(self.course.id)[self.problem.location].max_score, 2.0)
+
+        # another student doesn't need the problem to be instantiated
+        module_creator = self._module_creator()
+        other_student = UserFactory.create()
+        self.assertEqual(
+            get_score(self.course.id, other_student, self.problem, module_creator, max_scores=max_scores),
+            (0.0, 2.0)
+        )
+        self.assertFalse(module_creator.called)
+
+    def test_changed_definition_is_reindexed(self):
+        ProblemMaxScore.save_max_score(self.course.id, self.problem.location, 'outdated', 5.0)
+        max_scores = ProblemMaxScore.get_for_course(self.course.id)
+        module_creator = self._module_creator()
+        self.assertEqual(
+            get_score(self.course.id, self.student, self.problem, module_creator, max_scores=max_scores),
+            (0.0, 2.0)
+        )
+        self.assertTrue(module_creator.called)
+        row = ProblemMaxScore.get_for_course(self.course.id)[self.problem.location]
+        self.assertEqual(row.definition_hash, ProblemMaxScore.definition_hash_for(self.problem))
+        self.assertEqual(row.max_score, 2.0)
+
+    def test_student_dependent_max_score(self):
+        max_scores = {}
+        get_score(self.course.id, self.student, self.problem, self._module_creator(), max_scores=max_scores)
+
+        # a student was graded out of a different total
+        other_student = UserFactory.create()
+        StudentModuleFactory.create(
+            student=other_student,
+            course_id=self.course.id,
+            module_state_key=self.problem.location,
+            grade=1,
+            max_grade=3,
+        )
+        get_score(self.course.id, other_student, self.problem, self._module_creator(), max_scores=max_scores)
+        self.assertTrue(ProblemMaxScore.get_for_course(self.course.id)[self.problem.location].student_dependent)
+
+        # so the problem is always instantiated
+        module_creator = self._module_creator()
+        get_score(self.course.id, UserFactory.create(), self.problem, module_creator, max_scores=max_scores)
+        self.assertTrue(module_creator.called)
+
+    def test_seed_dependent_problems_are_not_indexed(self):
+        randomized = ItemFactory.create(
+            parent_location=self.course.location,
+            category='problem',
+            data=self.problem.data,
+            metadata={'rerandomize': 'per_student'}
+        )
+        scripted = ItemFactory.create(
+            parent_location=self.course.location,
+            category='problem',
+            data='<problem><script type="loncapa/python">n = random.randint(1, 3)</script></problem>'
+        )
+        max_scores = {}
+        for problem in (randomized, scripted):
+            get_score(self.course.id, self.student, problem, self._module_creator(), max_scores=max_scores)
+
+            # every student gets the problem instantiated
+            module_creator = self._module_creator()
+            get_score(self.course.id, UserFactory.create(), problem, module_creator, max_scores=max_scores)
+            self.assertTrue(module_creator.called)
+        self.assertEqual(ProblemMaxScore.get_for_course(self.course.id), {})
+
+    def test_no_access(self):
+        max_scores = {}
+        get_score(self.course.id, self.student, self.problem, self._module_creator(), max_scores=max_scores)
+        with patch('courseware.grades.has_access', return_value=False):
+            self.assertEqual(
+                get_score(self.course.id, self.student, self.problem, Mock(return_value=None), max_scores=max_scores),
+                (None, None)
+            )
@@ -6,7 +6,7 @@ from mock import Mock, patch
 from functools import partial
 
 from courseware.model_data import DjangoKeyValueStore
-from courseware.model_data import InvalidScopeError, FieldDataCache
+from courseware.model_data import InvalidScopeError, FieldDataCache, BulkFieldDataCache
 from courseware.models import StudentModule
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
@@ -339,3 +339,46 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+class TestBulkFieldDataCache(TestCase):
+    """Tests for FieldDataCache backed by a BulkFieldDataCache"""
+    def setUp(self):
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value'}))
+        self.user = student_module.student
+        self.other_user = UserFactory.create()
+        self.descriptor = mock_descriptor([mock_field(Scope.user_state, 'a_field')])
+
+    def test_prefetched_fields_are_not_queried(self):
+        bulk_cache = BulkFieldDataCache([self.descriptor], course_id, [self.user, self.other_user])
+        with self.assertNumQueries(0):
+            field_data_cache = FieldDataCache([self.descriptor], course_id, self.user, bulk_cache=bulk_cache)
+            other_field_data_cache = FieldDataCache([self.descriptor], course_id, self.other_user, bulk_cache=bulk_cache)
+        self.assertEquals('a_value', DjangoKeyValueStore(field_data_cache).get(user_state_key('a_field')))
+        self.assertIsNone(other_field_data_cache.find(
+            DjangoKeyValueStore.Key(Scope.user_state, self.other_user.id, location('usage_id'), 'a_field')
+        ))
+
+    def test_student_module_lookups(self):
+        bulk_cache = BulkFieldDataCache([self.descriptor], course_id, [self.user, self.other_user])
+        usage_id = location('usage_id')
+        self.assertTrue(bulk_cache.covers(self.user, [usage_id]))
+        self.assertFalse(bulk_cache.covers(self.user, [location('not_prefetched')]))
+        self.assertTrue(bulk_cache.has_student_modules(self.user, [usage_id]))
+        self.assertFalse(bulk_cache.has_student_modules(self.other_user, [usage_id]))
+        self.assertEquals(
+            StudentModule.objects.get(student=self.user).id,
+            bulk_cache.get_student_module(self.user, usage_id).id
+        )
+
+    def test_uncovered_user_is_queried(self):
+        bulk_cache = BulkFieldDataCache([self.descriptor], course_id, [self.other_user])
+        field_data_cache = FieldDataCache([self.descriptor], course_id, self.user, bulk_cache=bulk_cache)
+        self.assertEquals('a_value', DjangoKeyValueStore(field_data_cache).get(user_state_key('a_field')))
+
+    def test_created_student_module_is_shared(self):
+        bulk_cache = BulkFieldDataCache([self.descriptor], course_id, [self.user, self.other_user])
+        field_data_cache = FieldDataCache([self.descriptor], course_id, self.other_user, bulk_cache=bulk_cache)
+        key = DjangoKeyValueStore.Key(Scope.user_state, self.other_user.id, location('usage_id'), 'a_field')
+        DjangoKeyValueStore(field_data_cache).set(key, 'other_value')
+        self.assertTrue(bulk_cache.has_student_modules(self.other_user, [location('usage_id')]))
@@ -0,0 +1,82 @@
+"""
+Tests of the xqueue outbox.
+"""
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from django.test.utils import override_settings
+from mock import Mock, patch
+from pytz import UTC
+
+from capa.xqueue_interface import make_xheader
+from courseware.models import XQueueSubmission
+from courseware.xqueue_outbox import OutboxXQueueInterface, flush_outbox
+
+HEADER = make_xheader('http://lms/callback', 'key', 'queue')
+
+
+@override_settings(XQUEUE_OUTBOX={'batch_size': 2, 'max_attempts': 2})
+class XQueueOutboxTest(TestCase):
+    """
+    Test saving submissions in the outbox, and flushing it.
+    """
+    def setUp(self):
+        self.outbox_interface = OutboxXQueueInterface('http://xqueue', {'username': 'lms', 'password': 'secret'})
+        self.interface = Mock()
+        self.interface.send_to_queue.return_value = (0, 'Queued')
+
+    def test_send_to_queue_saves_submission(self):
+        with patch('capa.xqueue_interface.XQueueInterface._http_post') as http_post:
+            self.assertEqual(self.outbox_interface.send_to_queue(HEADER, 'body'), (0, ''))
+        self.assertFalse(http_post.called)
+
+        submission = XQueueSubmission.objects.get()
+        self.assertEqual((submission.header, submission.body), (HEADER, 'body'))
+
+    def test_send_to_queue_with_files(self):
+        with patch('capa.xqueue_interface.XQueueInterface._http_post') as http_post:
+            http_post.return_value = (0, 'Queued')
+            self.assertEqual(self.outbox_interface.send_to_queue(HEADER, 'body', [Mock(name='file')]), (0, 'Queued'))
+        self.assertTrue(http_post.called)
+        self.assertFalse(XQueueSubmission.objects.exists())
+
+    def test_flush(self):
+        for i in range(5):
+            self.outbox_interface.send_to_queue(HEADER, 'body {}'.format(i))
+
+        self.assertEqual(flush_outbox(self.interface), (5, 0))
+        self.assertEqual(
+            [call[0][1] for call in self.interface.send_to_queue.call_args_list],
+            ['body {}'.format(i) for i in range(5)]
+        )
+        self.assertFalse(XQueueSubmission.objects.exists())
+
+    def test_flush_retries_with_backoff(self):
+        self.outbox_interface.send_to_queue(HEADER, 'body')
+        self.interface.send_to_queue.return_value = (1, 'cannot connect to server')
+
+        self.assertEqual(flush_outbox(self.interface), (0, 1))
+        submission = XQueueSubmission.objects.get()
+        self.assertEqual(submission.attempts, 1)
+        self.assertEqual(submission.last_error, 'cannot connect to server')
+        self.assertGreater(submission.next_attempt, datetime.now(UTC))
+        self.assertFalse(submission.failed)
+
+        # not due again until the backoff delay has passed
+        self.assertEqual(flush_outbox(self.interface), (0, 0))
+
+        XQueueSubmission.objects.update(next_attempt=datetime.now(UTC) - timedelta(seconds=1))
+        self.assertEqual(flush_outbox(self.interface), (0, 1))
+        self.assertTrue(XQueueSubmission.objects.get().failed)
+
+        # failed submissions aren't sent anymore
+        XQueueSubmission.objects.update(next_attempt=datetime.now(UTC) - timedelta(seconds=1))
+        self.assertEqual(flush_outbox(self.interface), (0, 0))
+
+    def test_claim(self):
+        self.outbox_interface.send_to_queue(HEADER, 'body')
+        first, second = XQueueSubmission.objects.get(), XQueueSubmission.objects.get()
+
+        # two workers fetched the submission, only one of them can send it
+        self.assertTrue(first.claim(timedelta(minutes=5)))
+        self.assertFalse(second.claim(timedelta(minutes=5)))
@@ -755,9 +755,11 @@ def _progress(request, course_key, student_id):
     # additional DB lookup (this kills the Progress page in particular).
     student = User.objects.prefetch_related("groups").get(id=student.id)
 
+    # Grade first: with persistent grades enabled this stores the section
+    # scores that progress_summary can then reuse.
+    grade_summary = grades.grade(student, request, course)
     courseware_summary = grades.progress_summary(student, request, course)
     studio_url = get_studio_url(course_key, 'settings/grading')
-    grade_summary = grades.grade(student, request, course)
 
     if courseware_summary is None:
         #This means the student didn't have access to the course (which the instructor requested)
@@ -0,0 +1,127 @@
+"""
+Asynchronous submission to the external grader (xqueue), through an outbox.
+
+With FEATURES['ENABLE_XQUEUE_OUTBOX'], the submissions of students (and
+certificate requests) are saved as XQueueSubmission rows instead of being
+posted to xqueue while handling the request. The flush_xqueue_outbox command
+then sends them in batches over a single session, retrying failed sends with
+an exponential backoff.
+"""
+from datetime import timedelta
+import logging
+
+from django.conf import settings
+from dogapi import dog_stats_api
+from requests.auth import HTTPBasicAuth
+
+from capa.xqueue_interface import XQueueInterface
+from courseware.models import XQueueSubmission
+
+log = logging.getLogger(__name__)
+
+# default outbox settings, overridable in settings.XQUEUE_OUTBOX
+OUTBOX_DEFAULTS = {
+    # how many submissions are fetched at once
+    'batch_size': 100,
+    # how many times a submission is sent before giving up on it
+    'max_attempts': 10,
+    # delay before the first retry, doubled at each attempt up to max_retry_delay (seconds)
+    'retry_delay': 5,
+    'max_retry_delay': 3600,
+    # how long a worker has to send a submission it claimed, before others can (seconds)
+    'lease': 300,
+    # how long to wait for xqueue to respond (seconds)
+    'timeout': 30,
+}
+
+
+def outbox_setting(name):
+    """
+    Return the value of an outbox setting, see OUTBOX_DEFAULTS.
+    """
+    return getattr(settings, 'XQUEUE_OUTBOX', {}).get(name, OUTBOX_DEFAULTS[name])
+
+
+def xqueue_interface(timeout=None):
+    """
+    Return an interface posting directly to the xqueue server of the settings.
+    """
+    if settings.XQUEUE_INTERFACE.get('basic_auth') is not None:
+        requests_auth = HTTPBasicAuth(*settings.XQUEUE_INTERFACE['basic_auth'])
+    else:
+        requests_auth = None
+
+    return XQueueInterface(
+        settings.XQUEUE_INTERFACE['url'],
+        settings.XQUEUE_INTERFACE['django_auth'],
+        requests_auth,
+        timeout=timeout,
+    )
+
+
+class OutboxXQueueInterface(XQueueInterface):
+    """
+    An XQueueInterface saving submissions in the outbox, to be sent by
+    flush_outbox.
+
+    Submissions with files to upload can't be saved, so they are still
+    posted right away.
+    """
+
+    def send_to_queue(self, header, body, files_to_upload=None):
+        """
+        Save a submission to xqueue in the outbox, see XQueueInterface.send_to_queue.
+
+        Returns (0, '') as the length of the queue isn't known yet.
+        """
+        if files_to_upload:
+            return super(OutboxXQueueInterface, self).send_to_queue(header, body, files_to_upload)
+
+        XQueueSubmission.enqueue(header, body)
+        dog_stats_api.increment('xqueue_outbox.enqueued')
+        return (0, '')
+
+
+def flush_outbox(interface=None):
+    """
+    Send the submissions due in the outbox to xqueue, until there are none left.
+
+    Submissions are claimed before being sent (see XQueueSubmission.claim), so
+    several workers can flush the outbox at the same time.
+
+    Returns a tuple of the numbers of submissions sent, and that failed to be sent.
+    """
+    if interface is None:
+        interface = xqueue_interface(timeout=outbox_setting('timeout'))
+
+    lease = timedelta(seconds=outbox_setting('lease'))
+    retry_delay = timedelta(seconds=outbox_setting('retry_delay'))
+    max_retry_delay = timedelta(seconds=outbox_setting('max_retry_delay'))
+    max_attempts = outbox_setting('max_attempts')
+
+    sent = failed = 0
+    while True:
+        submissions = XQueueSubmission.due(outbox_setting('batch_size'))
+        if not submissions:
+            break
+
+        for submission in submissions:
+            if not submission.claim(lease):
+                continue
+
+            error, msg = interface.send_to_queue(submission.header, submission.body)
+            if error:
+                failed += 1
+                dog_stats_api.increment('xqueue_outbox.send', tags=['result:failure'])
+                log.warning(u"Failed to send xqueue submission %s: %s", submission.id, msg)
+                submission.record_failure(msg, max_attempts, retry_delay, max_retry_delay)
+                if submission.failed:
+                    log.error(
+                        u"Giving up on xqueue submission %s after %s attempts", submission.id, submission.attempts
+                    )
+            else:
+                sent += 1
+                dog_stats_api.increment('xqueue_outbox.send', tags=['result:success'])
+                submission.delete()
+
+    return sent, failed
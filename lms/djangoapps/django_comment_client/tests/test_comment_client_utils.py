@@ -0,0 +1,51 @@
+"""
+Tests for the HTTP helpers of lms.lib.comment_client.
+"""
+from django.test import TestCase
+from django.utils import translation
+from mock import patch, Mock
+
+from lms.lib.comment_client import utils
+from lms.lib.comment_client import settings as cc_settings
+
+
+class SessionTestCase(TestCase):
+    """
+    Test that requests to the comments service share a keep-alive session.
+    """
+    def test_session_is_reused(self):
+        self.assertIs(utils.get_session(), utils.get_session())
+
+    @patch('lms.lib.comment_client.utils.requests.Session.request')
+    def test_perform_request(self, mock_request):
+        mock_request.return_value = Mock(status_code=200, json=Mock(return_value={'id': 'dummy'}))
+        self.assertEqual(utils.perform_request('get', cc_settings.PREFIX + '/threads/dummy'), {'id': 'dummy'})
+        self.assertEqual(mock_request.call_args[1]['timeout'], cc_settings.TIMEOUT)
+
+    def test_endpoint(self):
+        self.assertEqual(
+            utils._endpoint(cc_settings.PREFIX + '/threads/53a1c0f1a2d9e1b6d8000001/comments'),  # pylint: disable=protected-access
+            '/threads/:id/comments'
+        )
+        self.assertEqual(utils._endpoint(cc_settings.PREFIX + '/users/42'), '/users/:id')  # pylint: disable=protected-access
+
+
+class RunConcurrentlyTestCase(TestCase):
+    """
+    Test run_concurrently.
+    """
+    def test_results_in_order(self):
+        self.assertEqual(utils.run_concurrently(lambda: 1, lambda: 2, lambda: 3), [1, 2, 3])
+
+    def test_exception(self):
+        def fail():
+            """Fail like a missing thread."""
+            raise utils.CommentClientRequestError("Not found", 404)
+
+        with self.assertRaises(utils.CommentClientRequestError):
+            utils.run_concurrently(lambda: 1, fail)
+
+    def test_language(self):
+        translation.activate('eo')
+        self.addCleanup(translation.deactivate)
+        self.assertEqual(utils.run_concurrently(translation.get_language, translation.get_language), ['eo', 'eo'])
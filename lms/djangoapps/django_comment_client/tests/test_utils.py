@@ -134,6 +134,22 @@ class CoursewareContextTestCase(ModuleStoreTestCase):
         assertThreadCorrect(threads[1], self.discussion2, "Subsection / Discussion 2")
 
 
+class DictCache(object):
+    """
+    Stands in for the general cache.
+    """
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        """Get a key from the cache."""
+        return self.data.get(key)
+
+    def set(self, key, value, timeout=None):  # pylint: disable=unused-argument
+        """Set a key in the cache."""
+        self.data[key] = value
+
+
 @override_settings(MODULESTORE=TEST_DATA_MONGO_MODULESTORE)
 class CategoryMapTestCase(ModuleStoreTestCase):
     def setUp(self):
@@ -173,6 +189,48 @@ class CategoryMapTestCase(ModuleStoreTestCase):
             {"entries": {}, "subcategories": {}, "children": []}
         )
 
+    def test_cached_per_course_version(self):
+        self.create_discussion("Chapter", "Discussion")
+        cache = DictCache()
+        with mock.patch('django_comment_client.utils.cache', cache):
+            with mock.patch.object(self.course, 'subtree_edited_on', datetime(2014, 1, 1, tzinfo=UTC), create=True):
+                category_map = utils.get_discussion_category_map(self.course)
+                self.assertEqual(category_map["children"], ["Chapter"])
+                with mock.patch('django_comment_client.utils.modulestore') as mock_modulestore:
+                    self.assertEqual(utils.get_discussion_category_map(self.course), category_map)
+                self.assertFalse(mock_modulestore.called)
+
+            # a new version of the course is recomputed
+            self.create_discussion("Other Chapter", "Discussion")
+            with mock.patch.object(self.course, 'subtree_edited_on', datetime(2014, 1, 2, tzinfo=UTC), create=True):
+                self.assertEqual(
+                    utils.get_discussion_category_map(self.course)["children"],
+                    ["Chapter", "Other Chapter"]
+                )
+        self.assertEqual(len(cache.data), 2)
+
+    def test_cached_per_structure_version(self):
+        self.create_discussion("Chapter", "Discussion")
+        cache = DictCache()
+        with mock.patch('django_comment_client.utils.cache', cache):
+            for version_guid in ['version1', 'version1', 'version2']:
+                course_entry = {'structure': {'_id': version_guid}}
+                with mock.patch.object(self.course.runtime, 'course_entry', course_entry, create=True):
+                    utils.get_discussion_category_map(self.course)
+        self.assertEqual(len(cache.data), 2)
+        self.assertTrue(all('structure-version' in key for key in cache.data))
+
+    def test_cached_map_is_filtered_per_request(self):
+        self.create_discussion("Chapter", "Discussion", start=datetime(2014, 1, 2, tzinfo=UTC))
+        cache = DictCache()
+        with mock.patch('django_comment_client.utils.cache', cache):
+            with mock.patch.object(self.course, 'subtree_edited_on', datetime(2014, 1, 1, tzinfo=UTC), create=True):
+                with mock.patch('django_comment_client.utils.datetime') as mock_datetime:
+                    mock_datetime.now.return_value = datetime(2014, 1, 1, tzinfo=UTC)
+                    mock_datetime.max = datetime.max
+                    self.assertEqual(utils.get_discussion_category_map(self.course)["children"], [])
+                self.assertEqual(utils.get_discussion_category_map(self.course)["children"], ["Chapter"])
+
     def test_configured_topics(self):
         self.course.discussion_topics = {
             "Topic A": {"id": "Topic_A"},
@@ -14,6 +14,7 @@ from django_comment_client.permissions import check_permissions_by_view
 from edxmako import lookup_template
 import pystache_custom as pystache
 
+from util.cache import cache
 from xmodule.modulestore.django import modulestore
 from django.utils.timezone import UTC
 from opaque_keys.edx.locations import i4xEncoder
@@ -22,6 +23,9 @@ import json
 
 log = logging.getLogger(__name__)
 
+# how long, in seconds, the category map of a version of a course is cached
+CATEGORY_MAP_CACHE_TIMEOUT = 24 * 60 * 60
+
 
 def extract(dic, keys):
     return {k: dic.get(k) for k in keys}
@@ -129,9 +133,50 @@ def _sort_map_entries(category_map, sort_alpha):
     category_map["children"] = [x[0] for x in sorted(things, key=lambda x: x[1]["sort_key"])]
 
 
+def _course_version(course):
+    """
+    Return a string which changes whenever anything in the course is edited, or
+    None if the modulestore of the course doesn't keep track of edits.
+
+    Split courses are versioned by the structure they were loaded from, which
+    is replaced on every edit (or publish) of the course. Old mongo courses are
+    versioned by the last edit of anything in the course.
+    """
+    version_guid = getattr(course.id, 'version_guid', None)
+    if version_guid is None:
+        course_entry = getattr(course.runtime, 'course_entry', None)
+        if course_entry is not None:
+            version_guid = course_entry['structure']['_id']
+    if version_guid is not None:
+        return u'structure-{}'.format(version_guid)
+
+    edited_on = getattr(course, 'subtree_edited_on', None)
+    return unicode(edited_on) if edited_on is not None else None
+
+
 def get_discussion_category_map(course):
-    course_id = course.id
+    """
+    Return the map of the discussion categories of the course which have started.
 
+    The map of all the categories is cached for each version of the course, so
+    that only the filtering by start date is done per request.
+    """
+    version = _course_version(course)
+    if version is None:
+        return _filter_unstarted_categories(_build_discussion_category_map(course))
+
+    key = u"django_comment_client.category_map.{}.{}".format(course.id.to_deprecated_string(), version)
+    category_map = cache.get(key)
+    if category_map is None:
+        category_map = _build_discussion_category_map(course)
+        cache.set(key, category_map, CATEGORY_MAP_CACHE_TIMEOUT)
+    return _filter_unstarted_categories(category_map)
+
+
+def _build_discussion_category_map(course):
+    """
+    Return the map of all the discussion categories of the course, with their start dates.
+    """
     unexpanded_category_map = defaultdict(list)
 
     modules = _get_discussion_modules(course)
@@ -197,7 +242,7 @@ def get_discussion_category_map(course):
 
     _sort_map_entries(category_map, course.discussion_sort_alpha)
 
-    return _filter_unstarted_categories(category_map)
+    return category_map
 
 
 class JsonResponse(HttpResponse):
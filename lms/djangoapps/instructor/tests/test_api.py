@@ -142,6 +142,7 @@ class TestInstructorAPIDenyLevels(ModuleStoreTestCase, LoginEnrollmentTestCase):
             ('list_background_email_tasks', {}),
             ('list_report_downloads', {}),
             ('calculate_grades_csv', {}),
+            ('refresh_gradebook', {}),
         ]
         # Endpoints that only Instructors can access
         self.instructor_level_endpoints = [
@@ -1413,6 +1414,22 @@ class TestInstructorAPILevelsDataDump(ModuleStoreTestCase, LoginEnrollmentTestCa
         already_running_status = "A grade report generation task is already in progress. Check the 'Pending Instructor Tasks' table for the status of the task. When completed, the report will be available for download in the table below."
         self.assertIn(already_running_status, response.content)
 
+    def test_refresh_gradebook_success(self):
+        url = reverse('refresh_gradebook', kwargs={'course_id': self.course.id.to_deprecated_string()})
+
+        with patch('instructor_task.api.submit_refresh_gradebook') as mock_refresh:
+            mock_refresh.return_value = True
+            response = self.client.post(url, {})
+        self.assertIn("The grades are being recomputed.", response.content)
+
+    def test_refresh_gradebook_already_running(self):
+        url = reverse('refresh_gradebook', kwargs={'course_id': self.course.id.to_deprecated_string()})
+
+        with patch('instructor_task.api.submit_refresh_gradebook') as mock_refresh:
+            mock_refresh.side_effect = AlreadyRunningError()
+            response = self.client.post(url, {})
+        self.assertIn("The grades are already being recomputed.", response.content)
+
     def test_get_students_features_csv(self):
         """
         Test that some minimum of information is formatted
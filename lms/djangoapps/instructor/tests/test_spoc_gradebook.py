@@ -1,14 +1,19 @@
 """
 Tests of the instructor dashboard spoc gradebook
 """
+from datetime import datetime
+import re
 
 from django.test.utils import override_settings
 from django.core.urlresolvers import reverse
+from mock import patch
+from pytz import UTC
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from student.tests.factories import UserFactory, CourseEnrollmentFactory, AdminFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from courseware.tests.tests import TEST_DATA_MIXED_MODULESTORE
 from capa.tests.response_xml_factory import StringResponseXMLFactory
+from courseware.models import StudentGradeSummary
 from courseware.tests.factories import StudentModuleFactory
 from xmodule.modulestore.django import modulestore
 
@@ -166,3 +171,72 @@ class TestLetterCutoffPolicy(TestGradebook):
         # User 0 has 0 on the class [1]
         # One use at the top of the page [1]
         self.assertEquals(3, self.response.content.count('grade_None'))
+
+
+class TestGradebookPages(TestGradebook):
+    """
+    Tests the sorting, filtering and pagination of the gradebook, over the
+    grade summaries stored when it was first shown.
+    """
+    def get_gradebook(self, **params):
+        """
+        Return the users listed, in order, on the gradebook page for `params`.
+        """
+        response = self.client.get(
+            reverse('spoc_gradebook', args=(self.course.id.to_deprecated_string(),)), params
+        )
+        self.assertEquals(response.status_code, 200)
+        users = {user.id: user for user in self.users}
+        return [users[int(user_id)] for user_id in re.findall(r'/progress/(\d+)/', response.content)]
+
+    def test_summaries_stored(self):
+        self.assertEquals(StudentGradeSummary.enrolled_in(self.course.id).count(), USER_COUNT)
+
+    def test_sort_by_grade(self):
+        # the more problems a user solved, the later it was created
+        self.assertEquals(self.get_gradebook(sort='-grade')[0], self.users[-1])
+        self.assertEquals(self.get_gradebook(sort='grade')[0], self.users[0])
+
+    def test_search(self):
+        self.assertEquals(self.get_gradebook(search=self.users[3].username), [self.users[3]])
+
+    def test_students_not_graded_yet(self):
+        user = UserFactory.create()
+        CourseEnrollmentFactory.create(user=user, course_id=self.course.id)
+        self.users.append(user)
+        with patch.dict('django.conf.settings.FEATURES', {'MAX_ENROLLMENT_INSTR_BUTTONS': 0}):
+            self.assertEquals(self.get_gradebook(sort='username'), sorted(self.users, key=lambda u: (u.username, u.id)))
+            self.assertIn(user, self.get_gradebook(sort='grade')[:1])
+        self.assertFalse(StudentGradeSummary.objects.filter(user=user).exists())
+
+    def test_stale_summaries_are_regraded(self):
+        user = self.users[0]
+        StudentGradeSummary.mark_stale(user.id, self.course.id)
+        summary = StudentGradeSummary.objects.get(user=user, course_id=self.course.id)
+        self.assertIsNotNone(summary.stale_since)
+        self.get_gradebook()
+        summary = StudentGradeSummary.objects.get(user=user, course_id=self.course.id)
+        self.assertIsNone(summary.stale_since)
+
+    def test_score_change_while_grading(self):
+        user = self.users[0]
+        graded_since = datetime.now(UTC)
+        StudentGradeSummary.mark_stale(user.id, self.course.id)
+        StudentGradeSummary.save_gradeset(user, self.course.id, {}, 'error', graded_since)
+        summary = StudentGradeSummary.objects.get(user=user, course_id=self.course.id)
+        self.assertIsNotNone(summary.stale_since)
+        self.assertEquals(summary.error, 'error')
+
+    def test_search_is_escaped(self):
+        response = self.client.get(
+            reverse('spoc_gradebook', args=(self.course.id.to_deprecated_string(),)),
+            {'search': '"><script>alert(1)</script>', 'grade': '"><b>'}
+        )
+        self.assertNotIn('<script>alert(1)</script>', response.content)
+        self.assertNotIn('"><b>', response.content)
+
+    def test_pages(self):
+        with patch('instructor.views.api.GRADEBOOK_PAGE_SIZE', 5):
+            pages = [self.get_gradebook(sort='-grade', page=page) for page in (1, 2, 3)]
+        self.assertEquals([len(page) for page in pages], [5, 5, 1])
+        self.assertEquals(pages[0] + pages[1] + pages[2], self.users[::-1])
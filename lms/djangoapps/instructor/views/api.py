@@ -14,8 +14,10 @@ from django.conf import settings
 from django_future.csrf import ensure_csrf_cookie
 from django.views.decorators.cache import cache_control
 from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.core.urlresolvers import reverse
 from django.core.validators import validate_email
+from django.db.models import Q
 from django.utils.translation import ugettext as _
 from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden
 from django.utils.html import strip_tags
@@ -32,12 +34,13 @@ from django_comment_common.models import (
     FORUM_ROLE_COMMUNITY_TA,
 )
 from edxmako.shortcuts import render_to_response
-from courseware.models import StudentModule
-from student.models import CourseEnrollment, unique_id_for_user, anonymous_id_for_user
+from courseware.models import StudentModule, StudentGradeSummary
+from student.models import CourseEnrollment, UserProfile, unique_id_for_user, anonymous_id_for_user
 import instructor_task.api
 from instructor_task.api_helper import AlreadyRunningError
 from instructor_task.views import get_task_completion_info
 from instructor_task.models import ReportStore
+from instructor_task.gradebook import update_grade_summaries
 import instructor.enrollment as enrollment
 from instructor.enrollment import (
     enroll_email,
@@ -46,7 +49,6 @@ from instructor.enrollment import (
     unenroll_email
 )
 from instructor.access import list_with_level, allow_access, revoke_access, update_forum_role
-from instructor.offline_gradecalc import student_grades
 import analytics.basic
 import analytics.distributions
 import analytics.csvs
@@ -1309,41 +1311,128 @@ def _split_input_list(str_list):
     return new_list
 
 
-#---- Gradebook (shown to small courses only) ----
+#---- Gradebook ----
+
+# number of students shown on each page of the gradebook
+GRADEBOOK_PAGE_SIZE = 50
+
+# the columns the gradebook can be sorted by, and their fields
+GRADEBOOK_SORT_FIELDS = {
+    'username': 'username',
+    'name': 'profile__name',
+    'email': 'email',
+    'grade': 'summary_percent',
+}
+
+
+@ensure_csrf_cookie
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
 @require_level('staff')
 def spoc_gradebook(request, course_id):
     """
-    Show the gradebook for this course:
-    - Only shown for courses with enrollment < settings.FEATURES.get("MAX_ENROLLMENT_INSTR_BUTTONS")
+    Show a page of the gradebook for this course, from the grade summaries of
+    the students computed by the refresh_gradebook instructor task:
+    - sorted by the `sort` query parameter, a key of GRADEBOOK_SORT_FIELDS
+      prefixed by '-' for the descending order
+    - filtered by `search` (part of the username, email or name of the
+      students) and `grade` (a letter grade)
+    - paginated by `page`
     - Only displayed to course staff
+
+    Every enrolled student is listed, those who have not been graded yet
+    without grades. The students of courses with up to
+    settings.FEATURES.get("MAX_ENROLLMENT_INSTR_BUTTONS") students are graded
+    when the gradebook is shown if they have no summary or a stale one.
     """
     course_key = SlashSeparatedCourseKey.from_deprecated_string(course_id)
-    course = get_course_with_access(request.user, 'staff', course_key, depth=None)
-
-    enrolled_students = User.objects.filter(
-        courseenrollment__course_id=course_key,
-        courseenrollment__is_active=1
-    ).order_by('username').select_related("profile")
-
-    # possible extension: implement pagination to show to large courses
-
-    student_info = [
-        {
-            'username': student.username,
-            'id': student.id,
-            'email': student.email,
-            'grade_summary': student_grades(student, request, course),
-            'realname': student.profile.name,
-        }
-        for student in enrolled_students
-    ]
+    course = get_course_with_access(request.user, 'staff', course_key)
+
+    outdated_students = StudentGradeSummary.outdated_students(course_key)
+    max_enrollment_for_buttons = settings.FEATURES.get("MAX_ENROLLMENT_INSTR_BUTTONS")
+    if max_enrollment_for_buttons is not None and \
+            CourseEnrollment.num_enrolled_in(course_key) <= max_enrollment_for_buttons:
+        update_grade_summaries(course_key, list(outdated_students))
+
+    students = StudentGradeSummary.with_students(CourseEnrollment.users_enrolled_in(course_key), course_key)
+
+    sort = request.GET.get('sort', 'username')
+    if sort.lstrip('-') not in GRADEBOOK_SORT_FIELDS:
+        sort = 'username'
+    order = ('-' if sort.startswith('-') else '') + GRADEBOOK_SORT_FIELDS[sort.lstrip('-')]
+    students = students.order_by(order, 'id')
+
+    search = request.GET.get('search', '').strip()
+    if search:
+        students = students.filter(
+            Q(username__icontains=search) |
+            Q(email__icontains=search) |
+            Q(profile__name__icontains=search)
+        )
+    letter_grade = request.GET.get('grade', '')
+    if letter_grade:
+        students = StudentGradeSummary.students_with_letter_grade(students, course_key, letter_grade)
+
+    paginator = Paginator(students, GRADEBOOK_PAGE_SIZE)
+    try:
+        page = paginator.page(request.GET.get('page', 1))
+    except PageNotAnInteger:
+        page = paginator.page(1)
+    except EmptyPage:
+        page = paginator.page(paginator.num_pages)
+
+    # the summaries and names of the students of the page, in two queries
+    user_ids = [user.id for user in page.object_list]
+    summaries = {
+        summary.user_id: summary
+        for summary in StudentGradeSummary.objects.filter(course_id=course_key, user__id__in=user_ids)
+    }
+    names = dict(UserProfile.objects.filter(user__id__in=user_ids).values_list('user_id', 'name'))
+
+    student_info = []
+    for user in page.object_list:
+        summary = summaries.get(user.id)
+        student_info.append({
+            'username': user.username,
+            'id': user.id,
+            'email': user.email,
+            # None if the student has not been graded yet
+            'grade_summary': {
+                'percent': summary.percent or 0,
+                'section_breakdown': summary.get_sections(),
+            } if summary is not None else None,
+            'error': summary.error if summary is not None else '',
+            'stale': summary is not None and summary.stale_since is not None,
+            'realname': names.get(user.id, ''),
+        })
 
     return render_to_response('courseware/gradebook.html', {
         'students': student_info,
+        'page': page,
+        'query': {'sort': sort, 'search': search, 'grade': letter_grade},
+        'last_updated': StudentGradeSummary.last_updated(course_key),
+        'num_outdated': outdated_students.count(),
         'course': course,
         'course_id': course_key,
         # Checked above
         'staff_access': True,
         'ordered_grades': sorted(course.grade_cutoffs.items(), key=lambda i: i[1], reverse=True),
     })
+
+
+@ensure_csrf_cookie
+@cache_control(no_cache=True, no_store=True, must_revalidate=True)
+@require_level('staff')
+def refresh_gradebook(request, course_id):
+    """
+    Submit a task recomputing the grade summaries shown in the gradebook.
+    """
+    course_key = SlashSeparatedCourseKey.from_deprecated_string(course_id)
+    try:
+        instructor_task.api.submit_refresh_gradebook(request, course_key)
+        success_status = _("The grades are being recomputed. Reload this page once they are done to see them.")
+        return JsonResponse({"status": success_status})
+    except AlreadyRunningError:
+        already_running_status = _("The grades are already being recomputed.")
+        return JsonResponse({
+            "status": already_running_status
+        })
@@ -54,7 +54,9 @@ urlpatterns = patterns('',  # nopep8
     url(r'calculate_grades_csv$',
         'instructor.views.api.calculate_grades_csv', name="calculate_grades_csv"),
 
-    # spoc gradebook
+    # gradebook
     url(r'^gradebook$',
         'instructor.views.api.spoc_gradebook', name='spoc_gradebook'),
+    url(r'^refresh_gradebook$',
+        'instructor.views.api.refresh_gradebook', name='refresh_gradebook'),
 )
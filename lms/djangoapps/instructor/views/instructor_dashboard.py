@@ -200,17 +200,10 @@ def _section_membership(course_key, access):
 
 def _section_student_admin(course_key, access):
     """ Provide data for the corresponding dashboard section """
-    is_small_course = False
-    enrollment_count = CourseEnrollment.num_enrolled_in(course_key)
-    max_enrollment_for_buttons = settings.FEATURES.get("MAX_ENROLLMENT_INSTR_BUTTONS")
-    if max_enrollment_for_buttons is not None:
-        is_small_course = enrollment_count <= max_enrollment_for_buttons
-
     section_data = {
         'section_key': 'student_admin',
         'section_display_name': _('Student Admin'),
         'access': access,
-        'is_small_course': is_small_course,
         'get_student_progress_url_url': reverse('get_student_progress_url', kwargs={'course_id': course_key.to_deprecated_string()}),
         'enrollment_url': reverse('students_update_enrollment', kwargs={'course_id': course_key.to_deprecated_string()}),
         'reset_student_attempts_url': reverse('reset_student_attempts', kwargs={'course_id': course_key.to_deprecated_string()}),
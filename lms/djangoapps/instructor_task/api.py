@@ -17,7 +17,8 @@ from instructor_task.tasks import (rescore_problem,
                                    reset_problem_attempts,
                                    delete_problem_state,
                                    send_bulk_course_email,
-                                   calculate_grades_csv)
+                                   calculate_grades_csv,
+                                   refresh_gradebook)
 
 from instructor_task.api_helper import (check_arguments_for_rescoring,
                                         encode_problem_and_student_input,
@@ -218,3 +219,18 @@ def submit_calculate_grades_csv(request, course_key):
     task_key = ""
 
     return submit_task(request, task_type, task_class, course_key, task_input, task_key)
+
+
+def submit_refresh_gradebook(request, course_key):
+    """
+    Submits a task to recompute the grade summaries shown in the gradebook of
+    a course.
+
+    AlreadyRunningError is raised if the gradebook is already being refreshed.
+    """
+    task_type = 'refresh_gradebook'
+    task_class = refresh_gradebook
+    task_input = {}
+    task_key = ""
+
+    return submit_task(request, task_type, task_class, course_key, task_input, task_key)
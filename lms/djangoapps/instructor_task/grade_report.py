@@ -0,0 +1,250 @@
+"""
+Parallel generation of grade reports.
+
+The grades of a large course are computed by subtasks that each grade a range
+of student ids and store their rows as a partial CSV file in the `ReportStore`.
+Once the last of these subtasks has completed, a final merge subtask streams
+the partial files into the report files that instructors download, and
+deletes the parts.
+
+Progress is tracked through the same `InstructorTask` subtask machinery as
+bulk email (see `instructor_task.subtasks`).
+"""
+from datetime import datetime
+from itertools import count
+import json
+from uuid import uuid4
+
+from celery import task
+from celery.states import SUCCESS, FAILURE
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from pytz import UTC
+
+from instructor_task.models import InstructorTask, ReportStore
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    queue_subtasks_for_query,
+    check_subtask_is_valid,
+    update_subtask_status,
+)
+from instructor_task.tasks_helper import (
+    GRADE_REPORT_ERROR_HEADER,
+    grade_report_name,
+    iter_grade_report_rows,
+    push_grades_to_s3,
+)
+from student.models import CourseEnrollment
+
+TASK_LOG = get_task_logger(__name__)
+
+
+def _part_filename(report_name, part_index, suffix=''):
+    """
+    Return the ReportStore filename of a part of a report. Parts are stored in
+    a subdirectory, so they are not listed as downloadable reports.
+    """
+    return u"parts/{}/{:05d}{}.csv".format(report_name, part_index, suffix)
+
+
+def perform_delegate_grade_report(xmodule_instance_args, entry_id, course_id, task_input, action_name):
+    """
+    Generate the grade report of a course.
+
+    Courses with no more than settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK
+    enrolled students are graded by this task itself. Otherwise the enrolled
+    students are split by id into ranges of that size, and a subtask is queued
+    to grade each range, followed by a merge subtask.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    enrolled_students = CourseEnrollment.users_enrolled_in(course_id).order_by('id')
+    students_per_task = settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK
+    if enrolled_students.count() <= students_per_task:
+        return push_grades_to_s3(xmodule_instance_args, entry_id, course_id, task_input, action_name)
+
+    # Check to see if subtasks have already been defined, which can happen if the
+    # task is requeued after a loss of connection to the broker.  See
+    # bulk_email.tasks.perform_delegate_email_batches.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already been processed for grade report!  InstructorTask = %s",
+                         entry.task_id, entry)
+        return json.loads(entry.task_output)
+
+    report_name = grade_report_name(course_id, datetime.now(UTC))
+    merge_subtask_id = str(uuid4())
+    part_indexes = count()
+
+    def _create_grade_subtask(student_list, initial_subtask_status):
+        """Creates a subtask to grade the range of student ids covered by `student_list`."""
+        student_id_range = (student_list[0]['pk'], student_list[-1]['pk'])
+        return calculate_grades_csv_part.subtask(
+            (
+                entry_id,
+                report_name,
+                next(part_indexes),
+                student_id_range,
+                merge_subtask_id,
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    TASK_LOG.info(u"Task %s: Preparing to queue subtasks for grade report %s", entry.task_id, report_name)
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_grade_subtask,
+        enrolled_students,
+        [],
+        students_per_task,
+        followup_subtask_ids=[merge_subtask_id],
+    )
+
+
+def _finish_grade_subtask(entry_id, subtask_status, report_name, merge_subtask_id):
+    """
+    Record the final status of a grading subtask. The subtask that completes
+    the last range of students queues the merge subtask.
+
+    Raises ValueError if the status could not be recorded, since whether the
+    merge subtask is due is then unknown, rather than never queueing it.
+    """
+    num_remaining = update_subtask_status(entry_id, subtask_status.task_id, subtask_status)
+    if num_remaining is None:
+        msg = u"Grade report {}: the status of subtask {} of instructor task {} was not recorded".format(
+            report_name, subtask_status.task_id, entry_id
+        )
+        TASK_LOG.error(msg)
+        raise ValueError(msg)
+    if num_remaining == 1:
+        entry = InstructorTask.objects.get(pk=entry_id)
+        num_parts = json.loads(entry.subtasks)['total'] - 1
+        TASK_LOG.info(u"Grade report %s: all %s parts done, queueing merge", report_name, num_parts)
+        merge_grades_csv_parts.apply_async(
+            (entry_id, report_name, num_parts, SubtaskStatus.create(merge_subtask_id).to_dict()),
+            task_id=merge_subtask_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=E1102
+def calculate_grades_csv_part(entry_id, report_name, part_index, student_id_range, merge_subtask_id,
+                              subtask_status_dict):
+    """
+    Grade the students enrolled in the course of the InstructorTask `entry_id`
+    whose ids are within the inclusive `student_id_range`, and store their rows
+    as part `part_index` of the report `report_name`.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    course_id = InstructorTask.objects.get(pk=entry_id).course_id
+    min_student_id, max_student_id = student_id_range
+    students = CourseEnrollment.users_enrolled_in(course_id).filter(
+        id__gte=min_student_id, id__lte=max_student_id
+    ).order_by('id')
+
+    def student_graded(succeeded):
+        """Count a graded student in the subtask status"""
+        if succeeded:
+            subtask_status.increment(succeeded=1)
+        else:
+            subtask_status.increment(failed=1)
+
+    try:
+        report_store = ReportStore.from_config()
+        err_rows = [GRADE_REPORT_ERROR_HEADER]
+        report_store.store_rows(
+            course_id,
+            _part_filename(report_name, part_index),
+            iter_grade_report_rows(course_id, students.iterator(), err_rows, student_graded)
+        )
+        if len(err_rows) > 1:
+            report_store.store_rows(course_id, _part_filename(report_name, part_index, '_err'), err_rows)
+    except Exception:
+        TASK_LOG.exception(u"Grade report %s: part %s failed unexpectedly", report_name, part_index)
+        subtask_status.increment(state=FAILURE)
+        _finish_grade_subtask(entry_id, subtask_status, report_name, merge_subtask_id)
+        raise
+
+    subtask_status.increment(state=SUCCESS)
+    _finish_grade_subtask(entry_id, subtask_status, report_name, merge_subtask_id)
+    return subtask_status.to_dict()
+
+
+def _merged_rows(report_store, course_id, filenames):
+    """
+    Yield the rows of the CSV files `filenames` as a single CSV document with
+    one header row. Parts whose header differs from the first one have their
+    columns reordered to match it, and missing columns are filled with 0.0.
+    """
+    header = None
+    for filename in filenames:
+        rows = report_store.iter_rows(course_id, filename)
+        part_header = next(rows, None)
+        if part_header is None:
+            continue
+        if header is None:
+            header = part_header
+            yield header
+
+        if part_header == header:
+            for row in rows:
+                yield row
+        else:
+            TASK_LOG.warning(u"Header of %s differs from the first part, reordering its columns", filename)
+            for row in rows:
+                values = dict(zip(part_header, row))
+                yield [values.get(column, 0.0) for column in header]
+
+
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=E1102
+def merge_grades_csv_parts(entry_id, report_name, num_parts, subtask_status_dict):
+    """
+    Merge the `num_parts` parts of the grade report `report_name` into the
+    final report files, and delete the parts.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    course_id = InstructorTask.objects.get(pk=entry_id).course_id
+    report_store = ReportStore.from_config()
+    try:
+        part_filenames = []
+        err_part_filenames = []
+        for part_index in range(num_parts):
+            filename = _part_filename(report_name, part_index)
+            if report_store.exists(course_id, filename):
+                part_filenames.append(filename)
+            else:
+                TASK_LOG.warning(u"Grade report %s: part %s is missing", report_name, part_index)
+            err_filename = _part_filename(report_name, part_index, '_err')
+            if report_store.exists(course_id, err_filename):
+                err_part_filenames.append(err_filename)
+
+        report_store.store_rows(
+            course_id,
+            u"{}.csv".format(report_name),
+            _merged_rows(report_store, course_id, part_filenames)
+        )
+        if err_part_filenames:
+            report_store.store_rows(
+                course_id,
+                u"{}_err.csv".format(report_name),
+                _merged_rows(report_store, course_id, err_part_filenames)
+            )
+
+        for filename in part_filenames + err_part_filenames:
+            report_store.delete(course_id, filename)
+    except Exception:
+        TASK_LOG.exception(u"Grade report %s: merge failed unexpectedly", report_name)
+        subtask_status.increment(state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise
+
+    subtask_status.increment(state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    return subtask_status.to_dict()
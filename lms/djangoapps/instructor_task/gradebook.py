@@ -0,0 +1,160 @@
+"""
+Background refresh of the instructor gradebook.
+
+The gradebook shows the StudentGradeSummary of each enrolled student, which
+are recomputed by the refresh_gradebook task. As for grade reports (see
+`instructor_task.grade_report`), the students of large courses are split by
+id into ranges graded in parallel by subtasks.
+"""
+from datetime import datetime
+import json
+
+from celery import task
+from celery.states import SUCCESS, FAILURE
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from pytz import UTC
+
+from courseware.grades import iterate_grades_for
+from courseware.models import StudentGradeSummary
+from instructor_task.models import InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    queue_subtasks_for_query,
+    check_subtask_is_valid,
+    update_subtask_status,
+)
+from instructor_task.tasks_helper import _get_current_task
+from student.models import CourseEnrollment
+
+TASK_LOG = get_task_logger(__name__)
+
+
+def update_grade_summaries(course_id, students, graded_callback=None):
+    """
+    Grade `students` in `course_id`, saving their StudentGradeSummary.
+
+    If provided, `graded_callback` is called after each student with True if
+    the student was graded, False otherwise.
+    """
+    graded_since = datetime.now(UTC)
+    for student, gradeset, err_msg in iterate_grades_for(course_id, students):
+        StudentGradeSummary.save_gradeset(student, course_id, gradeset, err_msg, graded_since)
+        if graded_callback is not None:
+            graded_callback(bool(gradeset))
+
+
+def perform_delegate_gradebook_refresh(_xmodule_instance_args, entry_id, course_id, _task_input, action_name):
+    """
+    Recompute the grade summaries of the students enrolled in a course.
+
+    Courses with no more than settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK
+    enrolled students are graded by this task itself, others by subtasks each
+    grading a range of that many students.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    enrolled_students = CourseEnrollment.users_enrolled_in(course_id).order_by('id')
+    students_per_task = settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK
+    if enrolled_students.count() <= students_per_task:
+        return _refresh_gradebook(course_id, enrolled_students, action_name)
+
+    # Check to see if subtasks have already been defined, which can happen if the
+    # task is requeued after a loss of connection to the broker.  See
+    # bulk_email.tasks.perform_delegate_email_batches.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already been processed for gradebook refresh!  InstructorTask = %s",
+                         entry.task_id, entry)
+        return json.loads(entry.task_output)
+
+    def _create_gradebook_subtask(student_list, initial_subtask_status):
+        """Creates a subtask to grade the range of student ids covered by `student_list`."""
+        student_id_range = (student_list[0]['pk'], student_list[-1]['pk'])
+        return refresh_gradebook_part.subtask(
+            (entry_id, student_id_range, initial_subtask_status.to_dict()),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    TASK_LOG.info(u"Task %s: Preparing to queue subtasks for the gradebook of %s", entry.task_id, course_id)
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_gradebook_subtask,
+        enrolled_students,
+        [],
+        students_per_task,
+    )
+
+
+def _refresh_gradebook(course_id, students, action_name):
+    """
+    Grade all `students` serially, updating the task progress as it goes.
+    """
+    start_time = datetime.now(UTC)
+    status_interval = 100
+    progress = {
+        'attempted': 0,
+        'succeeded': 0,
+        'failed': 0,
+        'total': students.count(),
+        'step': "Calculating Grades",
+    }
+
+    def update_task_progress():
+        """Return a dict containing info about current task"""
+        current_time = datetime.now(UTC)
+        task_progress = dict(
+            progress,
+            action_name=action_name,
+            duration_ms=int((current_time - start_time).total_seconds() * 1000),
+        )
+        _get_current_task().update_state(state=PROGRESS, meta=task_progress)
+        return task_progress
+
+    def student_graded(succeeded):
+        """Count a graded student, periodically updating task status (this is a cache write)"""
+        if progress['attempted'] % status_interval == 0:
+            update_task_progress()
+        progress['attempted'] += 1
+        progress['succeeded' if succeeded else 'failed'] += 1
+
+    update_grade_summaries(course_id, students.iterator(), student_graded)
+    return update_task_progress()
+
+
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=E1102
+def refresh_gradebook_part(entry_id, student_id_range, subtask_status_dict):
+    """
+    Recompute the grade summaries of the students enrolled in the course of
+    the InstructorTask `entry_id` whose ids are within the inclusive
+    `student_id_range`.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    course_id = InstructorTask.objects.get(pk=entry_id).course_id
+    min_student_id, max_student_id = student_id_range
+    students = CourseEnrollment.users_enrolled_in(course_id).filter(
+        id__gte=min_student_id, id__lte=max_student_id
+    ).order_by('id')
+
+    def student_graded(succeeded):
+        """Count a graded student in the subtask status"""
+        if succeeded:
+            subtask_status.increment(succeeded=1)
+        else:
+            subtask_status.increment(failed=1)
+
+    try:
+        update_grade_summaries(course_id, students.iterator(), student_graded)
+    except Exception:
+        TASK_LOG.exception(u"Gradebook of %s: students %s to %s failed unexpectedly",
+                           course_id, min_student_id, max_student_id)
+        subtask_status.increment(state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise
+
+    subtask_status.increment(state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    return subtask_status.to_dict()
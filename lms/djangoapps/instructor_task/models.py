@@ -14,12 +14,14 @@ ASSUMPTIONS: modules have unique IDs, even across different module_types
 """
 from cStringIO import StringIO
 from gzip import GzipFile
+from tempfile import NamedTemporaryFile
 from uuid import uuid4
 import csv
 import json
 import hashlib
 import os.path
 import urllib
+import zlib
 
 from boto.s3.connection import S3Connection
 from boto.s3.key import Key
@@ -222,6 +224,10 @@ class S3ReportStore(ReportStore):
     conventions on where files are stored to know what to display. Clients using
     this class can name the final file whatever they want.
     """
+    # Size of the parts in which large files are uploaded. S3 requires all
+    # parts of a multipart upload but the last one to be at least 5MB.
+    MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
     def __init__(self, bucket_name, root_path):
         self.root_path = root_path
 
@@ -298,29 +304,107 @@ class S3ReportStore(ReportStore):
     def store_rows(self, course_id, filename, rows):
         """
         Given a `course_id`, `filename`, and `rows` (each row is an iterable of
-        strings), create a buffer that is a gzip'd csv file, and then `store()`
-        that buffer.
+        strings), write a gzip'd csv file to S3.
+
+        `rows` may be any iterable, including a generator: rows are compressed
+        as they are consumed, and once more than `MULTIPART_CHUNK_SIZE` bytes
+        of compressed data are buffered they are sent as one part of a
+        multipart upload. Memory use is thus bounded regardless of the number
+        of rows, and the file only becomes visible in S3 once it is complete.
+        Small files are uploaded in a single request.
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
         """
         output_buffer = StringIO()
         gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
-        csv.writer(gzip_file).writerows(rows)
-        gzip_file.close()
+        writer = csv.writer(gzip_file)
+        multipart_upload = None
+        num_parts = 0
+        try:
+            for row in rows:
+                writer.writerow(row)
+                if output_buffer.tell() >= self.MULTIPART_CHUNK_SIZE:
+                    if multipart_upload is None:
+                        multipart_upload = self.bucket.initiate_multipart_upload(
+                            self.key_for(course_id, filename).key,
+                            headers={"Content-Encoding": "gzip", "Content-Type": "text/csv"},
+                        )
+                    num_parts += 1
+                    self._upload_part(multipart_upload, num_parts, output_buffer)
+            gzip_file.close()
+
+            if multipart_upload is None:
+                self.store(course_id, filename, output_buffer)
+            else:
+                self._upload_part(multipart_upload, num_parts + 1, output_buffer)
+                multipart_upload.complete_upload()
+        except Exception:
+            if multipart_upload is not None:
+                multipart_upload.cancel_upload()
+            raise
 
-        self.store(course_id, filename, output_buffer)
+    @staticmethod
+    def _upload_part(multipart_upload, part_num, buff):
+        """
+        Upload the contents of `buff` as part `part_num` of `multipart_upload`,
+        then empty `buff`.
+        """
+        buff.seek(0)
+        multipart_upload.upload_part_from_file(buff, part_num)
+        buff.seek(0)
+        buff.truncate()
+
+    def _get_key(self, course_id, filename):
+        """Return the existing S3 key for `filename`, or None if it doesn't exist."""
+        return self.bucket.get_key(self.key_for(course_id, filename).key)
+
+    def exists(self, course_id, filename):
+        """Return True if `filename` has been stored for `course_id`."""
+        return self._get_key(course_id, filename) is not None
+
+    def iter_rows(self, course_id, filename):
+        """
+        Return an iterator over the CSV rows of a file previously written with
+        `store_rows()`. The file is downloaded and decompressed incrementally,
+        so it is never held in memory as a whole.
+        """
+        key = self._get_key(course_id, filename)
+        if key is None:
+            raise IOError(u"No report {} for course {}".format(filename, course_id))
+
+        def iter_lines():
+            """Yield the lines of the gzip'd key, decompressing chunk by chunk."""
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            pending = ''
+            for chunk in key:
+                pending += decompressor.decompress(chunk)
+                lines = pending.split('\n')
+                pending = lines.pop()
+                for line in lines:
+                    yield line + '\n'
+            pending += decompressor.flush()
+            if pending:
+                yield pending
+
+        return csv.reader(iter_lines())
+
+    def delete(self, course_id, filename):
+        """Delete `filename` for `course_id`, if it exists."""
+        self.bucket.delete_key(self.key_for(course_id, filename).key)
 
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples. `url`
-        can be plugged straight into an href
+        can be plugged straight into an href. Files stored in subdirectories
+        (like the parts of a report that is being generated) are not listed.
         """
         course_dir = self.key_for(course_id, '')
         return sorted(
             [
                 (key.key.split("/")[-1], key.generate_url(expires_in=300))
                 for key in self.bucket.list(prefix=course_dir.key)
+                if "/" not in key.key[len(course_dir.key):]
             ],
             reverse=True
         )
@@ -373,7 +457,7 @@ class LocalFSReportStore(ReportStore):
         full_path = self.path_to(course_id, filename)
         directory = os.path.dirname(full_path)
         if not os.path.exists(directory):
-            os.mkdir(directory)
+            os.makedirs(directory)
 
         with open(full_path, "wb") as f:
             f.write(buff.getvalue())
@@ -381,11 +465,41 @@ class LocalFSReportStore(ReportStore):
     def store_rows(self, course_id, filename, rows):
         """
         Given a course_id, filename, and rows (each row is an iterable of strings),
-        write this data out.
+        write this data out. `rows` is consumed lazily and written to a temporary
+        file that replaces `filename` once all rows have been written.
         """
-        output_buffer = StringIO()
-        csv.writer(output_buffer).writerows(rows)
-        self.store(course_id, filename, output_buffer)
+        full_path = self.path_to(course_id, filename)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        temp_file = NamedTemporaryFile(dir=directory, prefix=".", delete=False)
+        try:
+            with temp_file:
+                csv.writer(temp_file).writerows(rows)
+            os.rename(temp_file.name, full_path)
+        except Exception:
+            os.remove(temp_file.name)
+            raise
+
+    def exists(self, course_id, filename):
+        """Return True if `filename` has been stored for `course_id`."""
+        return os.path.isfile(self.path_to(course_id, filename))
+
+    def iter_rows(self, course_id, filename):
+        """
+        Return an iterator over the CSV rows of a file previously written with
+        `store_rows()`, reading the file lazily.
+        """
+        with open(self.path_to(course_id, filename), "rb") as f:
+            for row in csv.reader(f):
+                yield row
+
+    def delete(self, course_id, filename):
+        """Delete `filename` for `course_id`, if it exists."""
+        full_path = self.path_to(course_id, filename)
+        if os.path.exists(full_path):
+            os.remove(full_path)
 
     def links_for(self, course_id):
         """
@@ -393,7 +507,8 @@ class LocalFSReportStore(ReportStore):
         can be plugged straight into an href. Note that `LocalFSReportStore`
         will generate `file://` type URLs, so you'll need to copy the URL and
         open it in a new browser window. Again, this class is only meant for
-        local development.
+        local development. Subdirectories (like the parts of a report that is
+        being generated) and files still being written are not listed.
         """
         course_dir = self.path_to(course_id, '')
         if not os.path.exists(course_dir):
@@ -402,6 +517,7 @@ class LocalFSReportStore(ReportStore):
             [
                 (filename, ("file://" + urllib.quote(os.path.join(course_dir, filename))))
                 for filename in os.listdir(course_dir)
+                if os.path.isfile(os.path.join(course_dir, filename)) and not filename.startswith(".")
             ],
             reverse=True
         )
@@ -30,8 +30,9 @@ from instructor_task.tasks_helper import (
     rescore_problem_module_state,
     reset_attempts_module_state,
     delete_problem_module_state,
-    push_grades_to_s3,
 )
+from instructor_task.grade_report import perform_delegate_grade_report
+from instructor_task.gradebook import perform_delegate_gradebook_refresh
 from bulk_email.tasks import perform_delegate_email_batches
 
 
@@ -135,7 +136,23 @@ def send_bulk_course_email(entry_id, _xmodule_instance_args):
 def calculate_grades_csv(entry_id, xmodule_instance_args):
     """
     Grade a course and push the results to an S3 bucket for download.
+
+    Large courses are graded in parallel by subtasks; see
+    `instructor_task.grade_report`.
+    """
+    action_name = ugettext_noop('graded')
+    task_fn = partial(perform_delegate_grade_report, xmodule_instance_args)
+    return run_main_task(entry_id, task_fn, action_name)
+
+
+@task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=E1102
+def refresh_gradebook(entry_id, xmodule_instance_args):
+    """
+    Recompute the grade summaries shown in the gradebook of a course.
+
+    Large courses are graded in parallel by subtasks; see
+    `instructor_task.gradebook`.
     """
     action_name = ugettext_noop('graded')
-    task_fn = partial(push_grades_to_s3, xmodule_instance_args)
+    task_fn = partial(perform_delegate_gradebook_refresh, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
@@ -469,62 +469,41 @@ def delete_problem_module_state(xmodule_instance_args, _module_descriptor, stude
     return UPDATE_STATUS_SUCCEEDED
 
 
-def push_grades_to_s3(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+def grade_report_name(course_id, start_time):
     """
-    For a given `course_id`, generate a grades CSV file for all students that
-    are enrolled, and store using a `ReportStore`. Once created, the files can
-    be accessed by instantiating another `ReportStore` (via
-    `ReportStore.from_config()`) and calling `link_for()` on it. Writes are
-    buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
-    that are visible in ReportStore will be complete ones.
-
-    As we start to add more CSV downloads, it will probably be worthwhile to
-    make a more general CSVDoc class instead of building out the rows like we
-    do here.
+    Return the base name (without extension) of the grade report files
+    generated for `course_id` by a task started at `start_time`.
     """
-    start_time = datetime.now(UTC)
-    status_interval = 100
+    timestamp_str = start_time.strftime("%Y-%m-%d-%H%M")
+    course_id_prefix = urllib.quote(course_id.to_deprecated_string().replace("/", "_"))
+    return u"{}_grade_report_{}".format(course_id_prefix, timestamp_str)
 
-    enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
-    num_total = enrolled_students.count()
-    num_attempted = 0
-    num_succeeded = 0
-    num_failed = 0
-    curr_step = "Calculating Grades"
 
-    def update_task_progress():
-        """Return a dict containing info about current task"""
-        current_time = datetime.now(UTC)
-        progress = {
-            'action_name': action_name,
-            'attempted': num_attempted,
-            'succeeded': num_succeeded,
-            'failed': num_failed,
-            'total': num_total,
-            'duration_ms': int((current_time - start_time).total_seconds() * 1000),
-            'step': curr_step,
-        }
-        _get_current_task().update_state(state=PROGRESS, meta=progress)
+# Header row of the CSV file listing the students that could not be graded
+GRADE_REPORT_ERROR_HEADER = ["id", "username", "error_msg"]
 
-        return progress
 
-    # Loop over all our students and build our CSV lists in memory
-    header = None
-    rows = []
-    err_rows = [["id", "username", "error_msg"]]
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
-        # Periodically update task status (this is a cache write)
-        if num_attempted % status_interval == 0:
-            update_task_progress()
-        num_attempted += 1
+def iter_grade_report_rows(course_id, students, err_rows, graded_callback=None):
+    """
+    Grade `students` in `course_id`, yielding a CSV row for each student that
+    could be graded, preceded by a header row (unless no student could be
+    graded). Rows are produced one student at a time, so they can be streamed
+    to a `ReportStore` without holding the whole report in memory.
+
+    A row is appended to the `err_rows` list for each student that could not
+    be graded.
 
+    If provided, `graded_callback` is called after each student with True if
+    the student was graded, False otherwise.
+    """
+    header = None
+    for student, gradeset, err_msg in iterate_grades_for(course_id, students):
         if gradeset:
             # We were able to successfully grade this student for this course.
-            num_succeeded += 1
             if not header:
                 # Encode the header row in utf-8 encoding in case there are unicode characters
                 header = [section['label'].encode('utf-8') for section in gradeset[u'section_breakdown']]
-                rows.append(["id", "email", "username", "grade"] + header)
+                yield ["id", "email", "username", "grade"] + header
 
             percents = {
                 section['label']: section.get('percent', 0.0)
@@ -539,35 +518,75 @@ def push_grades_to_s3(_xmodule_instance_args, _entry_id, course_id, _task_input,
             # possible for a student to have a 0.0 show up in their row but
             # still have 100% for the course.
             row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append([student.id, student.email, student.username, gradeset['percent']] + row_percents)
+            yield [student.id, student.email, student.username, gradeset['percent']] + row_percents
         else:
             # An empty gradeset means we failed to grade a student.
-            num_failed += 1
             err_rows.append([student.id, student.username, err_msg])
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    curr_step = "Uploading CSVs"
-    update_task_progress()
+        if graded_callback is not None:
+            graded_callback(bool(gradeset))
 
-    # Generate parts of the file name
-    timestamp_str = start_time.strftime("%Y-%m-%d-%H%M")
-    course_id_prefix = urllib.quote(course_id.to_deprecated_string().replace("/", "_"))
 
-    # Perform the actual upload
+def push_grades_to_s3(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+    """
+    For a given `course_id`, generate a grades CSV file for all students that
+    are enrolled, and store using a `ReportStore`. Once created, the files can
+    be accessed by instantiating another `ReportStore` (via
+    `ReportStore.from_config()`) and calling `link_for()` on it. Rows are
+    streamed to the ReportStore as students are graded, but we'll never write
+    part of a CSV file to S3 -- i.e. any files that are visible in ReportStore
+    will be complete ones.
+
+    All students are graded serially by this task. Large courses are instead
+    split into parallel subtasks by `grade_report.perform_delegate_grade_report`.
+    """
+    start_time = datetime.now(UTC)
+    status_interval = 100
+
+    enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
+    progress = {
+        'attempted': 0,
+        'succeeded': 0,
+        'failed': 0,
+        'total': enrolled_students.count(),
+        'step': "Calculating Grades",
+    }
+
+    def update_task_progress():
+        """Return a dict containing info about current task"""
+        current_time = datetime.now(UTC)
+        task_progress = dict(
+            progress,
+            action_name=action_name,
+            duration_ms=int((current_time - start_time).total_seconds() * 1000),
+        )
+        _get_current_task().update_state(state=PROGRESS, meta=task_progress)
+
+        return task_progress
+
+    def student_graded(succeeded):
+        """Count a graded student, periodically updating task status (this is a cache write)"""
+        if progress['attempted'] % status_interval == 0:
+            update_task_progress()
+        progress['attempted'] += 1
+        progress['succeeded' if succeeded else 'failed'] += 1
+
+    # Grade all our students, uploading their rows as we go
+    report_name = grade_report_name(course_id, start_time)
     report_store = ReportStore.from_config()
+    err_rows = [GRADE_REPORT_ERROR_HEADER]
     report_store.store_rows(
         course_id,
-        u"{}_grade_report_{}.csv".format(course_id_prefix, timestamp_str),
-        rows
+        u"{}.csv".format(report_name),
+        iter_grade_report_rows(course_id, enrolled_students.iterator(), err_rows, student_graded)
     )
 
+    progress['step'] = "Uploading CSVs"
+    update_task_progress()
+
     # If there are any error rows (don't count the header), write them out as well
     if len(err_rows) > 1:
-        report_store.store_rows(
-            course_id,
-            u"{}_grade_report_{}_err.csv".format(course_id_prefix, timestamp_str),
-            err_rows
-        )
+        report_store.store_rows(course_id, u"{}_err.csv".format(report_name), err_rows)
 
     # One last update before we close out...
     return update_task_progress()
@@ -0,0 +1,129 @@
+"""
+Unit tests for the parallel generation of grade reports.
+"""
+import json
+import os
+import shutil
+import tempfile
+from uuid import uuid4
+
+from celery.states import SUCCESS
+from django.test import TestCase
+from django.test.utils import override_settings
+from mock import patch
+
+from instructor_task.grade_report import perform_delegate_grade_report, _finish_grade_subtask, _merged_rows
+from instructor_task.models import InstructorTask, LocalFSReportStore
+from instructor_task.subtasks import SubtaskStatus
+from instructor_task.tests.factories import InstructorTaskFactory
+from instructor_task.tests.test_base import InstructorTaskCourseTestCase, TEST_COURSE_KEY
+
+
+class TestLocalFSReportStore(TestCase):
+    """Tests for the LocalFSReportStore methods used to split and merge reports."""
+
+    def setUp(self):
+        self.root_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root_path)
+        self.report_store = LocalFSReportStore(self.root_path)
+
+    def test_iter_rows(self):
+        rows = [["id", "username"], ["1", "alice"], ["2", "bob"]]
+        self.report_store.store_rows(TEST_COURSE_KEY, "report.csv", rows)
+        self.assertTrue(self.report_store.exists(TEST_COURSE_KEY, "report.csv"))
+        self.assertEqual(list(self.report_store.iter_rows(TEST_COURSE_KEY, "report.csv")), rows)
+
+    def test_store_rows_from_generator(self):
+        rows = (["row", str(index)] for index in range(3))
+        self.report_store.store_rows(TEST_COURSE_KEY, "report.csv", rows)
+        self.assertEqual(
+            list(self.report_store.iter_rows(TEST_COURSE_KEY, "report.csv")),
+            [["row", "0"], ["row", "1"], ["row", "2"]]
+        )
+        # Only the complete file is left behind
+        self.assertEqual(os.listdir(self.report_store.path_to(TEST_COURSE_KEY, '')), ["report.csv"])
+
+    def test_store_rows_failure(self):
+        def rows():
+            """Yield a row, then fail like a report task grading a student could."""
+            yield ["id"]
+            raise ValueError("grading failed")
+
+        with self.assertRaises(ValueError):
+            self.report_store.store_rows(TEST_COURSE_KEY, "report.csv", rows())
+        self.assertEqual(os.listdir(self.report_store.path_to(TEST_COURSE_KEY, '')), [])
+
+    def test_delete(self):
+        self.report_store.store_rows(TEST_COURSE_KEY, "report.csv", [["id"]])
+        self.report_store.delete(TEST_COURSE_KEY, "report.csv")
+        self.assertFalse(self.report_store.exists(TEST_COURSE_KEY, "report.csv"))
+        # Deleting a missing file is not an error
+        self.report_store.delete(TEST_COURSE_KEY, "report.csv")
+
+    def test_links_skip_parts(self):
+        self.report_store.store_rows(TEST_COURSE_KEY, "report.csv", [["id"]])
+        self.report_store.store_rows(TEST_COURSE_KEY, "parts/report/00000.csv", [["id"]])
+        self.assertEqual(
+            [filename for filename, _url in self.report_store.links_for(TEST_COURSE_KEY)],
+            ["report.csv"]
+        )
+
+    def test_merged_rows(self):
+        self.report_store.store_rows(TEST_COURSE_KEY, "a.csv", [["id", "HW 01", "Lab 01"], ["1", "0.5", "1.0"]])
+        self.report_store.store_rows(TEST_COURSE_KEY, "b.csv", [])
+        self.report_store.store_rows(TEST_COURSE_KEY, "c.csv", [["id", "Lab 01", "HW 01"], ["2", "0.0", "1.0"]])
+        merged = list(_merged_rows(self.report_store, TEST_COURSE_KEY, ["a.csv", "b.csv", "c.csv"]))
+        self.assertEqual(
+            merged,
+            [["id", "HW 01", "Lab 01"], ["1", "0.5", "1.0"], ["2", "1.0", "0.0"]]
+        )
+
+
+class TestParallelGradeReport(InstructorTaskCourseTestCase):
+    """Tests that large courses are graded by subtasks whose results are merged."""
+
+    def setUp(self):
+        self.initialize_course()
+        self.root_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root_path)
+        self.students = [self.create_student('student{}'.format(index)) for index in range(5)]
+
+    def _run_report(self):
+        """Run a grade report task for the test course, and return its InstructorTask."""
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_type='grade_course',
+        )
+        settings_override = {
+            'GRADES_DOWNLOAD_STUDENTS_PER_TASK': 2,
+            'GRADES_DOWNLOAD': {'STORAGE_TYPE': 'localfs', 'ROOT_PATH': self.root_path},
+        }
+        with override_settings(**settings_override):
+            perform_delegate_grade_report(None, entry.id, self.course.id, {}, 'graded')
+        return InstructorTask.objects.get(pk=entry.id)
+
+    def test_subtasks_merged(self):
+        entry = self._run_report()
+        self.assertEqual(entry.task_state, SUCCESS)
+        subtasks = json.loads(entry.subtasks)
+        # Three grading subtasks and the merge subtask
+        self.assertEqual(subtasks['total'], 4)
+        self.assertEqual(subtasks['succeeded'], 4)
+        self.assertEqual(json.loads(entry.task_output)['succeeded'], 5)
+
+        report_store = LocalFSReportStore(self.root_path)
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        rows = list(report_store.iter_rows(self.course.id, links[0][0]))
+        self.assertEqual(rows[0][:4], ['id', 'email', 'username', 'grade'])
+        self.assertEqual([int(row[0]) for row in rows[1:]], [student.id for student in self.students])
+
+    def test_unrecorded_subtask_status(self):
+        entry = InstructorTaskFactory.create(course_id=self.course.id, task_id=str(uuid4()))
+        subtask_status = SubtaskStatus.create(str(uuid4()), state=SUCCESS)
+        with patch('instructor_task.grade_report.update_subtask_status', return_value=None):
+            with patch('instructor_task.grade_report.merge_grades_csv_parts') as mock_merge:
+                with self.assertRaises(ValueError):
+                    _finish_grade_subtask(entry.id, subtask_status, 'report', str(uuid4()))
+        self.assertFalse(mock_merge.apply_async.called)
@@ -0,0 +1,53 @@
+"""
+Unit tests for the background refresh of the instructor gradebook.
+"""
+import json
+from uuid import uuid4
+
+from celery.states import SUCCESS
+from django.test.utils import override_settings
+from mock import patch
+
+from courseware.models import StudentGradeSummary
+from instructor_task.gradebook import perform_delegate_gradebook_refresh
+from instructor_task.models import InstructorTask
+from instructor_task.tests.factories import InstructorTaskFactory
+from instructor_task.tests.test_base import InstructorTaskCourseTestCase
+
+
+class TestGradebookRefresh(InstructorTaskCourseTestCase):
+    """Tests that the grade summaries of the students are recomputed, by subtasks for large courses."""
+
+    def setUp(self):
+        self.initialize_course()
+        self.students = [self.create_student('student{}'.format(index)) for index in range(5)]
+
+    def _refresh(self, students_per_task):
+        """Run a gradebook refresh task for the test course, and return its InstructorTask."""
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_type='refresh_gradebook',
+        )
+        with override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=students_per_task):
+            perform_delegate_gradebook_refresh(None, entry.id, self.course.id, {}, 'graded')
+        return InstructorTask.objects.get(pk=entry.id)
+
+    def _summarized_students(self):
+        """The ids of the students with a grade summary."""
+        return sorted(
+            StudentGradeSummary.enrolled_in(self.course.id).filter(percent__isnull=False).values_list('user_id', flat=True)
+        )
+
+    def test_refresh_in_subtasks(self):
+        entry = self._refresh(students_per_task=2)
+        self.assertEqual(entry.task_state, SUCCESS)
+        subtasks = json.loads(entry.subtasks)
+        self.assertEqual(subtasks['total'], 3)
+        self.assertEqual(subtasks['succeeded'], 3)
+        self.assertEqual(self._summarized_students(), [student.id for student in self.students])
+
+    def test_refresh_in_task(self):
+        with patch('instructor_task.gradebook._get_current_task'):
+            self._refresh(students_per_task=10)
+        self.assertEqual(self._summarized_students(), [student.id for student in self.students])
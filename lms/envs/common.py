@@ -210,6 +210,18 @@ FEATURES = {
     # when enrollment exceeds this number
     'MAX_ENROLLMENT_INSTR_BUTTONS': 200,
 
+    # Store per-section grades and only recompute the sections whose scores
+    # changed. Run the rebuild_persistent_grades command after enabling.
+    'ENABLE_PERSISTENT_GRADES': False,
+
+    # Index the max scores of problems, so that the problems a student hasn't
+    # attempted don't need to be instantiated to compute their grade.
+    'ENABLE_MAX_SCORE_INDEX': False,
+
+    # Save submissions to the external grader in an outbox table, sent by the
+    # flush_xqueue_outbox command, instead of posting them during the request.
+    'ENABLE_XQUEUE_OUTBOX': False,
+
     # Grade calculation started from the new instructor dashboard will write
     # grades CSV files to S3 and give links for downloads.
     'ENABLE_S3_GRADE_DOWNLOADS': False,
@@ -542,6 +554,13 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # How many results of sandboxed executions to keep in each process, in
+    # front of the shared cache.  0 means only use the shared cache.
+    'results_cache_size': 1000,
+    # How many sandboxed executions each process may run at once.  None means
+    # no limit.
+    'max_concurrent_execs': None,
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -1186,6 +1205,11 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Number of SMTP connections each bulk email task sends messages over in
+# parallel.  The retry delay above is applied on each connection, so a
+# throttled task sends up to this many messages per delay.
+BULK_EMAIL_CONNECTIONS_PER_TASK = 1
+
 
 ############################## Video ##########################################
 
@@ -1384,6 +1408,10 @@ CERT_NAME_LONG = "Certificate of Achievement"
 ###################### Grade Downloads ######################
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
+# Courses with more enrolled students than this are graded by parallel
+# subtasks that each grade this many students.
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = 1000
+
 GRADES_DOWNLOAD = {
     'STORAGE_TYPE': 'localfs',
     'BUCKET': 'edx-grades',
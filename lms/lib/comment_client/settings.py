@@ -6,3 +6,12 @@ else:
     SERVICE_HOST = 'http://localhost:4567'
 
 PREFIX = SERVICE_HOST + '/api/v1'
+
+# How many connections to the comments service each process keeps open
+POOL_SIZE = getattr(settings, "COMMENTS_SERVICE_POOL_SIZE", 10)
+
+# How long, in seconds, to wait for the comments service
+TIMEOUT = getattr(settings, "COMMENTS_SERVICE_TIMEOUT", 5)
+
+# How many requests to the comments service each process runs at once for run_concurrently
+CONCURRENCY = getattr(settings, "COMMENTS_SERVICE_CONCURRENCY", 4)
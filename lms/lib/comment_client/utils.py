@@ -1,14 +1,32 @@
 from contextlib import contextmanager
 from dogapi import dog_stats_api
 import logging
+from multiprocessing.pool import ThreadPool
+import os
+import re
 import requests
+from requests.adapters import HTTPAdapter
+import threading
 from django.conf import settings
 from time import time
 from uuid import uuid4
+from django.utils import translation
 from django.utils.translation import get_language
 
+from . import settings as cc_settings
+
 log = logging.getLogger(__name__)
 
+# path segments which are ids of users, threads or comments
+ID_SEGMENT_RE = re.compile(r'^([0-9a-f]{24}|\d+)$')
+
+# The keep-alive session and the thread pool of the process, created on first
+# use (and again in forked processes, which mustn't share connections)
+_SESSION = None
+_POOL = None
+_PID = None
+_LOCK = threading.Lock()
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -31,6 +49,85 @@ def merge_dict(dic1, dic2):
     return dict(dic1.items() + dic2.items())
 
 
+def _check_pid():
+    """
+    Forget the session and the thread pool of the parent process after a fork.
+    Must be called with _LOCK held.
+    """
+    global _SESSION, _POOL, _PID  # pylint: disable=global-statement
+    if _PID != os.getpid():
+        _SESSION = _POOL = None
+        _PID = os.getpid()
+
+
+def get_session():
+    """
+    Return the requests session of the process, which keeps up to
+    COMMENTS_SERVICE_POOL_SIZE connections to the comments service alive.
+    """
+    global _SESSION  # pylint: disable=global-statement
+    with _LOCK:
+        _check_pid()
+        if _SESSION is None:
+            _SESSION = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=cc_settings.POOL_SIZE)
+            _SESSION.mount('http://', adapter)
+            _SESSION.mount('https://', adapter)
+        return _SESSION
+
+
+def _get_pool():
+    """
+    Return the thread pool of the process used by run_concurrently.
+    """
+    global _POOL  # pylint: disable=global-statement
+    with _LOCK:
+        _check_pid()
+        if _POOL is None:
+            _POOL = ThreadPool(cc_settings.CONCURRENCY)
+        return _POOL
+
+
+def _call_in_language(func, language):
+    """
+    Call `func` with `language` activated, as it is in the request's thread.
+    """
+    translation.activate(language)
+    try:
+        return func()
+    finally:
+        translation.deactivate()
+
+
+def run_concurrently(*funcs):
+    """
+    Call independent functions making requests to the comments service (e.g.
+    retrieving a thread and the user's info) at the same time on the thread
+    pool, and return the list of their results.
+
+    The first exception raised by a function, if any, is raised once they have
+    all returned.  The functions must not use the database, as they run in
+    other threads.
+    """
+    if len(funcs) < 2:
+        return [func() for func in funcs]
+    language = get_language()
+    pool = _get_pool()
+    results = [pool.apply_async(_call_in_language, (func, language)) for func in funcs]
+    for result in results:
+        result.wait()
+    return [result.get() for result in results]
+
+
+def _endpoint(url):
+    """
+    Return the path of `url` relative to the comments service API, with ids
+    replaced by ':id', e.g. /threads/:id/comments.
+    """
+    path = url[len(cc_settings.PREFIX):] if url.startswith(cc_settings.PREFIX) else url
+    return '/'.join(':id' if ID_SEGMENT_RE.match(segment) else segment for segment in path.split('/'))
+
+
 @contextmanager
 def request_timer(request_id, method, url, tags=None):
     start = time()
@@ -38,6 +135,11 @@ def request_timer(request_id, method, url, tags=None):
         yield
     end = time()
     duration = end - start
+    dog_stats_api.histogram(
+        'comment_client.request.endpoint.time',
+        value=duration,
+        tags=[u'method:{}'.format(method), u'endpoint:{}'.format(_endpoint(url))]
+    )
 
     log.info(
         "comment_client_request_log: request_id={request_id}, method={method}, "
@@ -76,13 +178,13 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = get_session().request(
             method,
             url,
             data=data,
             params=params,
             headers=headers,
-            timeout=5
+            timeout=cc_settings.TIMEOUT
         )
 
     metric_tags.append(u'status_code:{}'.format(response.status_code))
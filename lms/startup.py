@@ -22,6 +22,8 @@ def run():
 
     add_mimetypes()
 
+    configure_safe_exec()
+
     if settings.FEATURES.get('USE_CUSTOM_THEME', False):
         enable_theme()
 
@@ -46,6 +48,19 @@ def add_mimetypes():
     mimetypes.add_type('application/font-woff', '.woff')
 
 
+def configure_safe_exec():
+    """
+    Configure the process-wide results cache and execution limit of capa's
+    sandboxed code execution.
+    """
+    from capa.safe_exec import configure
+
+    configure(
+        results_cache_size=settings.CODE_JAIL.get('results_cache_size'),
+        max_concurrent_execs=settings.CODE_JAIL.get('max_concurrent_execs'),
+    )
+
+
 def enable_theme():
     """
     Enable the settings for a custom theme, whose files should be stored